@@ -0,0 +1,169 @@
+"""
+backend.py
+----------
+Pluggable command backend for the tools autoroam drives
+(wpa_cli, iw, journalctl).
+
+`SystemBackend` runs the real binaries with subprocess. Other backends
+(see simulator.py) override `run` and `popen` to serve the same commands
+without a radio. shell_cmd_wrapper and log_collector only talk to the
+backend returned by `get_backend()`.
+
+Every command also has an asyncio variant (`run_async`, `popen_async`,
+...) used by the async roam runner, so journal streams and commands for
+several interfaces can share one event loop instead of a thread each.
+"""
+import asyncio
+import subprocess
+from typing import List
+
+# asyncio's default 64 KiB line limit is too small for some iw/journal lines
+STREAM_LIMIT = 1 << 20
+# Fields requested with `journalctl -o json` (the timestamps are always included)
+JOURNAL_JSON_FIELDS = "MESSAGE,SYSLOG_IDENTIFIER,_COMM,_PID,_HOSTNAME"
+
+
+class AsyncProcessStream:
+    """Async handle for a long-running subprocess: `async for line in stream`."""
+
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+
+    async def __aiter__(self):
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                return
+            yield line.decode(errors="replace")
+
+    def terminate(self) -> None:
+        if self.proc.returncode is None:
+            try:
+                self.proc.terminate()
+            except ProcessLookupError:
+                pass
+
+    async def wait(self) -> int:
+        return await self.proc.wait()
+
+
+class SystemBackend:
+    """Runs commands on the host with subprocess."""
+    name = "system"
+    _journal_grep = None   # cached journal_grep_supported()
+
+    def run(self, cmd: List[str], check: bool = False) -> subprocess.CompletedProcess:
+        """Run a short-lived command and capture its output as text."""
+        return subprocess.run(cmd, capture_output=True, text=True, check=check)
+
+    def popen(self, cmd: List[str]):
+        """
+        Start a long-running command (e.g. journalctl -f) and return a handle
+        with a line-iterable `.stdout`, `.terminate()` and `.wait()`.
+        """
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+
+    async def run_async(self, cmd: List[str], check: bool = False) -> subprocess.CompletedProcess:
+        """`run` on the event loop. The child is killed if the caller is cancelled."""
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            out, err = await proc.communicate()
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        result = subprocess.CompletedProcess(
+            cmd, proc.returncode, out.decode(errors="replace"), err.decode(errors="replace"),
+        )
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        return result
+
+    async def popen_async(self, cmd: List[str]) -> AsyncProcessStream:
+        """`popen` on the event loop; the handle is async-iterable by line."""
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, limit=STREAM_LIMIT,
+        )
+        return AsyncProcessStream(proc)
+
+    # --- Convenience wrappers ---
+
+    def wpa_cli(self, iface: str, *args: str, check: bool = False) -> subprocess.CompletedProcess:
+        return self.run(self._wpa_cli_cmd(iface, *args), check=check)
+
+    def iw(self, *args: str, sudo: bool = False, check: bool = False) -> subprocess.CompletedProcess:
+        return self.run(self._iw_cmd(*args, sudo=sudo), check=check)
+
+    def journal(self, unit: str = "wpa_supplicant", grep: str | None = None, output: str = "short-precise"):
+        return self.popen(self._journal_cmd(unit, grep, output))
+
+    def journal_grep_supported(self) -> bool:
+        """Whether journalctl was built with PCRE2 (needed for --grep). Checked once."""
+        if self._journal_grep is None:
+            try:
+                out = self.run(["journalctl", "--version"]).stdout
+            except OSError:
+                out = ""
+            self._journal_grep = "+PCRE2" in out
+        return self._journal_grep
+
+    def iw_stream(self, *args: str, sudo: bool = False):
+        """`iw` with its output read line by line as it is printed (e.g. a scan dump)."""
+        return self.popen(self._iw_cmd(*args, sudo=sudo))
+
+    def iw_event(self):
+        """Stream nl80211 events with timestamps and frame details (`iw event -t -f`)."""
+        return self.popen(self._iw_event_cmd())
+
+    async def wpa_cli_async(self, iface: str, *args: str, check: bool = False) -> subprocess.CompletedProcess:
+        return await self.run_async(self._wpa_cli_cmd(iface, *args), check=check)
+
+    async def iw_async(self, *args: str, sudo: bool = False, check: bool = False) -> subprocess.CompletedProcess:
+        return await self.run_async(self._iw_cmd(*args, sudo=sudo), check=check)
+
+    async def journal_async(self, unit: str = "wpa_supplicant", grep: str | None = None,
+                            output: str = "short-precise"):
+        return await self.popen_async(self._journal_cmd(unit, grep, output))
+
+    async def iw_stream_async(self, *args: str, sudo: bool = False):
+        return await self.popen_async(self._iw_cmd(*args, sudo=sudo))
+
+    async def iw_event_async(self):
+        return await self.popen_async(self._iw_event_cmd())
+
+    @staticmethod
+    def _wpa_cli_cmd(iface: str, *args: str) -> List[str]:
+        return ["wpa_cli", "-i", iface, *args]
+
+    @staticmethod
+    def _iw_cmd(*args: str, sudo: bool = False) -> List[str]:
+        return ["sudo", "iw", *args] if sudo else ["iw", *args]
+
+    @staticmethod
+    def _journal_cmd(unit: str, grep: str | None = None, output: str = "short-precise") -> List[str]:
+        cmd = ["journalctl", "-u", unit, "-o", output, "-f"]
+        if output == "json":
+            # Only the fields JournalLine needs, and long messages in full
+            cmd += ["--all", f"--output-fields={JOURNAL_JSON_FIELDS}"]
+        return cmd + ["--grep", grep] if grep else cmd
+
+    @staticmethod
+    def _iw_event_cmd() -> List[str]:
+        return ["iw", "event", "-t", "-f"]
+
+
+_backend = SystemBackend()
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Swap the process-wide backend (e.g. for a SimulatedBackend)."""
+    global _backend
+    _backend = backend
+    print(f"[+] Using {getattr(backend, 'name', type(backend).__name__)} backend")
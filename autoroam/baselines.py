@@ -0,0 +1,205 @@
+"""
+baselines.py
+------------
+Rolling per-BSSID, per-phase latency baselines and regression flags.
+
+After every cycle, each successful roam is checked against its target
+BSSID's baseline and then folded into it. The baseline keeps the last
+`window` durations of every metric (total roam time and each phase), so
+its median tracks the AP's normal behaviour without being dragged around
+by single outliers.
+
+A roam is flagged when a metric is above
+  * ratio x the baseline median AND at least min_delta_ms above it
+    ("threshold"; the delta keeps 1 ms -> 2.5 ms jitter quiet), or
+  * an absolute limit from limits_ms ("limit").
+The cycle as a whole is flagged per BSSID/metric when its roams are
+slower than the baseline window by a Mann-Whitney test at drift_alpha and
+the median moved by at least drift_min_pct ("drift"): no single roam is
+out of line, but the AP got slower.
+
+Flags go into cycle_summary.json (per roam and in summary["regressions"])
+and the last RECENT_MAX are kept in the store for the API. Thresholds come
+from data/baseline_config.json if present, else DEFAULT_CONFIG. The store
+is data/baselines.json.
+"""
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from autoroam.common import get_data_dir
+from autoroam.compare import PHASES, mann_whitney, median
+from autoroam.results import dumps, loads
+
+STORE_FILE = "baselines.json"
+CONFIG_FILE = "baseline_config.json"
+TOTAL = "total"
+RECENT_MAX = 200
+
+DEFAULT_CONFIG = {
+    "ratio": 2.0,            # flag above ratio x baseline median ...
+    "min_delta_ms": 5.0,     # ... and at least this much above it
+    "min_samples": 10,       # no flags until a baseline has this many values
+    "window": 200,           # values kept per BSSID and metric
+    "drift_alpha": 0.01,
+    "drift_min_pct": 20.0,
+    "limits_ms": {},         # absolute limits, e.g. {"EAP": 300, "total": 500}
+}
+
+
+def _path(name: str) -> str:
+    return os.path.join(get_data_dir(), name)
+
+
+def load_config() -> Dict:
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(_path(CONFIG_FILE), "rb") as f:
+            config.update(loads(f.read()))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Ignoring {CONFIG_FILE}: {e}")
+    return config
+
+
+def load_store() -> Dict:
+    try:
+        with open(_path(STORE_FILE), "rb") as f:
+            return loads(f.read())
+    except (OSError, ValueError):
+        return {"bssids": {}, "recent": []}
+
+
+@contextmanager
+def _locked_store():
+    """Read-modify-write the store under an exclusive lock."""
+    with open(_path(STORE_FILE) + ".lock", "a") as lf:
+        fcntl.flock(lf, fcntl.LOCK_EX)
+        try:
+            store = load_store()
+            yield store
+            tmp = _path(STORE_FILE) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(dumps(store))
+            os.replace(tmp, _path(STORE_FILE))
+        finally:
+            fcntl.flock(lf, fcntl.LOCK_UN)
+
+
+def roam_metrics(roam: Dict) -> Dict[str, float]:
+    """Durations (ms) of one roam entry by metric name."""
+    values = {}
+    if roam.get("roam_duration_ms"):
+        values[TOTAL] = float(roam["roam_duration_ms"])
+    for name in PHASES:
+        d = ((roam.get("phases") or {}).get(name) or {}).get("duration_ms")
+        if isinstance(d, (int, float)):
+            values[name] = float(d)
+    return values
+
+
+def check_roam(roam: Dict, baseline: Dict, config: Dict) -> List[Dict]:
+    """Flags for one roam against its BSSID's baseline ({metric: {"values": [...]}})."""
+    flags = []
+    for metric, value in roam_metrics(roam).items():
+        limit = (config.get("limits_ms") or {}).get(metric)
+        if limit is not None and value > limit:
+            flags.append({"metric": metric, "kind": "limit", "value_ms": value, "limit_ms": limit})
+            continue
+        values = (baseline.get(metric) or {}).get("values") or []
+        if len(values) < config["min_samples"]:
+            continue
+        base = median(values)
+        if value > base * config["ratio"] and value - base >= config["min_delta_ms"]:
+            flags.append({
+                "metric": metric, "kind": "threshold", "value_ms": value,
+                "baseline_ms": base, "ratio": round(value / base, 2) if base else None,
+            })
+    return flags
+
+
+def check_drift(samples: Dict[str, List[float]], baseline: Dict, config: Dict) -> List[Dict]:
+    """Cycle-level drift of one BSSID: this cycle's values vs the baseline window."""
+    flags = []
+    for metric, values in samples.items():
+        base_values = (baseline.get(metric) or {}).get("values") or []
+        if len(base_values) < config["min_samples"]:
+            continue
+        test = mann_whitney(base_values, values)
+        if not test or test["p_value"] >= config["drift_alpha"] or test["effect"] <= 0:
+            continue
+        base, now = median(base_values), median(values)
+        if base and (now - base) / base * 100 >= config["drift_min_pct"]:
+            flags.append({
+                "metric": metric, "kind": "drift", "cycle_median_ms": now, "baseline_ms": base,
+                "p_value": test["p_value"], "roams": len(values),
+            })
+    return flags
+
+
+def apply_baselines(summary: Dict, update: bool = True, config: Optional[Dict] = None) -> Dict:
+    """
+    Flag the summary's roams against the stored baselines, then (with
+    update) fold the successful roams into them. Adds "regressions" to
+    flagged roams and a summary["regressions"] section, which is returned.
+    Flags are added to the store's recent list either way.
+    """
+    config = config or load_config()
+    now = time.time()
+    flagged, drift = [], []
+
+    with _locked_store() as store:
+        bssids = store.setdefault("bssids", {})
+        samples: Dict[str, Dict[str, List[float]]] = {}
+        ok = [r for r in summary.get("roams", []) if r.get("overall_status") == "success"]
+
+        # Check everything against the baseline as it was before this cycle
+        for roam in ok:
+            bssid = roam.get("target_bssid") or "unknown"
+            flags = check_roam(roam, bssids.get(bssid, {}), config)
+            if flags:
+                roam["regressions"] = flags
+                flagged.extend({"roam_index": roam.get("roam_index"), "bssid": bssid, **f} for f in flags)
+            for metric, value in roam_metrics(roam).items():
+                samples.setdefault(bssid, {}).setdefault(metric, []).append(value)
+        for bssid, per_metric in samples.items():
+            drift.extend({"bssid": bssid, **f} for f in check_drift(per_metric, bssids.get(bssid, {}), config))
+
+        events = [{"time": now, "run_timestamp": summary.get("timestamp"), **f} for f in flagged + drift]
+        store["recent"] = (store.get("recent", []) + events)[-RECENT_MAX:]
+        if update:
+            for bssid, per_metric in samples.items():
+                entry = bssids.setdefault(bssid, {})
+                for metric, values in per_metric.items():
+                    m = entry.setdefault(metric, {"values": [], "count": 0})
+                    m["values"] = (m["values"] + values)[-config["window"]:]
+                    m["count"] += len(values)
+                    m["updated"] = now
+
+    section = {"roams_flagged": len({f["roam_index"] for f in flagged}), "flags": flagged, "drift": drift}
+    summary["regressions"] = section
+    if flagged or drift:
+        print(f"[WARN] Latency regressions: {section['roams_flagged']} roam(s) flagged, "
+              f"{len(drift)} drifting BSSID metric(s)")
+        for f in flagged:
+            print(f"  roam #{f['roam_index']} {f['bssid']} {f['metric']}: {f['value_ms']} ms "
+                  f"({f['kind']}, baseline {f.get('baseline_ms', f.get('limit_ms'))} ms)")
+        for f in drift:
+            print(f"  {f['bssid']} {f['metric']}: median {f['cycle_median_ms']} ms vs {f['baseline_ms']} ms "
+                  f"(p={f['p_value']})")
+    return section
+
+
+def baseline_overview(store: Optional[Dict] = None) -> Dict:
+    """Per-BSSID baseline medians and sample counts (without the raw windows)."""
+    store = store or load_store()
+    return {
+        bssid: {
+            metric: {"median_ms": median(m.get("values") or []), "samples": len(m.get("values") or []),
+                     "count": m.get("count", 0), "updated": m.get("updated")}
+            for metric, m in metrics.items()
+        }
+        for bssid, metrics in store.get("bssids", {}).items()
+    }
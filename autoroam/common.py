@@ -7,7 +7,8 @@ def get_repo_root():
     return os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 def get_data_dir():
-    path = os.path.join(get_repo_root(), "data")
+    # AUTOROAM_DATA_DIR lets several agents share one checkout (e.g. on localhost ports)
+    path = os.environ.get("AUTOROAM_DATA_DIR") or os.path.join(get_repo_root(), "data")
     os.makedirs(path, exist_ok=True)
     return path
 
@@ -54,6 +55,11 @@ def cleanup_unsaved_runs():
                 with open(meta_path) as f:
                     meta = json.load(f)
                 if not meta.get("saved", False):
+                    # Interrupted cycle: keep it so it can still be recovered
+                    if (os.path.exists(os.path.join(entry.path, "roams.jsonl"))
+                            and not os.path.exists(os.path.join(entry.path, "cycle_summary.json"))):
+                        print(f"[+] Keeping interrupted run {entry.path} (rebuild it with --recover)")
+                        continue
                     shutil.rmtree(entry.path, ignore_errors=True)
             except Exception as e:
                 print(f"[WARN] Failed to cleanup {entry.path}: {e}")
@@ -0,0 +1,286 @@
+"""
+compare.py
+----------
+Side-by-side comparison of two or more runs, e.g. before and after an AP
+firmware change.
+
+Roams are lined up by target BSSID. For every BSSID (and for all roams
+together) each run gets its roam count, failures and median total / per-
+phase durations of the successful roams. Every run after the first is
+compared against the first one (the baseline): median deltas plus a
+two-sided Mann-Whitney U test, so "EAP got 4 ms slower" comes with a
+p-value instead of a guess. Roam durations are skewed and have outliers,
+which is why the test is rank-based rather than a t-test.
+
+Results are cached on disk under data/compare_cache/, keyed by the run
+names and their cycle_summary.json mtimes, so repeat views are instant
+(in every server worker) and a re-saved summary is never served stale.
+
+    python3 -m autoroam.compare <baseline run> <run> [<run> ...]
+"""
+import argparse
+import hashlib
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+from autoroam.common import get_data_dir, get_runs_dir
+from autoroam.results import dumps, load_json_file
+
+PHASES = ("Authentication", "Association", "EAP", "4-Way")
+ALPHA = 0.05          # significance level
+MIN_SAMPLES = 3       # per side, below this no p-value is given
+EXACT_MAX_PAIRS = 400 # n1 * n2 up to this uses the exact U distribution
+MAX_RUNS = 10
+CACHE_DIR = "compare_cache"
+CACHE_MAX_FILES = 200
+CACHE_VERSION = 2     # bump when the result layout or statistics change
+
+
+# ============================================================
+#  Statistics
+# ============================================================
+
+def median(values: Sequence[float]) -> Optional[float]:
+    if not values:
+        return None
+    s = sorted(values)
+    m = len(s) // 2
+    return round(s[m] if len(s) % 2 else (s[m - 1] + s[m]) / 2, 2)
+
+
+def _exact_p(ranks: List[float], sides: List[int], n1: int, n2: int) -> float:
+    """
+    Exact two-sided p-value: the share of all ways to split the pooled
+    ranks into groups of n1 and n2 whose rank sum lies at least as far from
+    its mean as the observed one. Counted with a subset-sum table over the
+    smaller group; ties keep their average ranks, so doubled ranks are
+    integers.
+    """
+    small = 0 if n1 <= n2 else 1
+    m, n = min(n1, n2), n1 + n2
+    doubled = [int(2 * r) for r in ranks]
+    observed = abs(sum(d for d, side in zip(doubled, sides) if side == small) - m * (n + 1))
+    # counts[k][s]: subsets of k ranks with doubled rank sum s
+    counts: List[Dict[int, int]] = [{0: 1}] + [{} for _ in range(m)]
+    for d in doubled:
+        for k in range(m, 0, -1):
+            row = counts[k]
+            for s, c in counts[k - 1].items():
+                row[s + d] = row.get(s + d, 0) + c
+    extreme = sum(c for s, c in counts[m].items() if abs(s - m * (n + 1)) >= observed)
+    return extreme / math.comb(n, m)
+
+
+def mann_whitney(a: Sequence[float], b: Sequence[float]) -> Optional[Dict]:
+    """
+    Two-sided Mann-Whitney U test: exact when n1 * n2 <= EXACT_MAX_PAIRS,
+    else the normal approximation with tie and continuity correction.
+    Returns U, p-value and the rank-biserial effect size (-1..1, positive
+    when b tends to be larger), or None if either side has fewer than
+    MIN_SAMPLES values.
+    """
+    n1, n2 = len(a), len(b)
+    if n1 < MIN_SAMPLES or n2 < MIN_SAMPLES:
+        return None
+
+    # Average ranks over ties
+    pooled = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(pooled)
+    tie_term = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        tie_term += t ** 3 - t
+        i = j + 1
+
+    r1 = sum(r for r, (_v, side) in zip(ranks, pooled) if side == 0)
+    u1 = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    mu = n1 * n2 / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+    exact = n1 * n2 <= EXACT_MAX_PAIRS
+    if exact:
+        p = _exact_p(ranks, [side for _v, side in pooled], n1, n2)
+    elif sigma == 0:
+        p = 1.0
+    else:
+        z = max(0.0, abs(u1 - mu) - 0.5) / sigma
+        p = math.erfc(z / math.sqrt(2))
+    return {
+        "u": u1,
+        "exact": exact,
+        "p_value": round(min(1.0, p), 6),
+        "significant": p < ALPHA,
+        # U1 counts baseline > other pairs, so high U1 means the other run is faster
+        "effect": round(1 - 2 * u1 / (n1 * n2), 4),
+    }
+
+
+# ============================================================
+#  Comparison
+# ============================================================
+
+def _durations(roams: List[Dict]) -> Dict:
+    """Per-BSSID samples of the successful roams' total and phase durations."""
+    groups: Dict[str, Dict] = {}
+    for r in roams:
+        for key in (r.get("target_bssid") or "unknown", "all"):
+            g = groups.setdefault(key, {"n": 0, "failures": 0, "total": [], "phases": {p: [] for p in PHASES}})
+            g["n"] += 1
+            if r.get("overall_status") != "success":
+                g["failures"] += 1
+                continue
+            if r.get("roam_duration_ms") is not None:
+                g["total"].append(float(r["roam_duration_ms"]))
+            for name in PHASES:
+                d = ((r.get("phases") or {}).get(name) or {}).get("duration_ms")
+                if d is not None:
+                    g["phases"][name].append(float(d))
+    return groups
+
+
+def _stats(g: Dict) -> Dict:
+    return {
+        "roams": g["n"],
+        "failures": g["failures"],
+        "median_ms": median(g["total"]),
+        "mean_ms": round(sum(g["total"]) / len(g["total"]), 2) if g["total"] else None,
+        "phases": {name: median(v) for name, v in g["phases"].items()},
+    }
+
+
+def _delta(base: Optional[float], other: Optional[float]) -> Dict:
+    if base is None or other is None:
+        return {"delta_ms": None, "delta_pct": None}
+    return {
+        "delta_ms": round(other - base, 2),
+        "delta_pct": round((other - base) / base * 100, 1) if base else None,
+    }
+
+
+def _compare_group(base: Optional[Dict], other: Optional[Dict]) -> Optional[Dict]:
+    if base is None or other is None:
+        return None
+    out = {**_delta(median(base["total"]), median(other["total"])),
+           "test": mann_whitney(base["total"], other["total"]),
+           "failure_rate_delta": round(other["failures"] / other["n"] - base["failures"] / base["n"], 4),
+           "phases": {}}
+    for name in PHASES:
+        a, b = base["phases"][name], other["phases"][name]
+        out["phases"][name] = {**_delta(median(a), median(b)), "test": mann_whitney(a, b)}
+    return out
+
+
+def compare_summaries(runs: List[str], summaries: List[Dict]) -> Dict:
+    """Comparison of already loaded summaries; runs[0] is the baseline."""
+    groups = [_durations(s.get("roams") or []) for s in summaries]
+    bssids = sorted({b for g in groups for b in g if b != "all"})
+
+    def entry(key: str) -> Dict:
+        base = groups[0].get(key)
+        return {
+            "bssid": key,
+            "runs": {run: _stats(g[key]) for run, g in zip(runs, groups) if key in g},
+            "vs_baseline": {run: _compare_group(base, g.get(key)) for run, g in zip(runs[1:], groups[1:])},
+        }
+
+    return {
+        "baseline": runs[0],
+        "runs": [
+            {"dir": run, "ssid": s.get("ssid"), "timestamp": s.get("timestamp"),
+             "roams": len(s.get("roams") or []),
+             "failures": sum(1 for r in s.get("roams") or [] if r.get("overall_status") != "success")}
+            for run, s in zip(runs, summaries)
+        ],
+        "alpha": ALPHA,
+        "overall": entry("all"),
+        "bssids": [entry(b) for b in bssids],
+    }
+
+
+def _cache_path(key: str) -> str:
+    path = os.path.join(get_data_dir(), CACHE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+
+def _prune_cache(cache_dir: str) -> None:
+    files = sorted((e for e in os.scandir(cache_dir) if e.name.endswith(".json")),
+                   key=lambda e: e.stat().st_mtime)
+    for e in files[:max(0, len(files) - CACHE_MAX_FILES)]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
+
+
+def compare_runs(runs: List[str], use_cache: bool = True) -> Dict:
+    """
+    Compare runs (directory names, baseline first). Raises ValueError for
+    fewer than two runs, and FileNotFoundError if a run has no summary.
+    """
+    runs = [os.path.basename(r.rstrip("/")) for r in runs]
+    if not 2 <= len(runs) <= MAX_RUNS:
+        raise ValueError(f"compare 2 to {MAX_RUNS} runs")
+    start = time.perf_counter()
+    paths = [os.path.join(get_runs_dir(), r, "cycle_summary.json") for r in runs]
+    missing = [r for r, p in zip(runs, paths) if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"no cycle_summary.json for: {', '.join(missing)}")
+
+    key = f"v{CACHE_VERSION}|" + "|".join(f"{r}@{os.stat(p).st_mtime_ns}" for r, p in zip(runs, paths))
+    cache_path = _cache_path(key)
+    if use_cache:
+        try:
+            result = load_json_file(cache_path)
+            result.update(cached=True, ms=round((time.perf_counter() - start) * 1000, 2))
+            return result
+        except (OSError, ValueError):
+            pass
+
+    result = compare_summaries(runs, [load_json_file(p) for p in paths])
+    tmp = cache_path + f".{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(dumps(result))
+        os.replace(tmp, cache_path)
+        _prune_cache(os.path.dirname(cache_path))
+    except OSError as e:
+        print(f"[WARN] Could not cache comparison: {e}")
+    result.update(cached=False, ms=round((time.perf_counter() - start) * 1000, 2))
+    return result
+
+
+def _fmt(v, unit=" ms") -> str:
+    return "—" if v is None else f"{v:+.2f}{unit}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare roam runs against a baseline run")
+    parser.add_argument("runs", nargs="+", help="Run directory names under data/runs, baseline first")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute even if a cached result exists")
+    args = parser.parse_args()
+
+    res = compare_runs(args.runs, use_cache=not args.no_cache)
+    for e in [res["overall"]] + res["bssids"]:
+        print(f"\n{e['bssid']}")
+        for run, st in e["runs"].items():
+            print(f"  {run}: {st['roams']} roams, {st['failures']} failed, median {st['median_ms']} ms")
+        for run, d in e["vs_baseline"].items():
+            if d is None:
+                continue
+            test = d["test"]
+            sig = f"p={test['p_value']:.4f}{' *' if test['significant'] else ''}" if test else "n/a"
+            phases = ", ".join(f"{n} {_fmt(p['delta_ms'])}" for n, p in d["phases"].items() if p["delta_ms"] is not None)
+            print(f"  {run} vs baseline: {_fmt(d['delta_ms'])} ({sig}); {phases}")
+    print(f"\n[+] Compared {len(res['runs'])} runs in {res['ms']} ms{' (cached)' if res['cached'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+cycle_options.py
+----------------
+Options of one roam cycle.
+
+The CLI builds them from its arguments, the web server from a start
+request (and hands them to the CLI process it launches), and both pass
+a single CycleOptions to run_roam_cycle.
+"""
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+MAX_SAMPLE_RATE = 50.0      # host sampler samples/s accepted from the web UI
+
+
+@dataclass
+class CycleOptions:
+    iface: str = "wlan0"
+    min_rssi: int = -75
+    timings: bool = True                    # span timings in cycle_summary.json (timing.py)
+    trace: bool = False                     # Chrome trace.json in the run directory
+    probe_target: Optional[str] = None      # "host:port" UDP echo target (traffic_probe.py)
+    probe_rate: float = 200.0               # probe packets/s
+    probe_tail_s: float = 1.0               # probe window kept after each connect event
+    nl_events: bool = False                 # kernel nl80211 timeline per roam (nl80211_monitor.py)
+    matrix: bool = False                    # roam every ordered AP pair (roam_matrix.py)
+    baseline: bool = True                   # update the per-BSSID baselines (baselines.py)
+    raw_log: bool = True                    # stream every journal line to roam_debug.log
+    structured_journal: bool = True         # read the journal as JSON with native timestamps
+    record_scans: bool = True               # keep scans and latencies in the RF history (scan_history.py)
+    sample_rate: Optional[float] = None     # link/host samples per second (host_sampler.py)
+    simulate: bool = False                  # simulated backend (simulator.py)
+
+    def __post_init__(self):
+        # Simulated roams would only add noise to the real per-BSSID baselines and RF history
+        if self.simulate:
+            self.baseline = self.record_scans = False
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "CycleOptions":
+        """From arguments parsed with add_arguments()."""
+        return cls(
+            iface=args.iface,
+            min_rssi=args.rssi,
+            timings=not args.no_timings,
+            trace=args.trace,
+            probe_target=args.probe,
+            probe_rate=args.probe_rate,
+            nl_events=args.nl_events,
+            matrix=args.matrix,
+            baseline=not args.no_baseline,
+            raw_log=not args.no_raw_log,
+            structured_journal=not args.journal_text,
+            record_scans=not args.no_scan_history,
+            sample_rate=args.host_sampler,
+            simulate=args.simulate is not None,
+        )
+
+    @classmethod
+    def from_request(cls, data: Dict) -> "CycleOptions":
+        """From a /api/start_roam JSON body. Raises ValueError on bad values."""
+        try:
+            min_rssi = int(data.get("rssi", -75))
+        except (TypeError, ValueError):
+            raise ValueError("rssi must be an integer (dBm)")
+        options = cls(
+            iface=str(data.get("iface", "wlan0")),
+            min_rssi=min_rssi,
+            matrix=bool(data.get("matrix")),
+            baseline=data.get("baseline") is not False,
+            simulate=bool(data.get("simulate")),
+        )
+        rate = data.get("host_sampler")
+        if rate is True:
+            options.sample_rate = 2.0
+        elif rate:
+            if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 < rate <= MAX_SAMPLE_RATE:
+                raise ValueError("host_sampler must be true or a rate in samples/s (0-50]")
+            options.sample_rate = float(rate)
+        return options
+
+    def to_args(self) -> List[str]:
+        """The start_autoroam_cli.py arguments that reproduce these options."""
+        args = ["-i", self.iface, "-r", str(self.min_rssi)]
+        if not self.timings:
+            args.append("--no-timings")
+        if self.trace:
+            args.append("--trace")
+        if self.probe_target:
+            args += ["--probe", self.probe_target, "--probe-rate", str(self.probe_rate)]
+        if self.nl_events:
+            args.append("--nl-events")
+        if self.matrix:
+            args.append("--matrix")
+        if not self.baseline:
+            args.append("--no-baseline")
+        if not self.raw_log:
+            args.append("--no-raw-log")
+        if not self.structured_journal:
+            args.append("--journal-text")
+        if not self.record_scans:
+            args.append("--no-scan-history")
+        if self.sample_rate:
+            args += ["--host-sampler", str(self.sample_rate)]
+        if self.simulate:
+            args.append("--simulate")
+        return args
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """The cycle options as CLI arguments (see CycleOptions.from_args)."""
+    parser.add_argument("-i", "--iface", default="wlan0", help="Wi-Fi interface to use")
+    parser.add_argument("-r", "--rssi", type=int, default=-75, help="Minimum RSSI filter")
+    parser.add_argument("--no-timings", action="store_true", help="Disable span timings in cycle_summary.json")
+    parser.add_argument("--trace", action="store_true", help="Export Chrome trace-event JSON (trace.json) to the run directory")
+    parser.add_argument("--matrix", action="store_true",
+                        help="Roam between every ordered pair of candidate APs (N x N latency matrix)")
+    # Data-plane probe
+    parser.add_argument("--probe", metavar="HOST:PORT",
+                        help="Send UDP probe traffic to this echo target during roams and record gap/loss/jitter per roam")
+    parser.add_argument("--probe-rate", type=float, default=200.0, help="Probe packets per second. Default: 200")
+    parser.add_argument("--host-sampler", nargs="?", type=float, const=2.0, metavar="HZ",
+                        help="Sample link stats (iw station dump), CPU load and process RSS during the cycle "
+                             "and attach them to each roam. Default rate: 2 samples/s")
+    parser.add_argument("--nl-events", action="store_true",
+                        help="Also record kernel nl80211 events (iw event) and add a driver/supplicant timeline per roam")
+    parser.add_argument("--no-baseline", action="store_true",
+                        help="Flag latency regressions against the per-BSSID baselines, but don't update them with this cycle")
+    parser.add_argument("--no-raw-log", action="store_true",
+                        help="Keep only analysis-relevant journal lines in roam_debug.log (filtered by journalctl where supported)")
+    parser.add_argument("--journal-text", action="store_true",
+                        help="Read the journal as short-precise text instead of JSON with native timestamps")
+    parser.add_argument("--no-scan-history", action="store_true",
+                        help="Don't record this cycle's scan and roam latencies in the RF history store")
+    # Simulated backend (no radio or root needed)
+    parser.add_argument("--simulate", nargs="?", const="", metavar="CONFIG",
+                        help="Run against the simulated wpa_supplicant/iw backend, optionally configured by a JSON file. "
+                             "Implies --no-baseline and --no-scan-history")
@@ -9,72 +9,96 @@ Combines:
   • Execution metadata (timestamps, total duration)
 """
 import os
-import json
-import time
-from datetime import datetime
 from typing import List, Dict, Optional
 from autoroam.log_analyzer import LogAnalysisDerived, LogAnalysisRaw
-from autoroam.phase_breakout import analyze_from_derived
+from autoroam.results import RoamResult, dumps
+from autoroam.timing import span
+from autoroam.common import get_data_dir
 
 
 def build_cycle_summary(
     ssid: str,
     security_type: str,
     candidates: List[Dict[str, str]],
-    derived_raw_pairs: List[tuple[LogAnalysisDerived, Optional[LogAnalysisRaw]]],
+    derived_raw_pairs: Optional[List[tuple[LogAnalysisDerived, Optional[LogAnalysisRaw]]]] = None,
     timestamp: Optional[str] = None,
     execution_duration_s: Optional[float] = None,
+    roam_results: Optional[List[RoamResult]] = None,
 ) -> Dict:
-    """Aggregate all roams and metadata into a single JSON-ready structure."""
+    """
+    Aggregate all roams and metadata into a single JSON-ready structure.
+    Pass roam_results when the roams were already analyzed (e.g. for the CLI
+    printout); otherwise they are built from derived_raw_pairs.
+    """
+    if roam_results is None:
+        roam_results = []
+        for idx, (derived, raw) in enumerate(derived_raw_pairs or [], start=1):
+            with span("analyze_from_derived", "analysis", roam=idx):
+                roam_results.append(RoamResult.from_analysis(idx, derived, raw))
 
-    cycle = {
+    return {
         "ssid": ssid,
         "security_type": security_type,
         "timestamp": timestamp,
         "execution_duration_s": round(execution_duration_s or 0, 2),
         "candidates": candidates,
-        "roams": []      
+        "roams": [r.to_dict() for r in roam_results],
     }
 
-    for idx, (derived, raw) in enumerate(derived_raw_pairs, start=1):
-        phases = analyze_from_derived(derived, raw)
 
-        cycle["roams"].append({
-            "roam_index": idx,
-            "start_time": getattr(derived, "roam_start_time", None),
-            "end_time": getattr(derived, "roam_end_time", None),
-            "target_bssid": getattr(derived, "roam_target_bssid", None),
-            "final_bssid": getattr(derived, "roam_final_bssid", None),
-            "final_freq": getattr(derived, "final_freq", None),
-            "overall_status": "success" if not getattr(raw, "roam_fail_log", False) else "failure",
-            "roam_duration_ms": round(getattr(derived, "roam_duration_ms", 0.0) or 0, 2),
-            "failure_log": derived.failure_log,
-            "details": {
-                "ft_used": str(derived.ft_success),
-                "pmksa_cache_used": str(derived.pmksa_cache_used),
-                "disconnects": str(derived.disconnect_count or 0)
-            },
-            "phases": phases
-        })
-
-    return cycle
+def attach_by_target(summary: Dict, results: List[Dict], key: str,
+                     source: Optional[str] = None, target: str = "target_bssid") -> None:
+    """
+    Copy result[source] (default: result[key]) to the matching roam entry as
+    roam[key], for per-attempt results (probe windows, sampler windows,
+    matrix attempts). Attempts and analyzed roams are paired by target
+    BSSID in order, so a roam that didn't show up in the log doesn't shift
+    the others.
+    """
+    pending = list(results)
+    for roam in summary.get("roams", []):
+        bssid = (roam.get("target_bssid") or "").lower()
+        for i, res in enumerate(pending):
+            if (res[target] or "").lower() == bssid:
+                roam[key] = pending.pop(i)[source or key]
+                break
 
 
 def save_cycle_summary(summary: Dict, output_file: str = "cycle_summary.json"):
     """Write full cycle summary to the repo's data directory."""
-    # Correct root is the directory where this script resides
-    here = os.path.abspath(os.path.dirname(__file__))
-    repo_root = os.path.abspath(os.path.join(here, ".."))
-    data_dir = os.path.join(repo_root, "data")
-    os.makedirs(data_dir, exist_ok=True)
+    data_dir = get_data_dir()
 
     output_path = os.path.join(data_dir, output_file)
     tmp_path = output_path + ".tmp"
 
-    with open(tmp_path, "w") as f:
-        json.dump(summary, f, indent=2, default=str)
+    with span("save_cycle_summary", "io"), open(tmp_path, "wb") as f:
+        f.write(dumps(summary, indent=True))
         f.flush()
         os.fsync(f.fileno())
 
     os.replace(tmp_path, output_path)
-    print(f"[+] Full cycle summary saved to {output_path}")
\ No newline at end of file
+    print(f"[+] Full cycle summary saved to {output_path}")
+
+def lite_summary(summary: Dict) -> Dict:
+    """
+    Copy of a cycle summary without the per-phase log lines ("errors"),
+    which make up most of a large cycle's size. Each phase gets an
+    error_count instead; fetch one roam in full with find_roam(). Host
+    sampler windows keep their aggregates but not the samples.
+    """
+    roams = []
+    for roam in summary.get("roams", []):
+        phases = {}
+        for name, phase in (roam.get("phases") or {}).items():
+            phases[name] = {k: v for k, v in phase.items() if k != "errors"}
+            phases[name]["error_count"] = len(phase.get("errors") or [])
+        lite = {**roam, "phases": phases}
+        if roam.get("host"):
+            lite["host"] = {k: v for k, v in roam["host"].items() if k != "samples"}
+        roams.append(lite)
+    return {**summary, "roams": roams, "lite": True}
+
+
+def find_roam(summary: Dict, roam_index: int) -> Optional[Dict]:
+    """Full entry of one roam in a cycle summary, or None."""
+    return next((r for r in summary.get("roams", []) if r.get("roam_index") == roam_index), None)
@@ -0,0 +1,274 @@
+"""
+fleet.py
+--------
+Coordinator for a fleet of autoroam agents.
+
+Every web server instance (start_autoroam_ui.py) is an agent: it runs
+cycles via /api/start_roam and serves finished cycle summaries in
+gzip-compressed batches from /api/agent/results, using the same
+X-API-Key header as the rest of the REST API.
+
+The coordinator fans a cycle request out to all agents at once, waits
+for each to finish, pulls new results from a per-agent cursor (so
+nothing is fetched twice) and merges everything into one fleet view.
+
+agents.json:
+
+    [
+      {"name": "lab-pi-01", "url": "https://10.0.0.21:8443", "api_key": "...", "iface": "wlan0"},
+      {"name": "laptop-02", "url": "https://10.0.0.35:8443", "api_key": "...", "rssi": -70}
+    ]
+"""
+import gzip
+import json
+import os
+import ssl
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from autoroam.common import get_data_dir
+
+
+@dataclass
+class Agent:
+    name: str
+    url: str
+    api_key: str
+    iface: str = "wlan0"
+    rssi: int = -75
+    simulate: bool = False
+    matrix: bool = False
+    verify_tls: bool = False   # agents default to self-signed certs
+
+
+@dataclass
+class AgentOutcome:
+    agent: str
+    started: bool = False
+    status: str | None = None
+    results: List[Dict] = field(default_factory=list)
+    error: str | None = None
+
+
+def load_agents(path: str) -> List[Agent]:
+    with open(path) as f:
+        return [Agent(**a) for a in json.load(f)]
+
+
+def get_fleet_dir() -> str:
+    path = os.path.join(get_data_dir(), "fleet")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# ====== Agent HTTP client ======
+
+class AgentClient:
+    def __init__(self, agent: Agent, timeout: float = 30.0):
+        self.agent = agent
+        self.timeout = timeout
+        self.ctx = ssl.create_default_context()
+        if not agent.verify_tls:
+            self.ctx.check_hostname = False
+            self.ctx.verify_mode = ssl.CERT_NONE
+
+    def request(self, path: str, body: Optional[Dict] = None) -> Dict:
+        headers = {"X-API-Key": self.agent.api_key, "Accept-Encoding": "gzip"}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(self.agent.url.rstrip("/") + path, data=data, headers=headers)
+        with urllib.request.urlopen(req, timeout=self.timeout, context=self.ctx) as resp:
+            payload = resp.read()
+            if resp.headers.get("Content-Encoding") == "gzip":
+                payload = gzip.decompress(payload)
+        return json.loads(payload)
+
+    def info(self) -> Dict:
+        return self.request("/api/agent/info")
+
+    def start_cycle(self) -> Dict:
+        a = self.agent
+        return self.request("/api/start_roam", {
+            "iface": a.iface, "rssi": a.rssi, "simulate": a.simulate, "matrix": a.matrix,
+        })
+
+    def wait_until_finished(self, timeout: float, poll_s: float = 2.0) -> str:
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.request("/api/run_status")["status"]
+            if status in ("idle", "done", "exited_early"):
+                return status
+            if time.monotonic() > deadline:
+                return "timeout"
+            time.sleep(poll_s)
+
+    def fetch_results(self, since: int) -> tuple[List[Dict], int]:
+        """All finished cycles after `since`, fetched batch by batch. Returns (results, new cursor)."""
+        results = []
+        while True:
+            batch = self.request(f"/api/agent/results?since={since}")
+            results += batch["results"]
+            since = batch["seq"]
+            if not batch.get("more"):
+                return results, since
+
+
+# ====== Cursors ======
+
+def _cursor_path() -> str:
+    return os.path.join(get_fleet_dir(), "cursors.json")
+
+
+def load_cursors() -> Dict[str, int]:
+    try:
+        with open(_cursor_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cursors(cursors: Dict[str, int]) -> None:
+    tmp = _cursor_path() + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cursors, f, indent=2)
+    os.replace(tmp, _cursor_path())
+
+
+def _cursor_key(agent: Agent) -> str:
+    return f"{agent.name}@{agent.url}"
+
+
+# ====== Fan-out ======
+
+def _drive_agent(agent: Agent, since: int, run: bool, timeout: float) -> tuple[AgentOutcome, int]:
+    client = AgentClient(agent)
+    outcome = AgentOutcome(agent=agent.name)
+    try:
+        if run:
+            client.start_cycle()
+            outcome.started = True
+            print(f"[+] {agent.name}: cycle started")
+            outcome.status = client.wait_until_finished(timeout)
+            print(f"[+] {agent.name}: {outcome.status}")
+        outcome.results, since = client.fetch_results(since)
+    except urllib.error.HTTPError as e:
+        outcome.error = f"HTTP {e.code}: {e.read().decode(errors='replace')[:200]}"
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        outcome.error = str(e)
+    if outcome.error:
+        print(f"[!] {agent.name}: {outcome.error}")
+    return outcome, since
+
+
+def run_fleet(agents: List[Agent], run: bool = True, timeout: float = 900.0,
+              jobs: Optional[int] = None) -> List[AgentOutcome]:
+    """
+    Start a cycle on every agent at once (unless run=False), wait for them,
+    and collect every result not collected before.
+    """
+    cursors = load_cursors()
+    jobs = jobs or min(32, max(1, len(agents)))
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(_drive_agent, a, cursors.get(_cursor_key(a), 0), run, timeout)
+            for a in agents
+        ]
+        outcomes = []
+        for agent, fut in zip(agents, futures):
+            outcome, cursor = fut.result()
+            cursors[_cursor_key(agent)] = cursor
+            outcomes.append(outcome)
+    save_cursors(cursors)
+    return outcomes
+
+
+# ====== Fleet view ======
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return round(values[lo] + (values[hi] - values[lo]) * (k - lo), 2)
+
+
+def _roam_stats(roams: List[Dict]) -> Dict:
+    ok = [r for r in roams if r.get("overall_status") == "success"]
+    durations = [r["roam_duration_ms"] for r in ok if r.get("roam_duration_ms")]
+    return {
+        "roams": len(roams),
+        "failures": len(roams) - len(ok),
+        "success_rate": round(100 * len(ok) / len(roams), 1) if roams else None,
+        "mean_ms": round(sum(durations) / len(durations), 2) if durations else None,
+        "p50_ms": _percentile(durations, 50),
+        "p95_ms": _percentile(durations, 95),
+    }
+
+
+def merge_fleet(outcomes: List[AgentOutcome]) -> Dict:
+    """Merge per-agent cycle summaries into one fleet view."""
+    cycles, agents = [], {}
+    by_bssid: Dict[str, List[Dict]] = {}
+    for o in outcomes:
+        agent_roams = []
+        for res in o.results:
+            summary = res.get("summary")
+            if not summary:
+                continue
+            roams = summary.get("roams", [])
+            agent_roams += roams
+            for r in roams:
+                by_bssid.setdefault((r.get("target_bssid") or "unknown").lower(), []).append(r)
+            cycles.append({
+                "agent": o.agent,
+                "seq": res["seq"],
+                "run": res["run"],
+                "ssid": summary.get("ssid"),
+                "timestamp": summary.get("timestamp"),
+                **_roam_stats(roams),
+                "summary": summary,
+            })
+        agents[o.agent] = {
+            "cycles": sum(1 for res in o.results if res.get("summary")),
+            "missing": sum(1 for res in o.results if not res.get("summary")),
+            "last_status": o.status,
+            "error": o.error,
+            **_roam_stats(agent_roams),
+        }
+
+    all_roams = [r for c in cycles for r in c["summary"].get("roams", [])]
+    return {
+        "generated_at": datetime.now().astimezone().isoformat(),
+        "fleet": _roam_stats(all_roams),
+        "agents": agents,
+        "bssids": {b: _roam_stats(rs) for b, rs in sorted(by_bssid.items())},
+        "cycles": cycles,
+    }
+
+
+def save_fleet_view(view: Dict, out_dir: Optional[str] = None) -> str:
+    out_dir = out_dir or get_fleet_dir()
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"fleet_{datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}.json")
+    with open(path, "w") as f:
+        json.dump(view, f, indent=2, default=str)
+    print(f"[+] Fleet view saved to {path}")
+    return path
+
+
+def print_fleet_view(view: Dict) -> None:
+    fmt = lambda v: "—" if v is None else v
+    print(f"\n{'agent':20s} {'cycles':>6s} {'roams':>6s} {'fail':>5s} {'success%':>9s} {'p50 ms':>9s} {'p95 ms':>9s}")
+    rows = list(view["agents"].items()) + [("FLEET", {**view["fleet"], "cycles": len(view["cycles"])})]
+    for name, s in rows:
+        print(f"{name:20s} {s['cycles']:6d} {s['roams']:6d} {s['failures']:5d} {fmt(s['success_rate']):>9} "
+              f"{fmt(s['p50_ms']):>9} {fmt(s['p95_ms']):>9}")
+        if s.get("error"):
+            print(f"{'':20s} error: {s['error']}")
@@ -0,0 +1,312 @@
+"""
+host_sampler.py
+---------------
+Background link and host-load sampling during a roam cycle.
+
+A slow roam is not always the AP's fault: a busy CPU or a starved
+wpa_supplicant stretches EAP and the 4-way handshake just as well. While
+a cycle runs, `HostSampler` records at a fixed rate:
+
+  link   `iw dev <iface> station dump`: AP, signal, tx bitrate, tx retries,
+         tx failures, beacon loss (and how long iw took to answer)
+  host   CPU busy / iowait % (/proc/stat), 1-minute load average
+  procs  RSS of this process and RSS + CPU % of wpa_supplicant
+
+Every sample carries a monotonic timestamp, so each roam gets the samples
+around it (from PAD_S before the roam command to PAD_S after the connect
+event) as "host" in cycle_summary.json, with t_ms relative to the roam
+command and a few aggregates. The full series is saved as
+host_samples.jsonl in the run directory.
+
+Reading /proc costs microseconds; the iw call is a subprocess per sample,
+which is why the default rate is modest.
+"""
+import asyncio
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+from autoroam.backend import get_backend
+from autoroam.results import dumps
+
+DEFAULT_RATE_HZ = 2.0
+PAD_S = 1.0                   # samples kept before and after each roam window
+PROCESS = "wpa_supplicant"
+PID_RESCAN_S = 10.0           # how often to look for the process again if it isn't running
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+STATION_RE = re.compile(r"^Station ([0-9a-f:]{17})", re.I | re.M)
+# station dump field -> (sample key, converter)
+STATION_FIELDS = {
+    "signal": ("signal", int),
+    "signal avg": ("signal_avg", int),
+    "tx bitrate": ("tx_bitrate", float),
+    "tx retries": ("tx_retries", int),
+    "tx failed": ("tx_failed", int),
+    "beacon loss": ("beacon_loss", int),
+    "inactive time": ("inactive_ms", int),
+}
+COUNTERS = ("tx_retries", "tx_failed", "beacon_loss")
+
+
+# ============================================================
+#  Readers
+# ============================================================
+
+def parse_station_dump(text: str) -> Dict:
+    """Fields of the first station entry (the AP on a client interface)."""
+    m = STATION_RE.search(text or "")
+    if not m:
+        return {"connected": False}
+    out = {"connected": True, "bssid": m.group(1).lower()}
+    for line in text[m.end():].splitlines():
+        if line.startswith("Station "):
+            break
+        name, sep, value = line.strip().partition(":")
+        field = STATION_FIELDS.get(name)
+        if not sep or not field:
+            continue
+        try:
+            out[field[0]] = field[1](value.split()[0])
+        except (IndexError, ValueError):
+            pass
+    return out
+
+
+def read_cpu_times() -> Optional[Tuple[int, int, int]]:
+    """(busy, iowait, total) jiffies from the aggregate cpu line of /proc/stat."""
+    try:
+        with open("/proc/stat") as f:
+            values = [int(v) for v in f.readline().split()[1:9]]
+    except (OSError, ValueError):
+        return None
+    idle, iowait = values[3], values[4]
+    total = sum(values)
+    return total - idle - iowait, iowait, total
+
+
+def read_load1() -> Optional[float]:
+    try:
+        with open("/proc/loadavg") as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_rss_kb(pid="self") -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def read_proc_ticks(pid: int) -> Optional[int]:
+    """utime + stime of a process, in clock ticks."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # the command name may contain spaces, so split after it
+            fields = f.read().rpartition(")")[2].split()
+        return int(fields[11]) + int(fields[12])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def find_pid(name: str) -> Optional[int]:
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/comm") as f:
+                if f.read().strip() == name:
+                    return int(entry)
+        except OSError:
+            continue
+    return None
+
+
+# ============================================================
+#  Sampler
+# ============================================================
+
+def _avg(values: List[float]) -> Optional[float]:
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def _counter_delta(samples: List[Dict], key: str) -> Optional[int]:
+    """Increase of a station counter, only between samples on the same AP (counters reset on roam)."""
+    total, seen = 0, False
+    for a, b in zip(samples, samples[1:]):
+        if a.get("bssid") and a.get("bssid") == b.get("bssid") and key in a and key in b:
+            total += max(0, b[key] - a[key])
+            seen = True
+    return total if seen else None
+
+
+class HostSampler:
+    """Fixed-rate link / host-load sampler running as an asyncio task."""
+
+    def __init__(self, iface: str, rate_hz: float = DEFAULT_RATE_HZ, process: str = PROCESS):
+        self.iface = iface
+        self.rate_hz = rate_hz
+        self.process = process
+        self.link = True
+        self.samples: List[Dict] = []
+        self._t: List[int] = []             # monotonic ns of each sample, for bisecting
+        self._cpu = read_cpu_times()
+        self._pid: Optional[int] = None
+        self._pid_checked = 0.0
+        self._proc_ticks: Optional[Tuple[int, int]] = None  # (ticks, monotonic ns)
+        self.late = 0                       # samples that took longer than the interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._cpu is None:
+            print("[WARN] Host sampler: /proc/stat not readable, CPU load will be missing")
+        # First sample before returning, so the first roam has one from before it
+        self._record(await self.sample())
+        self._task = asyncio.create_task(self._loop(), name="host-sampler")
+        print(f"[+] Host sampler recording {self.rate_hz:g} samples/s on {self.iface}")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        interval_ns = int(1e9 / self.rate_hz)
+        next_ns = time.monotonic_ns() + interval_ns
+        await asyncio.sleep(interval_ns / 1e9)
+        while True:
+            self._record(await self.sample())
+            # Fixed schedule; if a sample overran its slot, start again from now
+            next_ns += interval_ns
+            delay = next_ns - time.monotonic_ns()
+            if delay < 0:
+                self.late += 1
+                next_ns = time.monotonic_ns()
+            await asyncio.sleep(max(delay, 0) / 1e9)
+
+    def _record(self, sample: Dict) -> None:
+        self.samples.append(sample)
+        self._t.append(sample["t_ns"])
+
+    async def sample(self) -> Dict:
+        now_ns = time.monotonic_ns()
+        sample = {"t_ns": now_ns, "time": time.time(), **self._host(now_ns)}
+        if self.link:
+            start = time.perf_counter()
+            try:
+                r = await get_backend().iw_async("dev", self.iface, "station", "dump")
+            except OSError as e:
+                print(f"[WARN] Host sampler: link stats unavailable ({e}), sampling host load only")
+                self.link = False
+            else:
+                sample["iw_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                sample.update(parse_station_dump(r.stdout) if r.returncode == 0 else {})
+        return sample
+
+    def _host(self, now_ns: int) -> Dict:
+        out = {"load1": read_load1(), "rss_kb": read_rss_kb()}
+        cpu = read_cpu_times()
+        if cpu and self._cpu and cpu[2] > self._cpu[2]:
+            total = cpu[2] - self._cpu[2]
+            out["cpu_pct"] = round(100 * (cpu[0] - self._cpu[0]) / total, 1)
+            out["iowait_pct"] = round(100 * (cpu[1] - self._cpu[1]) / total, 1)
+        self._cpu = cpu or self._cpu
+
+        if self._pid is None and time.monotonic() - self._pid_checked >= PID_RESCAN_S:
+            self._pid_checked = time.monotonic()
+            self._pid = find_pid(self.process)
+            self._proc_ticks = None
+        if self._pid is not None:
+            rss, ticks = read_rss_kb(self._pid), read_proc_ticks(self._pid)
+            if rss is None or ticks is None:
+                self._pid = None    # exited or restarted; look again later
+            else:
+                out["wpa_rss_kb"] = rss
+                if self._proc_ticks and now_ns > self._proc_ticks[1]:
+                    elapsed_s = (now_ns - self._proc_ticks[1]) / 1e9
+                    out["wpa_cpu_pct"] = round(100 * (ticks - self._proc_ticks[0]) / CLK_TCK / elapsed_s, 1)
+                self._proc_ticks = (ticks, now_ns)
+        return out
+
+    def window_stats(self, start_ns: int, end_ns: int, pad_s: float = PAD_S) -> Dict:
+        """
+        Samples from pad_s before start_ns to pad_s after end_ns (t_ms
+        relative to start_ns) and their aggregates. Call after stop() so
+        the samples after the window exist.
+        """
+        pad_ns = int(pad_s * 1e9)
+        lo = bisect_left(self._t, start_ns - pad_ns)
+        hi = bisect_right(self._t, end_ns + pad_ns)
+        window = self.samples[lo:hi]
+        during = [s for s in window if start_ns <= s["t_ns"] <= end_ns]
+        before = [s for s in window if s["t_ns"] < start_ns]
+
+        def values(key, samples=window):
+            return [s[key] for s in samples if s.get(key) is not None]
+
+        stats = {
+            "samples": [
+                {"t_ms": round((s["t_ns"] - start_ns) / 1e6, 1),
+                 **{k: v for k, v in s.items() if k not in ("t_ns", "time")}}
+                for s in window
+            ],
+            "cpu_max_pct": max(values("cpu_pct"), default=None),
+            "cpu_avg_pct": _avg(values("cpu_pct")),
+            "iowait_max_pct": max(values("iowait_pct"), default=None),
+            "load1_max": max(values("load1"), default=None),
+            "rss_kb_max": max(values("rss_kb"), default=None),
+            "wpa_cpu_max_pct": max(values("wpa_cpu_pct"), default=None),
+            "wpa_rss_kb_max": max(values("wpa_rss_kb"), default=None),
+            "signal_before": before[-1].get("signal") if before else None,
+            "signal_min": min(values("signal"), default=None),
+            "iw_max_ms": max(values("iw_ms"), default=None),
+            "disconnected_samples": sum(1 for s in window if s.get("connected") is False),
+            "samples_during_roam": len(during),
+        }
+        for key in COUNTERS:
+            stats[key] = _counter_delta(window, key)
+        return stats
+
+    def cycle_stats(self) -> Dict:
+        def values(key):
+            return [s[key] for s in self.samples if s.get(key) is not None]
+        return {
+            "samples": len(self.samples),
+            "late_samples": self.late,
+            "cpu_avg_pct": _avg(values("cpu_pct")),
+            "cpu_max_pct": max(values("cpu_pct"), default=None),
+            "load1_max": max(values("load1"), default=None),
+            "rss_kb_max": max(values("rss_kb"), default=None),
+            "wpa_cpu_max_pct": max(values("wpa_cpu_pct"), default=None),
+            "wpa_rss_kb_max": max(values("wpa_rss_kb"), default=None),
+            "iw_avg_ms": _avg(values("iw_ms")),
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            for s in self.samples:
+                f.write(dumps(s) + b"\n")
+
+    def config(self) -> Dict:
+        return {
+            "iface": self.iface,
+            "rate_hz": self.rate_hz,
+            "process": self.process,
+            "link": self.link,
+            "pad_s": PAD_S,
+        }
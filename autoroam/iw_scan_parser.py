@@ -1,6 +1,6 @@
 import re
 from dataclasses import dataclass, field
-from typing import List
+from typing import Iterable, Iterator, List
 
 @dataclass
 class ParsedScanResults:
@@ -15,120 +15,149 @@ class ParsedScanResults:
     ssid: str | None = None
 
 
-def parse_iw_scan_output(iw_output: str,
-                         ssid_filter: str | None = None,
-                         mrssi: int = -100) -> List[ParsedScanResults]:
+BSS_HEADER_RE = re.compile(r"^\s*BSS\s+[0-9A-Fa-f:]{17}\b")
+BSSID_RE = re.compile(r"BSS\s+([0-9a-f:]{17})")
+STA_COUNT_RE = re.compile(r"\*?\s*station count:\s*(\d+)")
+UTIL_RE = re.compile(r"\*?\s*channel utilisation:\s*(\d+)/255")
+
+
+class IwScanStreamParser:
     """
-    Parse 'iw dev <iface> scan' output into structured results.
+    Incremental 'iw dev <iface> scan' parser. feed() takes one line at a
+    time and returns the previous BSS once the next one starts (if it
+    passes the SSID/RSSI filter); finish() returns the last one. A block
+    whose SSID or signal already fails the filter is skipped up to the
+    next BSS header, so memory stays flat however large the scan.
+
+    With a record list every BSS is parsed in full and appended to it
+    before filtering (for the scan history).
     """
-    DEBUG_PARSE = False  # toggle this to False later
-
-    results: List[ParsedScanResults] = []
-
-    # Split blocks robustly (each "BSS ..." starts a new section)
-    blocks = re.split(r"(?m)^\s*(?=BSS\s+[0-9A-Fa-f:]{17}\b)", iw_output)
-    for raw_block in blocks:
-        if not raw_block.strip():
-            continue
-
-        lines = raw_block.strip().splitlines()
-        bssid_match = re.match(r"BSS\s+([0-9a-f:]{17})", lines[0])
-        if not bssid_match:
-            continue
-        bssid = bssid_match.group(1)
-
-        # Initialize fields
-        freq = rssi = qbss_sta_count = None
-        qbss_util_prct = None
-        ssid = supported_rates = mfp_flag = None
-        auth_suites: list[str] = []
-
-        for line in lines:
-            line = line.strip()
-            if DEBUG_PARSE and (
-                "freq:" in line or
-                "signal:" in line or
-                "SSID:" in line or
-                "Authentication suites:" in line or
-                "Capabilities:" in line or
-                "station count:" in line or
-                "channel utilisation:" in line
-            ):
-                print(f"[{bssid}] {line}")
-
-            if line.startswith("freq:"):
-                try:
-                    freq = int(float(line.split()[1]))
-                except Exception:
-                    pass
-
-            elif line.startswith("signal:"):
-                try:
-                    rssi = int(float(line.split()[1]))
-                except Exception:
-                    pass
-
-            elif line.startswith("SSID:"):
-                ssid = line.split("SSID:")[1].strip()
-
-            elif line.startswith("Supported rates:"):
-                supported_rates = line.split("Supported rates:")[1].strip()
-
-            elif "Authentication suites:" in line:
-                suites = line.split("Authentication suites:")[1].strip()
-                # Replace "IEEE 802.1X" temporarily with a token to protect the space
-                temp = suites.replace("IEEE 802.1X", "IEEE_802.1X")
-                # Split on spaces
-                parts = temp.split()
-                # Restore original string
-                auth_suites.extend([p.replace("IEEE_802.1X", "IEEE 802.1X") for p in parts])
-
-            elif "Capabilities:" in line and "PTKSA" in line:
-                if "MFP-required" in line:
-                    mfp_flag = "MFP-required"
-                elif "MFP-capable" in line:
-                    mfp_flag = "MFP-capable"
-                elif mfp_flag is None:
-                    mfp_flag = "No MFP"
-
-                # debug only: scoped to a single BSS block
-                if ssid and (not ssid_filter or ssid == ssid_filter):
-                    print(f"[{ssid}] {line}")
-
-            elif "station count:" in line:
-                match = re.search(r"\*?\s*station count:\s*(\d+)", line)
-                if match:
-                    qbss_sta_count = int(match.group(1))
-
-            elif "channel utilisation:" in line:
-                match = re.search(r"\*?\s*channel utilisation:\s*(\d+)/255", line)
-                if match:
-                    qbss_util_prct = round((int(match.group(1)) / 255) * 100, 1)
-
-        # Debug what the filter check looks like
-        if DEBUG_PARSE:
-            print(f"Filter check → ssid={ssid!r}, ssid_filter={ssid_filter!r}, rssi={rssi}")
 
+    def __init__(self, ssid_filter: str | None = None, mrssi: int = -100,
+                 record: List[ParsedScanResults] | None = None):
+        self.ssid_filter = ssid_filter
+        self.record = record
+        self.match_ssid = ssid_filter.strip().lower() if ssid_filter else None
+        self.mrssi = mrssi
+        self.current: ParsedScanResults | None = None
+        self.skipping = False
+        self.lines = 0       # non-empty lines seen
+        self.emitted = 0
+
+    def _start(self, line: str) -> None:
+        m = BSSID_RE.match(line)
+        self.current = ParsedScanResults(bssid=m.group(1)) if m else None
+        self.skipping = self.current is None
+
+    def _close(self) -> ParsedScanResults | None:
+        bss, self.current = self.current, None
+        if bss is not None and self.record is not None:
+            self.record.append(bss)
         # Filter: match SSID (case-insensitive, ignore stray whitespace)
         if (
-            ssid
-            and (not ssid_filter or ssid.strip().lower() == ssid_filter.strip().lower())
-            and rssi is not None
-            and rssi >= mrssi
+            bss is None or self.skipping
+            or not bss.ssid
+            or (self.match_ssid and bss.ssid.strip().lower() != self.match_ssid)
+            or bss.rssi is None
+            or bss.rssi < self.mrssi
         ):
-            results.append(
-                ParsedScanResults(
-                    bssid=bssid,
-                    freq=freq,
-                    rssi=rssi,
-                    ssid=ssid,
-                    auth_suites=auth_suites,
-                    mfp_flag=mfp_flag,
-                    supported_rates=supported_rates,
-                    qbss_util_prct=qbss_util_prct,
-                    qbss_sta_count=qbss_sta_count,
-                )
-            )
+            return None
+        self.emitted += 1
+        return bss
+
+    def feed(self, line: str) -> ParsedScanResults | None:
+        line = line.strip()
+        if not line:
+            return None
+        self.lines += 1
+        if line.startswith("BSS") and BSS_HEADER_RE.match(line):
+            done = self._close()
+            self._start(line)
+            return done
+        if self.current is None or (self.skipping and self.record is None):
+            return None
+        self._parse_line(self.current, line)
+        return None
+
+    def finish(self) -> ParsedScanResults | None:
+        return self._close()
+
+    def _parse_line(self, bss: ParsedScanResults, line: str) -> None:
+        if line.startswith("freq:"):
+            try:
+                bss.freq = int(float(line.split()[1]))
+            except Exception:
+                pass
+
+        elif line.startswith("signal:"):
+            try:
+                bss.rssi = int(float(line.split()[1]))
+            except Exception:
+                pass
+            if bss.rssi is not None and bss.rssi < self.mrssi:
+                self.skipping = True
+
+        elif line.startswith("SSID:"):
+            bss.ssid = line.split("SSID:")[1].strip()
+            if not bss.ssid or (self.match_ssid and bss.ssid.strip().lower() != self.match_ssid):
+                self.skipping = True
+
+        elif line.startswith("Supported rates:"):
+            bss.supported_rates = line.split("Supported rates:")[1].strip()
+
+        elif "Authentication suites:" in line:
+            suites = line.split("Authentication suites:")[1].strip()
+            # Replace "IEEE 802.1X" temporarily with a token to protect the space
+            temp = suites.replace("IEEE 802.1X", "IEEE_802.1X")
+            # Split on spaces
+            parts = temp.split()
+            # Restore original string
+            bss.auth_suites.extend([p.replace("IEEE_802.1X", "IEEE 802.1X") for p in parts])
+
+        elif "Capabilities:" in line and "PTKSA" in line:
+            if "MFP-required" in line:
+                bss.mfp_flag = "MFP-required"
+            elif "MFP-capable" in line:
+                bss.mfp_flag = "MFP-capable"
+            elif bss.mfp_flag is None:
+                bss.mfp_flag = "No MFP"
+
+            # debug only: scoped to a single BSS block
+            if bss.ssid and (not self.ssid_filter or bss.ssid == self.ssid_filter):
+                print(f"[{bss.ssid}] {line}")
+
+        elif "station count:" in line:
+            match = STA_COUNT_RE.search(line)
+            if match:
+                bss.qbss_sta_count = int(match.group(1))
+
+        elif "channel utilisation:" in line:
+            match = UTIL_RE.search(line)
+            if match:
+                bss.qbss_util_prct = round((int(match.group(1)) / 255) * 100, 1)
+
+
+def iter_iw_scan(lines: Iterable[str],
+                 ssid_filter: str | None = None,
+                 mrssi: int = -100,
+                 record: List[ParsedScanResults] | None = None) -> Iterator[ParsedScanResults]:
+    """Yield each matching BSS from an iterable of scan output lines as its block completes."""
+    parser = IwScanStreamParser(ssid_filter, mrssi, record)
+    for line in lines:
+        bss = parser.feed(line)
+        if bss:
+            yield bss
+    bss = parser.finish()
+    if bss:
+        yield bss
+
 
+def parse_iw_scan_output(iw_output: str,
+                         ssid_filter: str | None = None,
+                         mrssi: int = -100) -> List[ParsedScanResults]:
+    """
+    Parse 'iw dev <iface> scan' output into structured results.
+    """
+    results = list(iter_iw_scan(iw_output.splitlines(), ssid_filter, mrssi))
     print(f"[DEBUG] Parsed {len(results)} BSS entries after filtering\n")
-    return results
\ No newline at end of file
+    return results
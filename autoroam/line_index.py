@@ -0,0 +1,169 @@
+"""
+line_index.py
+-------------
+Line-offset index for large log files, for paged line access.
+
+build_line_index() scans a log once and writes a sidecar next to it
+(<log>.lidx) with the byte offset of every line and the line number of
+every ROAM command. read_lines() then serves any window of lines with a
+single seek + read, so a multi-hundred-MB roam_debug.log can be paged
+through without reading the file from the start.
+
+Sidecar layout (little endian):
+    b"ARLI1"  size:u64  mtime:f64  lines:u32  roams:u32
+    offsets:  (lines + 1) x u64   start of each line, then end of file
+    roam starts: roams x u32      1-based line number of each ROAM command
+A sidecar whose recorded size/mtime don't match the log is rebuilt.
+"""
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from autoroam.log_analyzer import ROAM_START_RE
+
+MAGIC = b"ARLI1"
+HEADER = struct.Struct("<5sQdII")
+SUFFIX = ".lidx"
+CACHE_SIZE = 8        # indexes kept in memory (per process)
+MAX_WINDOW = 5000     # lines per read_lines() call
+
+
+@dataclass
+class LineIndex:
+    path: str
+    size: int
+    mtime: float
+    offsets: array        # 'Q', len = lines + 1
+    roam_starts: array    # 'I', 1-based line numbers
+
+    @property
+    def lines(self) -> int:
+        return len(self.offsets) - 1
+
+    def roam_range(self, roam: int) -> Optional[tuple]:
+        """(first line, last line) of roam (1-based), or None if there is no such roam."""
+        if not 1 <= roam <= len(self.roam_starts):
+            return None
+        first = self.roam_starts[roam - 1]
+        last = self.roam_starts[roam] - 1 if roam < len(self.roam_starts) else self.lines
+        return first, last
+
+    def roam_at(self, line: int) -> Optional[int]:
+        """Roam index a line belongs to (None before the first ROAM command)."""
+        lo, hi = 0, len(self.roam_starts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.roam_starts[mid] <= line:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo or None
+
+
+def _sidecar(path: str) -> str:
+    return path + SUFFIX
+
+
+def build_line_index(path: str) -> LineIndex:
+    """Scan path and write its sidecar index."""
+    st = os.stat(path)
+    offsets, roam_starts = array("Q"), array("I")
+    pos = 0
+    with open(path, "rb") as f:
+        for lineno, line in enumerate(f, start=1):
+            offsets.append(pos)
+            pos += len(line)
+            if b"CTRL_IFACE ROAM " in line and ROAM_START_RE.search(line.decode(errors="replace")):
+                roam_starts.append(lineno)
+    offsets.append(pos)
+
+    index = LineIndex(path, st.st_size, st.st_mtime, offsets, roam_starts)
+    tmp = _sidecar(path) + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, st.st_size, st.st_mtime, index.lines, len(roam_starts)))
+            offsets.tofile(f)
+            roam_starts.tofile(f)
+        os.replace(tmp, _sidecar(path))
+    except OSError as e:
+        # Read-only run dir: the in-memory index still works
+        print(f"[WARN] Could not write line index for {path}: {e}")
+    return index
+
+
+def _load_sidecar(path: str, st: os.stat_result) -> Optional[LineIndex]:
+    try:
+        with open(_sidecar(path), "rb") as f:
+            magic, size, mtime, lines, roams = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or size != st.st_size or mtime != st.st_mtime:
+                return None
+            offsets, roam_starts = array("Q"), array("I")
+            offsets.fromfile(f, lines + 1)
+            roam_starts.fromfile(f, roams)
+    except (OSError, EOFError, struct.error):
+        return None
+    if offsets.itemsize != 8 or roam_starts.itemsize != 4:
+        return None
+    return LineIndex(path, size, mtime, offsets, roam_starts)
+
+
+_cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_line_index(path: str) -> LineIndex:
+    """Index for path: from memory, else the sidecar, else built now."""
+    st = os.stat(path)
+    with _cache_lock:
+        index = _cache.get(path)
+        if index and index.size == st.st_size and index.mtime == st.st_mtime:
+            _cache.move_to_end(path)
+            return index
+    index = _load_sidecar(path, st) or build_line_index(path)
+    with _cache_lock:
+        _cache[path] = index
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def read_lines(path: str, start: int = 1, count: int = 200, roam: Optional[int] = None) -> Dict:
+    """
+    Window of up to count lines starting at 1-based line start, or at the
+    first line of roam (the window then stops at the end of that roam).
+    """
+    index = get_line_index(path)
+    count = max(1, min(count, MAX_WINDOW))
+    if roam is not None:
+        bounds = index.roam_range(roam)
+        if bounds is None:
+            raise ValueError(f"no roam {roam} in this log ({len(index.roam_starts)} roams)")
+        start, last = bounds
+        end = min(last, start + count - 1)
+    else:
+        start = max(1, min(start, index.lines or 1))
+        end = min(index.lines, start + count - 1)
+
+    lines: List[str] = []
+    if index.lines and end >= start:
+        with open(path, "rb") as f:
+            f.seek(index.offsets[start - 1])
+            data = f.read(index.offsets[end] - index.offsets[start - 1])
+        # Split on \n only, so line numbers match the offsets
+        raw = data.split(b"\n")
+        if data.endswith(b"\n"):
+            raw.pop()
+        lines = [l.decode(errors="replace") for l in raw]
+
+    return {
+        "start": start,
+        "end": start + len(lines) - 1,
+        "total_lines": index.lines,
+        "roam": index.roam_at(start) if lines else None,
+        "roam_starts": index.roam_starts.tolist(),
+        "lines": lines,
+    }
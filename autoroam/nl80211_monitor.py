@@ -0,0 +1,194 @@
+"""
+nl80211_monitor.py
+------------------
+Kernel-side roam timing from nl80211 events.
+
+The phase timestamps from derive_metrics come from journald text lines:
+millisecond-ish resolution, and they include the time wpa_supplicant
+takes to log plus syslog delivery. `iw event -t -f` prints the nl80211
+multicast events (auth, assoc, connect, roam, disconnect, ...) as the
+kernel delivers them, with microsecond wall-clock timestamps.
+
+build_roam_timeline() merges both sources into one ordered timeline per
+roam and splits the roam into driver time (request issued by the
+supplicant -> kernel reports the frame exchange done) and supplicant time
+(everything else), plus how late the supplicant logged each completion.
+A roam's kernel events are those about its target BSS, from its start
+until it ends (or the next roam starts).
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from autoroam.log_analyzer import LogAnalysisDerived, extract_mac
+
+# "1697650000.123456: wlan0 (phy #0): auth 02:..:02 -> 02:..:cc status: 0: Successful [frame: ...]"
+_EVENT_RE = re.compile(r"^(?P<ts>\d+\.\d+):\s+(?P<iface>\S+) \(phy #\d+\):\s*(?P<msg>.*)$")
+_STATUS_RE = re.compile(r"status: (\d+)")
+_REASON_RE = re.compile(r"reason: (\d+)")
+
+# Longest prefix first so "disconnected" doesn't match "disassoc" etc.
+EVENT_PREFIXES = (
+    "failed to connect", "connected", "disconnected", "roamed",
+    "deauth", "disassoc", "auth", "assoc",
+    "scan started", "scan finished", "scan aborted",
+    "ch_switch_started_notify", "ch_switch_notify", "timed out",
+)
+
+# Supplicant timestamps from LogAnalysisDerived, in timeline order
+SUPPLICANT_EVENTS = (
+    ("roam_start", "roam_start_time"),
+    ("auth_start", "auth_start_time"),
+    ("auth_complete", "auth_complete_time"),
+    ("assoc_start", "assoc_start_time"),
+    ("assoc_complete", "assoc_complete_time"),
+    ("eap_start", "eap_start_time"),
+    ("eap_success", "eap_success_time"),
+    ("eap_failure", "eap_failure_time"),
+    ("fourway_start", "fourway_start_time"),
+    ("fourway_success", "fourway_success_time"),
+    ("roam_end", "roam_end_time"),
+    ("roam_fail", "roam_fail_time"),
+)
+
+# Kernel events can trail the supplicant's last roam line slightly
+WINDOW_GRACE = timedelta(milliseconds=250)
+# A roam that never ended keeps its events up to the next roam, or this long (the connect timeout)
+OPEN_WINDOW = timedelta(seconds=20)
+
+
+@dataclass
+class NlEvent:
+    time: datetime
+    iface: str
+    event: str
+    bssid: str | None = None
+    status: int | None = None
+    reason: int | None = None
+    timed_out: bool = False
+    line: str = ""
+
+
+def parse_iw_event_line(line: str) -> Optional[NlEvent]:
+    """Parse one `iw event -t -f` line. Returns None for anything unrecognised."""
+    m = _EVENT_RE.match(line.strip())
+    if not m:
+        return None
+    msg = m.group("msg")
+    event = next((p for p in EVENT_PREFIXES if msg.startswith(p)), None)
+    if event is None:
+        return None
+    status = _STATUS_RE.search(msg)
+    reason = _REASON_RE.search(msg)
+    # [frame: ...] hex dumps can contain MAC-looking byte runs
+    head = msg.split("[frame:", 1)[0]
+    return NlEvent(
+        time=datetime.fromtimestamp(float(m.group("ts"))),
+        iface=m.group("iface"),
+        event=event,
+        bssid=extract_mac(head),
+        status=int(status.group(1)) if status else None,
+        reason=int(reason.group(1)) if reason else None,
+        timed_out="timed out" in head,
+        line=line,
+    )
+
+
+def parse_iw_events(lines: List[str], iface: Optional[str] = None) -> List[NlEvent]:
+    events = []
+    for line in lines:
+        ev = parse_iw_event_line(line)
+        if ev and (iface is None or ev.iface == iface):
+            events.append(ev)
+    events.sort(key=lambda e: e.time)
+    return events
+
+
+def _ms(later: Optional[datetime], earlier: Optional[datetime]) -> Optional[float]:
+    if later is None or earlier is None:
+        return None
+    return round((later - earlier).total_seconds() * 1000, 3)
+
+
+def _first(events: List[NlEvent], names, after: Optional[datetime] = None) -> Optional[NlEvent]:
+    for ev in events:
+        if ev.event in names and (after is None or ev.time >= after):
+            return ev
+    return None
+
+
+def build_roam_timeline(derived: LogAnalysisDerived, nl_events: List[NlEvent],
+                        next_start: Optional[datetime] = None) -> Optional[Dict]:
+    """
+    Merge supplicant phase timestamps and nl80211 events for one roam.
+    The kernel window ends at the next roam's start (next_start) at the
+    latest, and events about another BSS than the target are left out.
+    Returns None when the roam has no start time to anchor the window.
+    """
+    start = derived.roam_start_time
+    if start is None:
+        return None
+    end = derived.roam_fail_time or derived.roam_end_time
+    window_end = end + WINDOW_GRACE if end else start + OPEN_WINDOW
+    if next_start is not None and next_start > start:
+        window_end = min(window_end, next_start)
+    target = (derived.roam_target_bssid or "").lower()
+
+    kernel = [
+        ev for ev in nl_events
+        if start <= ev.time < window_end and not (target and ev.bssid and ev.bssid.lower() != target)
+    ]
+
+    timeline = []
+    for name, attr in SUPPLICANT_EVENTS:
+        t = getattr(derived, attr, None)
+        if isinstance(t, datetime):
+            timeline.append({"t_ms": _ms(t, start), "source": "supplicant", "event": name})
+    for ev in kernel:
+        entry = {"t_ms": _ms(ev.time, start), "source": "nl80211", "event": ev.event}
+        if ev.bssid:
+            entry["bssid"] = ev.bssid
+        if ev.status is not None:
+            entry["status"] = ev.status
+        if ev.reason is not None:
+            entry["reason"] = ev.reason
+        if ev.timed_out:
+            entry["timed_out"] = True
+        timeline.append(entry)
+    timeline.sort(key=lambda e: e["t_ms"])
+
+    # Driver time: request issued by the supplicant -> kernel reports the exchange done
+    nl_auth = _first(kernel, ("auth",), after=derived.auth_start_time)
+    nl_assoc = _first(kernel, ("assoc",), after=derived.assoc_start_time)
+    nl_connect = _first(kernel, ("connected", "roamed", "failed to connect"))
+    driver = {
+        "auth_ms": _ms(nl_auth and nl_auth.time, derived.auth_start_time),
+        "assoc_ms": _ms(nl_assoc and nl_assoc.time, derived.assoc_start_time),
+    }
+    driver_total = sum(v for v in driver.values() if v is not None)
+    total_ms = _ms(end, start)
+
+    return {
+        "events": timeline,
+        "nl80211_events": len(kernel),
+        "driver": {**driver, "total_ms": round(driver_total, 3)},
+        "supplicant": {
+            "total_ms": round(total_ms - driver_total, 3) if total_ms is not None else None,
+            # kernel connect result -> supplicant reports the roam done (4-way, key install, ...)
+            "post_connect_ms": _ms(derived.roam_end_time, nl_connect and nl_connect.time),
+        },
+        # How long after the kernel event the supplicant logged the completion
+        "log_delay_ms": {
+            "auth": _ms(derived.auth_complete_time, nl_auth and nl_auth.time),
+            "assoc": _ms(derived.assoc_complete_time, nl_assoc and nl_assoc.time),
+        },
+    }
+
+
+def attach_timelines(summary: Dict, derived_list: List[LogAnalysisDerived], nl_events: List[NlEvent]) -> None:
+    """Add a merged "timeline" to each roam entry (summary roams follow derived_list order)."""
+    for i, (roam, derived) in enumerate(zip(summary.get("roams", []), derived_list)):
+        following = derived_list[i + 1].roam_start_time if i + 1 < len(derived_list) else None
+        timeline = build_roam_timeline(derived, nl_events, next_start=following)
+        if timeline:
+            roam["timeline"] = timeline
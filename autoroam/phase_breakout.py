@@ -37,7 +37,7 @@ class PhaseResult:
 #  Phase analysis using existing derived fields
 # ============================================================
 
-def analyze_from_derived(derived: LogAnalysisDerived, raw: Optional[LogAnalysisRaw] = None) -> Dict[str, Dict]:
+def analyze_phases(derived: LogAnalysisDerived, raw: Optional[LogAnalysisRaw] = None) -> List[PhaseResult]:
     """Consume existing derived + raw analysis results and organize by phase."""
 
     def fmt(ms):
@@ -119,8 +119,12 @@ def analyze_from_derived(derived: LogAnalysisDerived, raw: Optional[LogAnalysisR
         if raw.fourway_disco_log:
             phases[3].errors.append(raw.fourway_disco_log)
 
+    return phases
+
 
-    return {p.name: p.to_dict() for p in phases}
+def analyze_from_derived(derived: LogAnalysisDerived, raw: Optional[LogAnalysisRaw] = None) -> Dict[str, Dict]:
+    """Phase breakdown as plain dicts keyed by phase name."""
+    return {p.name: p.to_dict() for p in analyze_phases(derived, raw)}
 
 
 # ============================================================
@@ -0,0 +1,137 @@
+"""
+replay.py
+---------
+Offline replay of recorded roam_debug.log files.
+
+Runs the same analysis and summary pipeline as a live cycle
+(analyze_all_roams → derive_metrics → build_cycle_summary) without root
+or radios, and reports throughput so the analyzer can be profiled and
+tuned on recorded data.
+"""
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from autoroam.log_collector import CollectedLogs
+from autoroam.log_analyzer import analyze_all_roams
+from autoroam.cycle_summary import build_cycle_summary, save_cycle_summary
+from autoroam.nl80211_monitor import attach_timelines, parse_iw_events
+
+DEBUG_LOG_NAME = "roam_debug.log"
+
+
+def find_debug_logs(paths: List[str]) -> List[str]:
+    """Expand files and run directories into a sorted list of roam_debug.log paths."""
+    found: List[str] = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(os.path.abspath(path))
+        elif os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                if DEBUG_LOG_NAME in files:
+                    found.append(os.path.abspath(os.path.join(root, DEBUG_LOG_NAME)))
+        else:
+            print(f"[WARN] Replay path not found: {path}")
+    return sorted(set(found))
+
+
+def _recorded_context(log_path: str) -> Dict:
+    """Pick up SSID/candidates from a cycle_summary.json recorded next to the log, if any."""
+    summary_path = os.path.join(os.path.dirname(log_path), "cycle_summary.json")
+    if not os.path.exists(summary_path):
+        return {}
+    try:
+        with open(summary_path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not read {summary_path}: {e}")
+        return {}
+
+
+def replay_log(log_path: str, out_dir: Optional[str] = None, jobs: int = 1) -> Dict:
+    """
+    Run the full analysis pipeline over one recorded log.
+    If out_dir is set, the summary and failed-roam snippets are written to
+    out_dir/<run name>/; otherwise nothing is written.
+    jobs > 1 analyzes the log's roams in a process pool (see analyze_all_roams).
+    Returns per-file stats (lines, roams, seconds).
+    """
+    with open(log_path, errors="replace") as f:
+        lines = f.readlines()
+
+    context = _recorded_context(log_path)
+    run_dir = None
+    if out_dir:
+        run_name = os.path.basename(os.path.dirname(log_path)) or "replay"
+        run_dir = os.path.join(out_dir, run_name)
+        os.makedirs(run_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    results = analyze_all_roams(CollectedLogs(raw_logs=lines), run_dir=run_dir, jobs=jobs)
+    summary = build_cycle_summary(
+        ssid=context.get("ssid"),
+        security_type=context.get("security_type", "Unknown"),
+        candidates=context.get("candidates", []),
+        derived_raw_pairs=results,
+        timestamp=context.get("timestamp"),
+        execution_duration_s=context.get("execution_duration_s"),
+    )
+    # Kernel-side timeline, if the run recorded nl80211 events
+    nl_path = os.path.join(os.path.dirname(log_path), "nl80211_events.log")
+    if os.path.exists(nl_path):
+        with open(nl_path, errors="replace") as f:
+            nl = parse_iw_events(f.readlines())
+        attach_timelines(summary, [derived for derived, _ in results], nl)
+        summary["nl80211_events"] = len(nl)
+    elapsed = time.perf_counter() - start
+
+    if run_dir:
+        save_cycle_summary(summary, os.path.join(run_dir, "cycle_summary.json"))
+
+    return {
+        "path": log_path,
+        "lines": len(lines),
+        "roams": len(summary["roams"]),
+        "failures": sum(1 for r in summary["roams"] if r["overall_status"] != "success"),
+        "seconds": elapsed,
+    }
+
+
+def _fmt_rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:,.0f}/s" if seconds > 0 else "n/a"
+
+
+def replay(paths: List[str], jobs: int = 1, out_dir: Optional[str] = None) -> List[Dict]:
+    """
+    Replay every recorded log under paths, optionally across a process pool:
+    one log per worker when there are several, else the roams of the one log.
+    """
+    logs = find_debug_logs(paths)
+    if not logs:
+        print("[!] No roam_debug.log files found to replay.")
+        return []
+
+    print(f"[+] Replaying {len(logs)} log(s) with {jobs} worker(s)")
+    wall_start = time.perf_counter()
+    if jobs > 1 and len(logs) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            stats = list(pool.map(replay_log, logs, [out_dir] * len(logs)))
+    else:
+        stats = [replay_log(p, out_dir, jobs) for p in logs]
+    wall = time.perf_counter() - wall_start
+
+    for s in stats:
+        print(
+            f"  {s['path']}: {s['lines']} lines, {s['roams']} roams "
+            f"({s['failures']} failed) in {s['seconds'] * 1000:.1f} ms "
+            f"| {_fmt_rate(s['lines'], s['seconds'])} lines, {_fmt_rate(s['roams'], s['seconds'])} roams"
+        )
+
+    total_lines = sum(s["lines"] for s in stats)
+    total_roams = sum(s["roams"] for s in stats)
+    print(
+        f"\n[+] Total: {total_lines} lines, {total_roams} roams in {wall:.3f} s wall "
+        f"| {_fmt_rate(total_lines, wall)} lines, {_fmt_rate(total_roams, wall)} roams"
+    )
+    return stats
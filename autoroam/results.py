@@ -0,0 +1,127 @@
+"""
+results.py
+----------
+Typed per-roam result model and fast JSON serialization.
+
+Each roam is analyzed exactly once into a RoamResult (derived metrics +
+phase breakdown). The CLI printout, cycle_summary.json and the API
+responses all read from that object instead of re-running
+analyze_from_derived.
+
+dumps()/loads() use orjson when it is installed and the stdlib json
+module otherwise. Timestamps are ISO-8601 with the local UTC offset
+either way (journal timestamps are local time).
+"""
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from autoroam.log_analyzer import LogAnalysisDerived, LogAnalysisRaw
+from autoroam.phase_breakout import PhaseResult, analyze_phases
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _local(ts: Optional[datetime]) -> Optional[datetime]:
+    """Attach the local UTC offset to a naive journal timestamp."""
+    if isinstance(ts, datetime) and ts.tzinfo is None:
+        return ts.astimezone()
+    return ts
+
+
+@dataclass
+class RoamResult:
+    roam_index: int
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+    target_bssid: Optional[str]
+    final_bssid: Optional[str]
+    final_freq: Optional[int]
+    overall_status: str
+    roam_duration_ms: float
+    failure_log: Optional[str]
+    details: Dict[str, str] = field(default_factory=dict)
+    phases: List[PhaseResult] = field(default_factory=list)
+
+    @classmethod
+    def from_analysis(cls, roam_index: int, derived: LogAnalysisDerived,
+                      raw: Optional[LogAnalysisRaw] = None) -> "RoamResult":
+        phases = analyze_phases(derived, raw)
+        for p in phases:
+            p.start, p.end = _local(p.start), _local(p.end)
+        return cls(
+            roam_index=roam_index,
+            start_time=_local(derived.roam_start_time),
+            end_time=_local(derived.roam_end_time),
+            target_bssid=derived.roam_target_bssid,
+            final_bssid=derived.roam_final_bssid,
+            final_freq=derived.final_freq,
+            overall_status="success" if not getattr(raw, "roam_fail_log", False) else "failure",
+            roam_duration_ms=round(derived.roam_duration_ms or 0, 2),
+            failure_log=derived.failure_log,
+            details={
+                "ft_used": str(derived.ft_success),
+                "pmksa_cache_used": str(derived.pmksa_cache_used),
+                "disconnects": str(derived.disconnect_count or 0),
+            },
+            phases=phases,
+        )
+
+    def to_dict(self) -> Dict:
+        """Roam entry as stored in cycle_summary.json (phases keyed by name)."""
+        return {
+            "roam_index": self.roam_index,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "target_bssid": self.target_bssid,
+            "final_bssid": self.final_bssid,
+            "final_freq": self.final_freq,
+            "overall_status": self.overall_status,
+            "roam_duration_ms": self.roam_duration_ms,
+            "failure_log": self.failure_log,
+            "details": self.details,
+            "phases": {p.name: p.to_dict() for p in self.phases},
+        }
+
+    def phase_table(self) -> str:
+        """Per-phase lines for the CLI post-roam analysis."""
+        return "\n".join(
+            f"{p.name:15s} | Status: {p.status:8s} | "
+            f"Duration: {p.duration_ms or 'N/A':>7} ms | "
+            f"Errors: {len(p.errors or [])}"
+            for p in self.phases
+        )
+
+
+# ============================================================
+#  Serialization
+# ============================================================
+
+def _default(obj: Any):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return str(obj)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes (orjson if available). Datetimes become ISO-8601."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(obj, default=_default, indent=2 if indent else None).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_json_file(path: str):
+    with open(path, "rb") as f:
+        return loads(f.read())
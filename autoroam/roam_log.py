@@ -0,0 +1,210 @@
+"""
+roam_log.py
+-----------
+Append-only JSON Lines log of a cycle's results (roams.jsonl).
+
+The runner appends one record per line as soon as it is known and fsyncs
+it (in a worker thread, off the event loop that runs the probe and the
+host sampler), so a crash or Ctrl-C mid-cycle keeps every finished roam:
+
+    {"type": "cycle", "ssid": ..., "security_type": ..., "timestamp": ..., "candidates": [...]}
+    {"type": "roam", "roam_index": 1, ...}       one per roam, same fields as cycle_summary.json
+    {"type": "end", "execution_duration_s": ...}
+
+cycle_summary.json is built from this file at the end of the cycle. A
+cycle without an "end" record was interrupted; recover_run() rebuilds
+its summary from whatever made it to disk. The web server tails the file
+to stream roams to the UI while the cycle runs (see follow_roam_log) and
+to update the metrics as roams finish (see read_new_records).
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from autoroam.results import dumps, loads
+
+ROAMS_FILE = "roams.jsonl"
+
+
+class RoamLog:
+    def __init__(self, run_dir: str):
+        self.path = os.path.join(run_dir, ROAMS_FILE)
+        self._f = open(self.path, "ab")
+        # An append cancelled mid-await keeps running in its thread; don't interleave with it
+        self._lock = threading.Lock()
+
+    def append(self, *records: Dict) -> None:
+        """Write records and fsync them before returning."""
+        with self._lock:
+            for record in records:
+                self._f.write(dumps(record) + b"\n")
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    async def append_async(self, *records: Dict) -> None:
+        """append() in a worker thread, so the fsync doesn't stall the event loop."""
+        await asyncio.to_thread(self.append, *records)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+
+def read_roam_log(path: str) -> Tuple[List[Dict], int]:
+    """
+    All intact records in a roams.jsonl, plus the number of lines skipped
+    (a torn last line after a crash, or anything else unparsable).
+    """
+    records, bad = [], 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                records.append(loads(line))
+            except ValueError:
+                bad += 1
+    return records, bad
+
+
+def read_new_records(path: str, offset: int = 0) -> Tuple[List[Dict], int]:
+    """
+    Complete records appended after byte offset, and the offset to resume
+    from (a line still being written is left for the next call).
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].split(b"\n"):
+        if line.strip():
+            try:
+                records.append(loads(line))
+            except ValueError:
+                pass
+    return records, offset + end
+
+
+def summary_from_records(records: List[Dict]) -> Dict:
+    """Cycle summary (same layout as build_cycle_summary) from roams.jsonl records."""
+    cycle = next((r for r in records if r.get("type") == "cycle"), {})
+    end = next((r for r in reversed(records) if r.get("type") == "end"), None)
+    summary = {
+        "ssid": cycle.get("ssid"),
+        "security_type": cycle.get("security_type"),
+        "timestamp": cycle.get("timestamp"),
+        "execution_duration_s": end.get("execution_duration_s") if end else None,
+        "candidates": cycle.get("candidates", []),
+        "roams": [
+            {k: v for k, v in r.items() if k != "type"}
+            for r in records if r.get("type") == "roam"
+        ],
+    }
+    if end is None:
+        summary["interrupted"] = True
+    return summary
+
+
+def summary_from_roam_log(path: str) -> Dict:
+    records, bad = read_roam_log(path)
+    if bad:
+        print(f"[WARN] Skipped {bad} unreadable line(s) in {path}")
+    return summary_from_records(records)
+
+
+def follow_roam_log(path: str, start_line: int = 0, is_active: Callable[[], bool] = lambda: False,
+                    poll_s: float = 0.25) -> Iterator[Tuple[int, Optional[bytes], Optional[Dict]]]:
+    """
+    Tail roams.jsonl, yielding (line number, raw JSON line, record) for
+    every complete line after start_line. Stops after the "end" record, or
+    once is_active() is False and nothing new arrived. Yields
+    (n, None, None) on every idle poll so callers can send keepalives.
+    """
+    lineno, pending = 0, b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read()
+            if chunk:
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    lineno += 1
+                    if lineno <= start_line:
+                        continue
+                    try:
+                        record = loads(line)
+                    except ValueError:
+                        continue
+                    yield lineno, line, record
+                    if record.get("type") == "end":
+                        return
+                continue
+            if not is_active():
+                return
+            yield lineno, None, None
+            time.sleep(poll_s)
+
+
+def recover_run(run_dir: str, force: bool = False) -> Optional[Dict]:
+    """
+    Rebuild cycle_summary.json for one run from its roams.jsonl and mark the
+    run as saved so it isn't cleaned up. Skips runs that already have a
+    summary unless force is set. Returns the summary, or None if skipped.
+    """
+    from autoroam.cycle_summary import save_cycle_summary
+
+    log_path = os.path.join(run_dir, ROAMS_FILE)
+    summary_path = os.path.join(run_dir, "cycle_summary.json")
+    if not os.path.exists(log_path):
+        print(f"[WARN] No {ROAMS_FILE} in {run_dir}")
+        return None
+    if os.path.exists(summary_path) and not force:
+        print(f"[+] {run_dir} already has a cycle summary (use --force to rebuild)")
+        return None
+
+    summary = summary_from_roam_log(log_path)
+    save_cycle_summary(summary, summary_path)
+
+    meta_path = os.path.join(run_dir, "metadata.json")
+    try:
+        with open(meta_path, "rb") as f:
+            meta = loads(f.read())
+    except (OSError, ValueError):
+        meta = {"ssid": summary.get("ssid") or "unknown", "notes": ""}
+    meta["saved"] = True
+    if summary.get("interrupted") and not meta.get("notes"):
+        meta["notes"] = f"Recovered from {ROAMS_FILE} after an interrupted cycle"
+    with open(meta_path, "wb") as f:
+        f.write(dumps(meta, indent=True))
+
+    state = "interrupted, " if summary.get("interrupted") else ""
+    print(f"[+] Recovered {run_dir}: {state}{len(summary['roams'])} roam(s)")
+    return summary
+
+
+def find_roam_logs(paths: List[str]) -> List[str]:
+    """Expand run directories (or a directory of runs) into run dirs holding a roams.jsonl."""
+    found = []
+    for path in paths:
+        if os.path.isfile(path) and os.path.basename(path) == ROAMS_FILE:
+            found.append(os.path.dirname(os.path.abspath(path)))
+        elif os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                if ROAMS_FILE in files:
+                    found.append(os.path.abspath(root))
+        else:
+            print(f"[WARN] Recover path not found: {path}")
+    return sorted(set(found))
+
+
+def recover(paths: List[str], force: bool = False) -> List[Dict]:
+    runs = find_roam_logs(paths)
+    if not runs:
+        print(f"[!] No {ROAMS_FILE} files found to recover.")
+        return []
+    return [s for s in (recover_run(r, force=force) for r in runs) if s is not None]
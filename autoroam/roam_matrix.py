@@ -0,0 +1,123 @@
+"""
+roam_matrix.py
+--------------
+N×N roam matrix campaigns.
+
+A normal cycle roams from the current AP to each candidate, so AP-B ->
+AP-C is never measured. Matrix mode measures every ordered pair of
+candidate BSSIDs. The complete directed graph on N APs has in-degree ==
+out-degree == N-1 at every node, so it has an Eulerian circuit: a roam
+sequence that covers all N(N-1) ordered pairs exactly once, with no
+repositioning roams. That is the shortest possible schedule.
+
+MatrixPlan walks that circuit and adapts when a roam fails (the client
+stays on the old AP): it takes the earliest unmeasured pair starting
+from wherever the client actually is, and only inserts a repositioning
+("transit") roam when none is left from there.
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+def eulerian_schedule(bssids: List[str], start: Optional[str] = None) -> List[str]:
+    """
+    Node sequence of an Eulerian circuit over all ordered pairs of bssids
+    (Hierholzer's algorithm). Consecutive entries are the roams to run;
+    the sequence starts and ends at start (default: the first bssid).
+    """
+    nodes = list(dict.fromkeys(bssids))
+    if len(nodes) < 2:
+        return nodes[:1]
+    start = start if start in nodes else nodes[0]
+    # Outgoing edges still unused, popped from the end
+    out = {n: [m for m in reversed(nodes) if m != n] for n in nodes}
+
+    stack, circuit = [start], []
+    while stack:
+        node = stack[-1]
+        if out[node]:
+            stack.append(out[node].pop())
+        else:
+            circuit.append(stack.pop())
+    circuit.reverse()
+    return circuit
+
+
+class MatrixPlan:
+    """Roam schedule for a matrix campaign, tolerant of failed roams."""
+
+    def __init__(self, bssids: List[str], current: Optional[str] = None, max_roams: Optional[int] = None):
+        self.bssids = list(dict.fromkeys(b.lower() for b in bssids))
+        current = current.lower() if current else None
+        self.schedule = eulerian_schedule(self.bssids, start=current)
+        self.pending: List[Tuple[str, str]] = list(zip(self.schedule, self.schedule[1:]))
+        n = len(self.bssids)
+        # Every attempt consumes a pair or repositions; cap runaway transit loops
+        self.max_roams = max_roams or 2 * n * (n - 1) + n
+        self.attempts: List[Dict] = []
+
+    @property
+    def pairs(self) -> int:
+        n = len(self.bssids)
+        return n * (n - 1)
+
+    def next_roam(self, position: Optional[str]) -> Optional[Tuple[str, bool]]:
+        """(target bssid, is_transit) for the next roam from position, or None when done."""
+        if not self.pending or len(self.attempts) >= self.max_roams:
+            return None
+        position = position.lower() if position else None
+        for src, dst in self.pending:
+            if src == position:
+                return dst, False
+        # Nothing left from here (or we're not on a matrix AP): reposition
+        return self.pending[0][0], True
+
+    def record(self, src: Optional[str], dst: str, succeeded: bool, transit: bool) -> None:
+        src = src.lower() if src else None
+        dst = dst.lower()
+        self.attempts.append({"from": src, "to": dst, "transit": transit, "succeeded": succeeded})
+        if not transit and (src, dst) in self.pending:
+            self.pending.remove((src, dst))
+
+    def unmeasured(self) -> List[Tuple[str, str]]:
+        return list(self.pending)
+
+
+def build_latency_matrix(bssids: List[str], roams: List[Dict]) -> Dict:
+    """
+    Directional latency matrix from summary roam entries carrying
+    from_bssid/target_bssid. Cell [i][j] is roam i -> j: mean duration of
+    successful roams (ms), with attempt and failure counts alongside.
+    """
+    nodes = list(dict.fromkeys(b.lower() for b in bssids))
+    index = {b: i for i, b in enumerate(nodes)}
+    n = len(nodes)
+    samples = [[[] for _ in range(n)] for _ in range(n)]
+    attempts = [[0] * n for _ in range(n)]
+    failures = [[0] * n for _ in range(n)]
+
+    for roam in roams:
+        i = index.get((roam.get("from_bssid") or "").lower())
+        j = index.get((roam.get("target_bssid") or "").lower())
+        if i is None or j is None or i == j:
+            continue
+        attempts[i][j] += 1
+        if roam.get("overall_status") == "success" and roam.get("roam_duration_ms"):
+            samples[i][j].append(roam["roam_duration_ms"])
+        else:
+            failures[i][j] += 1
+
+    latency = [
+        [round(sum(cell) / len(cell), 2) if cell else None for cell in row]
+        for row in samples
+    ]
+    measured = [v for row in latency for v in row if v is not None]
+    return {
+        "bssids": nodes,
+        "latency_ms": latency,
+        "attempts": attempts,
+        "failures": failures,
+        "pairs": n * (n - 1),
+        "pairs_measured": len(measured),
+        "min_ms": min(measured) if measured else None,
+        "max_ms": max(measured) if measured else None,
+    }
@@ -1,22 +1,40 @@
 import argparse
+import asyncio
 import time
 import json
 import os
 from datetime import datetime
+from typing import Optional
 from zoneinfo import ZoneInfo
 #imports for internal packages
 from autoroam.common import get_data_dir, cleanup_unsaved_runs, create_run_dir, get_runs_dir
-from autoroam.log_collector import CollectedLogs, collect_logs, stop_log_collection
-from autoroam.log_analyzer import analyze_all_roams
+from autoroam.cycle_options import CycleOptions
+from autoroam.log_collector import (
+    CollectedLogs,
+    collect_logs_async,
+    collect_stream_async,
+    expect_line,
+    stop_log_collection_async,
+)
+from autoroam.log_analyzer import IncrementalRoamAnalyzer, is_relevant_line, journal_grep_pattern
 from autoroam.shell_cmd_wrapper import (
-    set_log_level,
-    restore_log_level,
-    get_current_connection,
-    get_scan_results,
-    roam_to_bssid,
+    set_log_level_async,
+    restore_log_level_async,
+    get_current_connection_async,
+    get_scan_results_async,
+    roam_to_bssid_async,
 )
-from autoroam.phase_breakout import analyze_from_derived
-from autoroam.cycle_summary import build_cycle_summary, save_cycle_summary
+from autoroam.results import RoamResult
+from autoroam.cycle_summary import attach_by_target, save_cycle_summary
+from autoroam.roam_log import RoamLog, summary_from_roam_log
+from autoroam.timing import span, enable_timing, reset_timings, timings_summary, save_timings, export_chrome_trace
+from autoroam.traffic_probe import TrafficProbe
+from autoroam import host_sampler
+from autoroam.nl80211_monitor import attach_timelines, parse_iw_events
+from autoroam.roam_matrix import MatrixPlan, build_latency_matrix
+from autoroam.backend import get_backend
+from autoroam.baselines import apply_baselines
+from autoroam import scan_history
 
 
 def wait_for_connected(collected: CollectedLogs, start_index: int, timeout: float = 20.0) -> bool:
@@ -24,18 +42,60 @@ def wait_for_connected(collected: CollectedLogs, start_index: int, timeout: floa
     Watch logs for a CTRL-EVENT-CONNECTED message after a roam attempt.
     Returns True if seen, False if timed out.
     """
-    start = time.time()
-    while time.time() - start < timeout:
-        new_logs = collected.raw_logs[start_index:]
-        for line in new_logs:
-            if "CTRL-EVENT-CONNECTED" in line:
-                print("Connected event:", line.strip())
-                return True
-        time.sleep(0.2)
-    return False
+    deadline = time.monotonic() + timeout
+    checked = start_index
+    with collected.new_lines:
+        while True:
+            # only scan lines that arrived since the last wakeup
+            new_logs = collected.raw_logs[checked:]
+            checked += len(new_logs)
+            for line in new_logs:
+                if "CTRL-EVENT-CONNECTED" in line:
+                    print("Connected event:", line.strip())
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            collected.new_lines.wait(remaining)
+
+
+async def wait_for_connected_async(collected: CollectedLogs, start_index: int, timeout: float = 20.0) -> bool:
+    """Async wait_for_connected: awaits a CTRL-EVENT-CONNECTED line future."""
+    try:
+        line = await asyncio.wait_for(expect_line(collected, "CTRL-EVENT-CONNECTED", start_index), timeout)
+    except (asyncio.TimeoutError, EOFError):
+        return False
+    print("Connected event:", line.strip())
+    return True
+
 
+def run_roam_cycle(options: Optional[CycleOptions] = None):
+    """Blocking entry point: runs run_roam_cycle_async on its own event loop."""
+    return asyncio.run(run_roam_cycle_async(options))
+
+
+async def start_nl80211_monitor(collected: CollectedLogs):
+    """Start `iw event -t -f` collection, or return None if iw can't be run."""
+    try:
+        with span("iw_event.start", "collector"):
+            stream = await get_backend().iw_event_async()
+    except OSError as e:
+        print(f"[WARN] nl80211 event monitor unavailable: {e}")
+        return None
+    return collect_stream_async(collected, stream, "nl80211.reader")
 
-def run_roam_cycle(iface="wlan0", min_rssi=-75):
+
+async def run_roam_cycle_async(options: Optional[CycleOptions] = None):
+    """
+    One roam cycle on the running event loop, as configured by options.
+    Cancelling the task stops log collection and restores the wpa_supplicant
+    log level before re-raising.
+    """
+    options = options or CycleOptions()
+
+    # Span timing is cheap, but can be switched off entirely
+    enable_timing(options.timings or options.trace)
+    reset_timings()
 
     # Remove any previous unsaved runs
     cleanup_unsaved_runs()
@@ -44,17 +104,45 @@ def run_roam_cycle(iface="wlan0", min_rssi=-75):
     print(f"[+] Created temporary run directory: {run_dir}")
 
     # Configure wpa_supplicant logging
-    log_set_result, original_log_level = set_log_level(iface, "DEBUG")
+    log_set_result, original_log_level = await set_log_level_async(options.iface, "DEBUG")
     if not log_set_result:
         print("Failed to set log level to DEBUG")
         return
 
-    collected = CollectedLogs()
-    proc = collect_logs(collected)
+    debug_path = os.path.join(run_dir, "roam_debug.log")
+    collected = CollectedLogs(line_filter=is_relevant_line,
+                              raw_sink=open(debug_path, "w+", encoding="utf-8", errors="replace")
+                              if options.raw_log else None)
+    collection = await collect_logs_async(collected, grep=journal_grep_pattern(), structured=options.structured_journal)
+    nl_collected = CollectedLogs()
+    nl_collection = await start_nl80211_monitor(nl_collected) if options.nl_events else None
+    probe = (TrafficProbe(options.probe_target, rate_pps=options.probe_rate, iface=options.iface)
+             if options.probe_target else None)
+    probe_windows = []
+    sampler = host_sampler.HostSampler(options.iface, rate_hz=options.sample_rate) if options.sample_rate else None
+    sampler_windows = []
+    roam_log = None
+    analyzer = IncrementalRoamAnalyzer(collected)
+    roam_results = []
+    finished = False
+
+    def finished_records(pairs):
+        records = []
+        for derived, raw in pairs:
+            roam = RoamResult.from_analysis(len(roam_results) + 1, derived, raw)
+            roam_results.append(roam)
+            records.append({"type": "roam", **roam.to_dict()})
+        return records
+
+    async def emit_finished_roams(pairs):
+        """Append newly analyzed roams to roams.jsonl right away."""
+        records = finished_records(pairs)
+        if records:
+            await roam_log.append_async(*records)
 
     try:
         # Identify current connection
-        current = get_current_connection(iface)
+        current = await get_current_connection_async(options.iface)
         if not current.ssid or not current.bssid:
             print("Wi-Fi interface is not connected to a WLAN.")
             return
@@ -78,12 +166,26 @@ def run_roam_cycle(iface="wlan0", min_rssi=-75):
 
 
         # Gather candidate APs for roaming
-        candidates = get_scan_results(
-            iface=iface,
-            mrssi=min_rssi,
-            ssid_filter=current.ssid,
-            current_bssid=current.bssid,
-        )
+        scan_start = time.monotonic()
+        scanned = [] if options.record_scans else None
+        with span("scan", "cycle"):
+            candidates = await get_scan_results_async(
+                iface=options.iface,
+                mrssi=options.min_rssi,
+                ssid_filter=current.ssid,
+                current_bssid=current.bssid,
+                record=scanned,
+            )
+        scan_duration_s = round(time.monotonic() - scan_start, 3)
+        scan_id = None
+        if scanned:
+            with span("scan_history.record", "analysis"):
+                try:
+                    scan_id = await asyncio.to_thread(
+                        scan_history.record_scan, scanned, run=os.path.basename(run_dir),
+                        iface=options.iface, ssid_filter=current.ssid)
+                except Exception as e:
+                    print(f"[WARN] Could not record scan history: {e}")
 
         print("Candidates:")
         for target in candidates:
@@ -95,39 +197,7 @@ def run_roam_cycle(iface="wlan0", min_rssi=-75):
         cycle_start = time.time()
         cycle_start_ts = datetime.now().astimezone().isoformat()
 
-        # Attempt roams
-        for target in candidates:
-            print(f"\n>>> Roaming to {target.bssid} (RSSI {target.rssi} dBm, {target.freq} MHz)")
-            start_index = len(collected.raw_logs)
-
-            roam_to_bssid(iface, target.bssid)
-
-            if wait_for_connected(collected, start_index):
-                print(f"Roam to {target.bssid} completed successfully")
-            else:
-                print(f"Roam to {target.bssid} timed out or failed")
-
-        # Analyze collected logs
-        print("\n================== Post-Roam Analysis ==================\n")
-        results = analyze_all_roams(collected, run_dir = run_dir)  # → returns list[(derived, raw)]
-
-        if not results:
-            print("No roam results detected — skipping post-roam phase analysis.")
-        else:
-            for idx, (derived, raw) in enumerate(results, start=1):
-                #print(pretty_print_derived(derived))
-                print(f"--- Phase Analysis for Roam #{idx} ---")
-                phase_results = analyze_from_derived(derived, raw)
-
-                for name, pdata in phase_results.items():
-                    print(
-                        f"{name:15s} | Status: {pdata['status']:8s} | "
-                        f"Duration: {pdata['duration_ms'] or 'N/A':>7} ms | "
-                        f"Errors: {len(pdata['errors'])}"
-                    )
-
-
-        # Build the full cycle summary JSON
+        # Cycle context, recorded first in roams.jsonl
         if candidates and any(c.auth_suites for c in candidates):
             security_types = sorted({suite for c in candidates for suite in c.auth_suites})
             security_type = ", ".join(security_types)
@@ -149,34 +219,207 @@ def run_roam_cycle(iface="wlan0", min_rssi=-75):
             for c in candidates
         ]
 
+        # Every finished roam is appended to roams.jsonl as soon as its log chunk closes
+        analyzer.run_dir = run_dir
+        roam_log = RoamLog(run_dir)
+        await roam_log.append_async({
+            "type": "cycle",
+            "ssid": current.ssid,
+            "security_type": security_type,
+            "timestamp": cycle_start_ts,
+            "candidates": candidates_list,
+        })
+
+        if probe:
+            await probe.start()
+            # Let the probe settle so the first window starts from a steady stream
+            await asyncio.sleep(options.probe_tail_s)
+        if sampler:
+            await sampler.start()
+
+        async def roam_once(bssid):
+            target = by_bssid.get(bssid.lower())
+            if target:
+                print(f"\n>>> Roaming to {target.bssid} (RSSI {target.rssi} dBm, {target.freq} MHz)")
+            else:
+                print(f"\n>>> Roaming to {bssid}")
+            start_index = len(collected.raw_logs)
+            window_start = TrafficProbe.now_ns()
+
+            with span("roam", "cycle", bssid=bssid):
+                await roam_to_bssid_async(options.iface, bssid)
+
+                with span("wait_for_connected", "cycle", bssid=bssid):
+                    connected = await wait_for_connected_async(collected, start_index)
+
+            if sampler:
+                sampler_windows.append((bssid, window_start, TrafficProbe.now_ns()))
+            if connected:
+                print(f"Roam to {bssid} completed successfully")
+            else:
+                print(f"Roam to {bssid} timed out or failed")
+
+            if probe:
+                await asyncio.sleep(options.probe_tail_s)
+                probe_windows.append((bssid, window_start, TrafficProbe.now_ns()))
+            # This roam's ROAM command closed the previous roam's chunk
+            with span("analyze_finished_roams", "analysis"):
+                await emit_finished_roams(analyzer.poll())
+            return connected
+
+        by_bssid = {c.bssid.lower(): c for c in candidates}
+        plan = None
+
+        # Attempt roams
+        if options.matrix:
+            plan = MatrixPlan([c.bssid for c in candidates], current=current.bssid)
+            print(f"[+] Matrix mode: {plan.pairs} ordered pairs over {len(plan.bssids)} APs, "
+                  f"schedule of {len(plan.schedule) - 1} roams")
+            position = current.bssid
+            while (step := plan.next_roam(position)) is not None:
+                dst, transit = step
+                if transit:
+                    print(f"[matrix] repositioning to {dst}")
+                await roam_once(dst)
+                # Trust the supplicant for where we actually ended up
+                now_on = (await get_current_connection_async(options.iface)).bssid or position
+                plan.record(position, dst, succeeded=(now_on or "").lower() == dst, transit=transit)
+                position = now_on
+            if plan.unmeasured():
+                print(f"[WARN] Matrix: {len(plan.unmeasured())} pairs not attempted (roam limit reached)")
+        else:
+            for target in candidates:
+                await roam_once(target.bssid)
+
+        probe_results = []
+        if probe:
+            # Give the last echoes time to arrive before counting losses
+            await asyncio.sleep(probe.timeout_s)
+            await probe.stop()
+            for bssid, start_ns, end_ns in probe_windows:
+                traffic = probe.window_stats(start_ns, end_ns)
+                probe_results.append({"target_bssid": bssid, "traffic": traffic})
+                print(
+                    f"[probe] {bssid}: longest gap {traffic['longest_gap_ms']} ms, "
+                    f"lost {traffic['lost']}/{traffic['sent']}, jitter {traffic['jitter_ms']} ms"
+                )
+        sampler_results = []
+        if sampler:
+            if not probe:
+                # Samples after the last roam, so its window is as complete as the others
+                await asyncio.sleep(host_sampler.PAD_S)
+            await sampler.stop()
+            sampler_results = [{"target_bssid": bssid, "host": sampler.window_stats(start_ns, end_ns)}
+                               for bssid, start_ns, end_ns in sampler_windows]
+            try:
+                sampler.save(os.path.join(run_dir, "host_samples.jsonl"))
+            except OSError as e:
+                print(f"[WARN] Could not save host samples: {e}")
+
+        # The last roam's chunk closes with the cycle
+        with span("analyze_finished_roams", "analysis"):
+            await emit_finished_roams(analyzer.finish())
+        results = analyzer.results  # list[(derived, raw)]
+
+        print("\n================== Post-Roam Analysis ==================\n")
+        if not roam_results:
+            print("No roam results detected — skipping post-roam phase analysis.")
+        else:
+            for roam in roam_results:
+                print(f"--- Phase Analysis for Roam #{roam.roam_index} ---")
+                print(roam.phase_table())
+
+
         execution_duration_s = round(time.time() - cycle_start, 2)
-        summary = build_cycle_summary(
-            ssid=current.ssid,
-            security_type=security_type,
-            candidates=candidates_list,
-            derived_raw_pairs=results,
-            timestamp=cycle_start_ts,
-            execution_duration_s=execution_duration_s,
-        )
+        await roam_log.append_async({"type": "end", "execution_duration_s": execution_duration_s})
+        finished = True
+        # cycle_summary.json is built from roams.jsonl, the same data a recovery would see
+        with span("build_cycle_summary", "analysis"):
+            summary = await asyncio.to_thread(summary_from_roam_log, roam_log.path)
+        summary["scan_duration_s"] = scan_duration_s
+        summary["collector"] = collected.stats()
+        if probe:
+            summary["traffic_probe"] = probe.config()
+            attach_by_target(summary, probe_results, "traffic")
+        if sampler:
+            summary["host_sampler"] = {**sampler.config(), **sampler.cycle_stats()}
+            attach_by_target(summary, sampler_results, "host")
+        if plan:
+            attach_by_target(summary, plan.attempts, "from_bssid", source="from", target="to")
+            summary["matrix"] = {
+                **build_latency_matrix(plan.bssids, summary["roams"]),
+                "schedule": plan.schedule,
+                "roams_run": len(plan.attempts),
+                "transit_roams": sum(1 for a in plan.attempts if a["transit"]),
+            }
+        if nl_collection:
+            with span("nl80211.timeline", "analysis"):
+                nl = parse_iw_events(nl_collected.raw_logs, iface=options.iface)
+                attach_timelines(summary, [derived for derived, _ in results], nl)
+            summary["nl80211_events"] = len(nl)
+        with span("baselines", "analysis"):
+            try:
+                apply_baselines(summary, update=options.baseline)
+            except Exception as e:
+                print(f"[WARN] Baseline check failed: {e}")
+        if scan_id is not None:
+            try:
+                await asyncio.to_thread(scan_history.record_roams, scan_id, summary["roams"])
+            except Exception as e:
+                print(f"[WARN] Could not record roams in scan history: {e}")
+        if options.timings:
+            summary["timings"] = timings_summary()
 
         summary_path = os.path.join(run_dir, "cycle_summary.json")
         save_cycle_summary(summary, summary_path)
+        if options.timings:
+            # The summary can't time its own save; the full table goes next to it
+            save_timings(os.path.join(run_dir, "timings.json"))
 
 
     finally:
-        stop_log_collection(proc)
-        restore_log_level(iface, original_log_level)
-
-    #save raw logs for debug
-    #data_dir = get_data_dir()
-    try:
-        # Ensure the debug path lives in /data
-        debug_path = os.path.join(run_dir, "roam_debug.log")
-        with open(debug_path, "w") as f:
-            f.writelines(collected.raw_logs)
+        if roam_log:
+            if not finished:
+                # Interrupted: keep whatever roams made it into the log (synchronously,
+                # a cancelled task can't rely on awaiting anything here)
+                try:
+                    roam_log.append(*finished_records(analyzer.finish()))
+                except Exception as e:
+                    print(f"[WARN] Could not analyze the last roam: {e}")
+                print(f"[!] Cycle interrupted after {len(roam_results)} roam(s); "
+                      f"rebuild the summary with --recover {run_dir}")
+            roam_log.close()
+        if probe:
+            await probe.stop()
+        if sampler:
+            await sampler.stop()
+        if nl_collection:
+            await stop_log_collection_async(nl_collection)
+        await stop_log_collection_async(collection)
+        if collected.raw_sink:
+            collected.raw_sink.close()
+        await restore_log_level_async(options.iface, original_log_level)
+
+    #save raw logs for debug (the run dir may have been renamed since)
+    debug_path = os.path.join(run_dir, "roam_debug.log")
+    if options.raw_log:
         print(f"[+] Saved raw logs to {debug_path}")
-    except Exception as e:
-        print(f"[!] Failed to save debug logs: {e}")
+    else:
+        try:
+            with open(debug_path, "w") as f:
+                f.writelines(collected.raw_logs)
+            print(f"[+] Saved filtered logs to {debug_path} ({collected.filtered_lines} lines dropped)")
+        except Exception as e:
+            print(f"[!] Failed to save debug logs: {e}")
+
+    if nl_collection:
+        nl_path = os.path.join(run_dir, "nl80211_events.log")
+        with open(nl_path, "w") as f:
+            f.writelines(nl_collected.raw_logs)
+        print(f"[+] Saved nl80211 events to {nl_path}")
+
+    if options.trace:
+        export_chrome_trace(os.path.join(run_dir, "trace.json"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+"""
+run_catalog.py
+--------------
+Run listing with filters, cursor pagination and field projection.
+
+Each run directory is summed up once into a small record (SSID, time,
+saved flag, roam and failure counts) from its metadata.json and
+cycle_summary.json. Records are cached per process and re-read only when
+one of those files changes, so listing hundreds of runs doesn't re-parse
+hundreds of summaries on every request.
+
+    list_runs(ssid="lab", failures=True, limit=20)   # newest first
+    list_runs(cursor=page["next_cursor"])            # next page
+    load_summaries(dirs, ["ssid", "roams.phases.*.duration_ms"])
+"""
+import base64
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from autoroam.common import get_runs_dir
+from autoroam.cycle_summary import lite_summary
+from autoroam.results import dumps, loads, load_json_file
+
+RUN_FIELDS = ("dir", "ssid", "timestamp", "saved", "notes", "security_type",
+              "roams", "failures", "execution_duration_s", "interrupted")
+DEFAULT_PAGE = 50
+MAX_PAGE = 500
+BATCH_LIMIT = 100     # runs per load_summaries() call
+
+_cache: Dict[str, tuple] = {}    # run dir -> (file stamps, record)
+_cache_lock = threading.Lock()
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _epoch(ts) -> Optional[float]:
+    """Seconds since the epoch for an ISO timestamp (naive = local time)."""
+    try:
+        return datetime.fromisoformat(str(ts)).astimezone().timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_record(run_path: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(run_path, "metadata.json"), "rb") as f:
+            meta = loads(f.read())
+    except (OSError, ValueError):
+        return None
+    try:
+        summary = load_json_file(os.path.join(run_path, "cycle_summary.json"))
+    except (OSError, ValueError):
+        summary = {}
+
+    roams = summary.get("roams") or []
+    # Same precedence as before: recorded time, then the cycle's start, then the dir mtime
+    ts = meta.get("timestamp") or summary.get("timestamp")
+    if _epoch(ts) is None:
+        ts = datetime.fromtimestamp(os.path.getmtime(run_path)).isoformat()
+    return {
+        "dir": os.path.basename(run_path),
+        "ssid": meta.get("ssid") or summary.get("ssid") or "Unknown",
+        "timestamp": ts,
+        "saved": bool(meta.get("saved")),
+        "notes": meta.get("notes", ""),
+        "security_type": summary.get("security_type"),
+        "roams": len(roams),
+        "failures": sum(1 for r in roams if r.get("overall_status") == "failure"),
+        "execution_duration_s": summary.get("execution_duration_s"),
+        "interrupted": bool(summary.get("interrupted")),
+        "_epoch": _epoch(ts),
+    }
+
+
+def run_record(run_path: str) -> Optional[Dict]:
+    """Catalog record of one run directory (cached until its files change)."""
+    stamp = (_mtime_ns(os.path.join(run_path, "metadata.json")),
+             _mtime_ns(os.path.join(run_path, "cycle_summary.json")))
+    if stamp[0] is None:
+        return None
+    with _cache_lock:
+        hit = _cache.get(run_path)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    record = _read_record(run_path)
+    if record is not None:
+        with _cache_lock:
+            _cache[run_path] = (stamp, record)
+    return record
+
+
+def all_runs(runs_dir: Optional[str] = None) -> List[Dict]:
+    """Records of every run, newest first."""
+    runs_dir = runs_dir or get_runs_dir()
+    paths = [e.path for e in os.scandir(runs_dir) if e.is_dir()]
+    with _cache_lock:
+        for stale in set(_cache) - set(paths):
+            del _cache[stale]
+    records = [r for r in map(run_record, paths) if r is not None]
+    records.sort(key=lambda r: (r["_epoch"], r["dir"]), reverse=True)
+    return records
+
+
+# ============================================================
+#  Listing
+# ============================================================
+
+def parse_time(value: Optional[str], end: bool = False) -> Optional[float]:
+    """
+    Epoch seconds for a since/until filter. A bare date means the start of
+    that day, or with end=True the start of the next one.
+    """
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"invalid date/time: {value!r} (use ISO-8601, e.g. 2025-10-18 or 2025-10-18T14:00)")
+    if end and len(value) == 10:
+        dt += timedelta(days=1)
+    return dt.astimezone().timestamp()
+
+
+def encode_cursor(record: Dict) -> str:
+    return base64.urlsafe_b64encode(dumps([record["_epoch"], record["dir"]])).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        epoch, name = loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(epoch), str(name)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+def _public(record: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    keys = [f for f in fields if f in RUN_FIELDS] if fields else RUN_FIELDS
+    return {k: record[k] for k in keys}
+
+
+def list_runs(ssid: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              saved: Optional[bool] = True, failures: Optional[bool] = None, cursor: Optional[str] = None,
+              limit: int = DEFAULT_PAGE, fields: Optional[List[str]] = None) -> Dict:
+    """
+    One page of runs, newest first. ssid matches case-insensitively as a
+    substring; since/until are epoch seconds (until exclusive); saved and
+    failures filter on the saved flag and on having any failed roam (None
+    means either). Pass the returned next_cursor to get the next page.
+    """
+    limit = max(1, min(limit, MAX_PAGE))
+    after = decode_cursor(cursor) if cursor else None
+    needle = ssid.lower() if ssid else None
+
+    matched = []
+    for r in all_runs():
+        if saved is not None and r["saved"] != saved:
+            continue
+        if failures is not None and (r["failures"] > 0) != failures:
+            continue
+        if needle and needle not in r["ssid"].lower():
+            continue
+        if since is not None and r["_epoch"] < since:
+            continue
+        if until is not None and r["_epoch"] >= until:
+            continue
+        matched.append(r)
+
+    start = 0
+    if after:
+        # Records are sorted by (epoch, dir) descending; resume after the cursor
+        while start < len(matched) and (matched[start]["_epoch"], matched[start]["dir"]) >= after:
+            start += 1
+    page = matched[start:start + limit]
+    more = start + limit < len(matched)
+    return {
+        "runs": [_public(r, fields) for r in page],
+        "total": len(matched),
+        "next_cursor": encode_cursor(page[-1]) if more else None,
+    }
+
+
+# ============================================================
+#  Batch summaries
+# ============================================================
+
+def _pick(src, path: List[str], dst: Dict) -> None:
+    """Copy the value at path from src into dst. Lists are mapped; "*" matches every key."""
+    if not isinstance(src, dict):
+        return
+    keys = list(src) if path[0] == "*" else [path[0]]
+    for key in keys:
+        if key not in src:
+            continue
+        val = src[key]
+        if len(path) == 1:
+            dst[key] = val
+        elif isinstance(val, list):
+            out = dst.setdefault(key, [{} for _ in val])
+            for s, d in zip(val, out):
+                _pick(s, path[1:], d)
+        elif isinstance(val, dict):
+            _pick(val, path[1:], dst.setdefault(key, {}))
+
+
+def project(obj: Dict, fields: Iterable[str]) -> Dict:
+    """Subset of obj with only the given dotted paths, e.g. "roams.roam_duration_ms"."""
+    out: Dict = {}
+    for f in fields:
+        if f:
+            _pick(obj, f.split("."), out)
+    return out
+
+
+def load_summaries(dirs: List[str], fields: Optional[List[str]] = None, view: Optional[str] = None) -> Dict:
+    """
+    cycle_summary.json of several runs in one go, each cut down to fields
+    (all of it if None, or the summary-only view with view="summary").
+    """
+    if len(dirs) > BATCH_LIMIT:
+        raise ValueError(f"at most {BATCH_LIMIT} runs per request")
+    runs_dir = get_runs_dir()
+    runs, missing = {}, []
+    for d in dirs:
+        name = os.path.basename(d)
+        try:
+            summary = load_json_file(os.path.join(runs_dir, name, "cycle_summary.json"))
+        except (OSError, ValueError):
+            missing.append(name)
+            continue
+        if view == "summary":
+            summary = lite_summary(summary)
+        runs[name] = project(summary, fields) if fields else summary
+    return {"runs": runs, "missing": missing}
@@ -0,0 +1,424 @@
+"""
+scan_history.py
+---------------
+Local time-series store of every parsed scan, for per-BSS RF trends.
+
+The cycle summary only keeps the candidates that passed the SSID and RSSI
+filter. Here every BSS of every cycle's scan is kept, with RSSI, channel,
+QBSS utilization and station count, in data/scan_history.sqlite3:
+
+  scans    one row per scan (time, run, interface, SSID filter)
+  samples  one row per BSS per scan, clustered by (bssid, time) so a
+           BSS's trend is a single range read
+  roams    each roam's duration and status, tied to the scan of its cycle
+
+Because a roam points at the scan it was chosen from, "how does EAP time
+to this AP relate to its load" is a join, not a re-parse of old scans.
+Correlations are Spearman rank correlations: roam durations are skewed
+and the relation is rarely linear.
+
+Rows older than RETENTION_DAYS are dropped when new scans come in.
+
+    python3 -m autoroam.scan_history --import data/runs   # backfill from cycle summaries
+    python3 -m autoroam.scan_history 02:00:00:00:00:02    # trend + correlation of one BSS
+"""
+import argparse
+import math
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+from autoroam.common import get_data_dir, get_runs_dir
+from autoroam.compare import PHASES, median
+from autoroam.results import load_json_file
+
+STORE_FILE = "scan_history.sqlite3"
+RETENTION_DAYS = 365
+MIN_PAIRS = 5            # below this no correlation is given
+MAX_POINTS = 2000        # trend points per BSS before bucketing kicks in
+RF_METRICS = ("rssi", "util", "stations")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    run TEXT,
+    iface TEXT,
+    ssid_filter TEXT,
+    bss_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_time ON scans (time);
+CREATE INDEX IF NOT EXISTS scans_run ON scans (run);
+CREATE TABLE IF NOT EXISTS samples (
+    bssid TEXT NOT NULL,
+    time REAL NOT NULL,
+    scan_id INTEGER NOT NULL,
+    ssid TEXT,
+    freq INTEGER,
+    rssi INTEGER,
+    util REAL,
+    stations INTEGER,
+    PRIMARY KEY (bssid, time, scan_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS roams (
+    scan_id INTEGER NOT NULL,
+    roam_index INTEGER NOT NULL,
+    bssid TEXT NOT NULL,
+    time REAL,
+    status TEXT,
+    duration_ms REAL,
+    auth_ms REAL,
+    assoc_ms REAL,
+    eap_ms REAL,
+    fourway_ms REAL,
+    PRIMARY KEY (scan_id, roam_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS roams_bssid ON roams (bssid, time);
+"""
+
+# roams column per summary phase name
+PHASE_COLUMNS = dict(zip(PHASES, ("auth_ms", "assoc_ms", "eap_ms", "fourway_ms")))
+LATENCY_COLUMNS = ("duration_ms",) + tuple(PHASE_COLUMNS.values())
+
+
+def get_store_path() -> str:
+    return os.path.join(get_data_dir(), STORE_FILE)
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path or get_store_path(), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _epoch(ts) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(ts)).astimezone().timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _get(bss, name: str):
+    """Field of a ParsedScanResults or of a candidate dict from a summary."""
+    return bss.get(name) if isinstance(bss, dict) else getattr(bss, name, None)
+
+
+# ============================================================
+#  Recording
+# ============================================================
+
+def record_scan(bsses: Iterable, run: Optional[str] = None, iface: Optional[str] = None,
+                ssid_filter: Optional[str] = None, scan_time: Optional[float] = None,
+                path: Optional[str] = None) -> int:
+    """Store one scan (ParsedScanResults or candidate dicts). Returns its scan id."""
+    scan_time = scan_time or time.time()
+    rows = []
+    for b in bsses:
+        bssid = (_get(b, "bssid") or "").lower()
+        if bssid:
+            rows.append((bssid, scan_time, _get(b, "ssid"), _int(_get(b, "freq")), _get(b, "rssi"),
+                         _get(b, "qbss_util_prct"), _get(b, "qbss_sta_count")))
+    with closing(connect(path)) as conn, conn:
+        scan_id = conn.execute(
+            "INSERT INTO scans (time, run, iface, ssid_filter, bss_count) VALUES (?, ?, ?, ?, ?)",
+            (scan_time, run, iface, ssid_filter, len(rows)),
+        ).lastrowid
+        conn.executemany(
+            "INSERT OR REPLACE INTO samples (bssid, time, scan_id, ssid, freq, rssi, util, stations) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r[0], r[1], scan_id) + r[2:] for r in rows],
+        )
+        _prune(conn, scan_time - RETENTION_DAYS * 86400)
+    return scan_id
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _prune(conn: sqlite3.Connection, cutoff: float) -> None:
+    old = [r[0] for r in conn.execute("SELECT id FROM scans WHERE time < ?", (cutoff,))]
+    if not old:
+        return
+    conn.execute("DELETE FROM samples WHERE time < ?", (cutoff,))
+    conn.executemany("DELETE FROM roams WHERE scan_id = ?", [(i,) for i in old])
+    conn.execute("DELETE FROM scans WHERE time < ?", (cutoff,))
+
+
+def record_roams(scan_id: int, roams: List[Dict], path: Optional[str] = None) -> int:
+    """Store the summary roams of the cycle that scan_id was taken for."""
+    rows = []
+    for r in roams:
+        if not r.get("target_bssid"):
+            continue
+        phases = r.get("phases") or {}
+        rows.append((
+            scan_id, r.get("roam_index"), r["target_bssid"].lower(), _epoch(r.get("start_time")),
+            r.get("overall_status"), r.get("roam_duration_ms"),
+            *((phases.get(name) or {}).get("duration_ms") for name in PHASE_COLUMNS),
+        ))
+    with closing(connect(path)) as conn, conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO roams (scan_id, roam_index, bssid, time, status, duration_ms, "
+            "auth_ms, assoc_ms, eap_ms, fourway_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def import_runs(runs_dir: Optional[str] = None, path: Optional[str] = None) -> Dict:
+    """
+    Backfill from existing runs' cycle_summary.json: their candidates (the
+    filtered scan, which is all older runs kept) and roams. Runs already in
+    the store are skipped.
+    """
+    runs_dir = runs_dir or get_runs_dir()
+    with closing(connect(path)) as conn:
+        known = {r[0] for r in conn.execute("SELECT DISTINCT run FROM scans WHERE run IS NOT NULL")}
+    imported = skipped = 0
+    for entry in sorted(os.scandir(runs_dir), key=lambda e: e.name):
+        if not entry.is_dir() or entry.name in known:
+            skipped += entry.is_dir()
+            continue
+        try:
+            summary = load_json_file(os.path.join(entry.path, "cycle_summary.json"))
+        except (OSError, ValueError):
+            continue
+        scan_time = _epoch(summary.get("timestamp")) or entry.stat().st_mtime
+        scan_id = record_scan(summary.get("candidates") or [], run=entry.name,
+                              ssid_filter=summary.get("ssid"), scan_time=scan_time, path=path)
+        record_roams(scan_id, summary.get("roams") or [], path=path)
+        imported += 1
+    return {"imported": imported, "skipped": skipped}
+
+
+# ============================================================
+#  Queries
+# ============================================================
+
+def _time_clause(since: Optional[float], until: Optional[float], column: str = "time"):
+    sql, args = "", []
+    if since is not None:
+        sql += f" AND {column} >= ?"
+        args.append(since)
+    if until is not None:
+        sql += f" AND {column} < ?"
+        args.append(until)
+    return sql, args
+
+
+def bss_overview(since: Optional[float] = None, until: Optional[float] = None,
+                 ssid: Optional[str] = None, path: Optional[str] = None) -> List[Dict]:
+    """Every BSS seen in the window: sample count, first/last seen, RSSI range, roam count."""
+    where, args = _time_clause(since, until)
+    if ssid:
+        where += " AND ssid = ?"
+        args.append(ssid)
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT bssid, MAX(ssid), COUNT(*), MIN(time), MAX(time), MIN(rssi), MAX(rssi), "
+            "AVG(rssi), AVG(util), AVG(stations) FROM samples WHERE 1=1" + where +
+            " GROUP BY bssid ORDER BY MAX(time) DESC", args).fetchall()
+        rwhere, rargs = _time_clause(since, until)
+        roams = dict(conn.execute(
+            "SELECT bssid, COUNT(*) FROM roams WHERE 1=1" + rwhere + " GROUP BY bssid", rargs).fetchall())
+    return [{
+        "bssid": r[0], "ssid": r[1], "samples": r[2], "first_seen": r[3], "last_seen": r[4],
+        "rssi_min": r[5], "rssi_max": r[6], "rssi_avg": _round(r[7]),
+        "util_avg": _round(r[8]), "stations_avg": _round(r[9]), "roams": roams.get(r[0], 0),
+    } for r in rows]
+
+
+def _round(v, digits: int = 1):
+    return None if v is None else round(v, digits)
+
+
+def bss_trend(bssid: str, since: Optional[float] = None, until: Optional[float] = None,
+              bucket_s: Optional[float] = None, path: Optional[str] = None) -> Dict:
+    """
+    RF samples of one BSS over time. With bucket_s (or when there are more
+    than MAX_POINTS samples) consecutive samples are averaged per bucket.
+    Roams to the BSS in the same window come along with their durations.
+    """
+    bssid = bssid.lower()
+    where, args = _time_clause(since, until)
+    with closing(connect(path)) as conn:
+        if bucket_s is None:
+            n = conn.execute("SELECT COUNT(*) FROM samples WHERE bssid = ?" + where, [bssid] + args).fetchone()[0]
+            if n > MAX_POINTS:
+                first, last = conn.execute("SELECT MIN(time), MAX(time) FROM samples WHERE bssid = ?" + where,
+                                           [bssid] + args).fetchone()
+                bucket_s = max(1.0, math.ceil((last - first) / MAX_POINTS))
+        if bucket_s:
+            rows = conn.execute(
+                "SELECT MIN(time), AVG(rssi), AVG(util), AVG(stations), COUNT(*), MAX(freq) FROM samples "
+                "WHERE bssid = ?" + where + " GROUP BY CAST(time / ? AS INTEGER) ORDER BY 1",
+                [bssid] + args + [bucket_s]).fetchall()
+            points = [{"time": r[0], "rssi": _round(r[1]), "util": _round(r[2]), "stations": _round(r[3]),
+                       "samples": r[4], "freq": r[5]} for r in rows]
+        else:
+            rows = conn.execute(
+                "SELECT time, rssi, util, stations, freq, ssid FROM samples WHERE bssid = ?" + where + " ORDER BY time",
+                [bssid] + args).fetchall()
+            points = [{"time": r[0], "rssi": r[1], "util": r[2], "stations": r[3], "freq": r[4], "ssid": r[5]}
+                      for r in rows]
+        rwhere, rargs = _time_clause(since, until)
+        roams = conn.execute(
+            "SELECT time, status, " + ", ".join(LATENCY_COLUMNS) + " FROM roams WHERE bssid = ?" + rwhere +
+            " ORDER BY time", [bssid] + rargs).fetchall()
+    return {
+        "bssid": bssid,
+        "bucket_s": bucket_s,
+        "points": points,
+        "roams": [dict(zip(("time", "status") + LATENCY_COLUMNS, r)) for r in roams],
+    }
+
+
+def _ranks(values: Sequence[float]) -> List[float]:
+    """1-based ranks, ties get their average rank."""
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction of the incomplete beta function (modified Lentz)."""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        for num in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                    -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + num * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + num / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1) < 1e-12:
+            break
+    return h
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log1p(-x))
+    # The continued fraction converges fast only below the mean; use the symmetry above it
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1 - front * _betacf(b, a, 1 - x) / b
+
+
+def t_two_sided_p(t: float, df: float) -> float:
+    """Two-sided p-value of Student's t with df degrees of freedom."""
+    return betainc(df / 2, 0.5, df / (df + t * t))
+
+
+def spearman(x: Sequence[float], y: Sequence[float]) -> Optional[Dict]:
+    """
+    Spearman rank correlation with a two-sided p-value (Student's t with
+    n - 2 degrees of freedom), or None for fewer than MIN_PAIRS pairs or a
+    constant side.
+    """
+    n = len(x)
+    if n < MIN_PAIRS:
+        return None
+    rx, ry = _ranks(x), _ranks(y)
+    mx, my = sum(rx) / n, sum(ry) / n
+    sxy = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    sxx = sum((a - mx) ** 2 for a in rx)
+    syy = sum((b - my) ** 2 for b in ry)
+    if sxx == 0 or syy == 0:
+        return None
+    rho = sxy / math.sqrt(sxx * syy)
+    if abs(rho) >= 1:
+        p = 0.0
+    else:
+        p = t_two_sided_p(rho * math.sqrt((n - 2) / (1 - rho * rho)), n - 2)
+    return {"rho": round(rho, 4), "p_value": round(min(1.0, p), 6), "n": n}
+
+
+def correlate(bssid: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              latency: str = "duration_ms", path: Optional[str] = None) -> Dict:
+    """
+    Spearman correlation of roam latency (total or one phase column) with
+    the target BSS's RSSI, utilization and station count in the scan its
+    cycle started from. Per BSS (successful roams only) plus all together.
+    """
+    if latency not in LATENCY_COLUMNS:
+        raise ValueError(f"latency must be one of {', '.join(LATENCY_COLUMNS)}")
+    where, args = _time_clause(since, until, "r.time")
+    if bssid:
+        where += " AND r.bssid = ?"
+        args.append(bssid.lower())
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            f"SELECT r.bssid, r.{latency}, s.rssi, s.util, s.stations FROM roams r "
+            "JOIN samples s ON s.scan_id = r.scan_id AND s.bssid = r.bssid "
+            f"WHERE r.status = 'success' AND r.{latency} IS NOT NULL" + where, args).fetchall()
+
+    groups: Dict[str, List[tuple]] = {}
+    for r in rows:
+        groups.setdefault(r[0], []).append(r[1:])
+        groups.setdefault("all", []).append(r[1:])
+
+    def stats(pairs: List[tuple]) -> Dict:
+        out = {"roams": len(pairs), "median_ms": median([p[0] for p in pairs])}
+        for i, metric in enumerate(RF_METRICS, start=1):
+            xs = [(p[i], p[0]) for p in pairs if p[i] is not None]
+            out[metric] = spearman([a for a, _ in xs], [b for _, b in xs])
+        return out
+
+    return {
+        "latency": latency,
+        "overall": stats(groups.pop("all", [])),
+        "bssids": {b: stats(pairs) for b, pairs in sorted(groups.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-BSS RF history from stored scans")
+    parser.add_argument("bssid", nargs="?", help="Show the trend and latency correlation of this BSS")
+    parser.add_argument("--import", dest="import_dir", nargs="?", const="", metavar="RUNS_DIR",
+                        help="Backfill from cycle summaries under RUNS_DIR (default: data/runs)")
+    args = parser.parse_args()
+
+    if args.import_dir is not None:
+        res = import_runs(args.import_dir or None)
+        print(f"[+] Imported {res['imported']} run(s), {res['skipped']} already stored")
+    if args.bssid:
+        trend = bss_trend(args.bssid)
+        for p in trend["points"]:
+            print(f"  {datetime.fromtimestamp(p['time']).isoformat(timespec='seconds')}  "
+                  f"rssi {p['rssi']}  util {p['util']}%  stations {p['stations']}")
+        corr = correlate(args.bssid)["overall"]
+        print(f"\n{len(trend['roams'])} roams, median {corr['median_ms']} ms")
+        for metric in RF_METRICS:
+            c = corr[metric]
+            print(f"  latency vs {metric}: " + (f"rho={c['rho']:+.2f} p={c['p_value']:.4f} (n={c['n']})" if c else "n/a"))
+    elif args.import_dir is None:
+        for b in bss_overview():
+            print(f"  {b['bssid']}  {b['ssid'] or '':20s} {b['samples']:5d} samples  "
+                  f"rssi {b['rssi_min']}..{b['rssi_max']}  {b['roams']} roams")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
+import asyncio
 import subprocess
 from time import sleep
 import time
 from dataclasses import dataclass
 import re
 from typing import List
-from autoroam.iw_scan_parser import parse_iw_scan_output, ParsedScanResults
+from autoroam.iw_scan_parser import IwScanStreamParser, ParsedScanResults
+from autoroam.timing import span
+from autoroam.backend import get_backend
 
 #Various shell commands live here
 
@@ -12,6 +15,10 @@ from autoroam.iw_scan_parser import parse_iw_scan_output, ParsedScanResults
 interface = "wlan0"
 min_rssi = -75
 
+#iw scan retries when a scan comes back empty
+MAX_RETRIES = 5
+RETRY_DELAY = 2.0
+
 #Create classes for the data collected
 @dataclass
 class CurrentConnectionInfo:
@@ -22,12 +29,8 @@ class CurrentConnectionInfo:
 #Set log level DEBUG - needed for log parsing.
 def set_log_level(iface: str, level = str) -> tuple[bool, str | None]:
     #check current log level
-    current_log_level = subprocess.run(
-        ["wpa_cli","-i",iface,"log_level"],
-                capture_output = True,
-                text = True,
-                check = True
-    )
+    with span("wpa_cli.log_level", "shell"):
+        current_log_level = get_backend().wpa_cli(iface, "log_level", check=True)
     for line in current_log_level.stdout.splitlines():
         if line.startswith("Current level:"):
             original_log_level = line.split(":")[1].strip()
@@ -37,12 +40,8 @@ def set_log_level(iface: str, level = str) -> tuple[bool, str | None]:
                 return True, original_log_level
             else:
                 try:
-                    result = subprocess.run(
-                        ["wpa_cli","-i",iface,"log_level",level],
-                        capture_output = True,
-                        text = True,
-                        check = True
-                    )
+                    with span("wpa_cli.log_level", "shell"):
+                        result = get_backend().wpa_cli(iface, "log_level", level, check=True)
                     print("changing log level to",level,result.stdout)
                     return True, original_log_level
                 except subprocess.CalledProcessError as e:
@@ -51,12 +50,8 @@ def set_log_level(iface: str, level = str) -> tuple[bool, str | None]:
             
 def restore_log_level(iface = str, original_log_level = str) -> bool:
     try:    
-        r = subprocess.run(
-            ["wpa_cli","-i",iface,"log_level",original_log_level],
-            capture_output = True,
-            text = True,
-            check = True
-        )
+        with span("wpa_cli.log_level", "shell"):
+            r = get_backend().wpa_cli(iface, "log_level", original_log_level, check=True)
         print("returned log level to original value:",original_log_level,r.stdout)
         return (True)
     except subprocess.CalledProcessError as e:
@@ -65,11 +60,13 @@ def restore_log_level(iface = str, original_log_level = str) -> bool:
 
 #Uses wpa_cli status to find current connection stats
 def get_current_connection(iface: str = interface) -> CurrentConnectionInfo:
-    r = subprocess.run(["wpa_cli","-i",iface,"status"],
-                       capture_output=True,
-                       text=True)
+    with span("wpa_cli.status", "shell"):
+        r = get_backend().wpa_cli(iface, "status")
+    return _parse_status(r.stdout)
+
+def _parse_status(stdout: str) -> CurrentConnectionInfo:
     conn = CurrentConnectionInfo()
-    for line in r.stdout.splitlines():
+    for line in stdout.splitlines():
         if line.startswith("ssid"):
             conn.ssid = line.split("=",1)[1]
         elif line.startswith("bssid"):
@@ -82,36 +79,48 @@ def get_scan_results(
     mrssi: int = -75,
     ssid_filter: str | None = None,
     current_bssid: str | None = None,
+    record: List[ParsedScanResults] | None = None,
 ) -> List[ParsedScanResults]:
     """
     Retrieve Wi-Fi scan results using `iw dev <iface> scan`.
     Filters by SSID and minimum RSSI, sorts by RSSI descending,
     and moves the current BSSID (if any) to the end of the list.
+    Every parsed BSS, filtered or not, is appended to record if given.
     """
-    MAX_RETRIES = 5
-    RETRY_DELAY = 2.0
-    results_output = None
-
     print(f"Scanning with iw on {iface}...")
-    scan_cmd = ["sudo", "iw", "dev", iface, "scan"]
-    if ssid_filter:
-        scan_cmd += ["ssid", ssid_filter]
+    scan_args = _scan_args(iface, ssid_filter)
 
     for attempt in range(1, MAX_RETRIES + 1):
-        r = subprocess.run(scan_cmd, capture_output=True, text=True)
-        if r.stdout.strip():
-            results_output = r.stdout
-            break
+        parser = IwScanStreamParser(ssid_filter, mrssi, record)
+        with span("iw.scan", "shell", attempt=attempt):
+            proc = get_backend().iw_stream(*scan_args, sudo=True)
+            results = [bss for bss in map(parser.feed, proc.stdout) if bss]
+            proc.wait()
+        if parser.lines:
+            return _rank_scan_results(_finish_scan(parser, results), current_bssid)
         print(f"[iw scan] attempt {attempt}/{MAX_RETRIES} returned no results, retrying...")
         time.sleep(RETRY_DELAY)
 
-    if results_output is None:
-        print("[iw scan] no scan results after retries.")
-        return []
+    print("[iw scan] no scan results after retries.")
+    return []
 
-    # --- Parse results ---
-    results = parse_iw_scan_output(results_output, ssid_filter=ssid_filter, mrssi=mrssi)
+def _scan_args(iface: str, ssid_filter: str | None) -> List[str]:
+    scan_args = ["dev", iface, "scan"]
+    if ssid_filter:
+        scan_args += ["ssid", ssid_filter]
+    return scan_args
 
+def _finish_scan(parser: IwScanStreamParser, results: List[ParsedScanResults]) -> List[ParsedScanResults]:
+    last = parser.finish()
+    if last:
+        results.append(last)
+    print(f"[DEBUG] Parsed {len(results)} BSS entries after filtering ({parser.lines} lines)\n")
+    return results
+
+def _rank_scan_results(
+    results: List[ParsedScanResults],
+    current_bssid: str | None,
+) -> List[ParsedScanResults]:
     # --- Sort results by RSSI descending ---
     results.sort(key=lambda r: r.rssi or -999, reverse=True)
 
@@ -125,5 +134,102 @@ def get_scan_results(
 
 #wpa_cli command to initiate roam
 def roam_to_bssid(iface: str, bssid: str) -> None:
-    subprocess.run(["wpa_cli", "-i", iface, "roam", bssid],
-                   capture_output=True, text=True)
\ No newline at end of file
+    with span("wpa_cli.roam", "shell", bssid=bssid):
+        get_backend().wpa_cli(iface, "roam", bssid)
+
+# --- asyncio variants, used by roam_runner.run_roam_cycle_async ---
+
+async def set_log_level_async(iface: str, level: str) -> tuple[bool, str | None]:
+    with span("wpa_cli.log_level", "shell"):
+        current_log_level = await get_backend().wpa_cli_async(iface, "log_level", check=True)
+    for line in current_log_level.stdout.splitlines():
+        if line.startswith("Current level:"):
+            original_log_level = line.split(":")[1].strip()
+            print("Log level currently set to",original_log_level)
+            if original_log_level == level:
+                print ("log level already set correctly")
+                return True, original_log_level
+            try:
+                with span("wpa_cli.log_level", "shell"):
+                    result = await get_backend().wpa_cli_async(iface, "log_level", level, check=True)
+                print("changing log level to",level,result.stdout)
+                return True, original_log_level
+            except subprocess.CalledProcessError as e:
+                print(f"Failed to set log level: {e.stderr.strip()}")
+                return False, original_log_level
+    return False, None
+
+async def restore_log_level_async(iface: str, original_log_level: str) -> bool:
+    try:
+        with span("wpa_cli.log_level", "shell"):
+            r = await get_backend().wpa_cli_async(iface, "log_level", original_log_level, check=True)
+        print("returned log level to original value:",original_log_level,r.stdout)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to set log level: {e.stderr.strip()}")
+        return False
+
+async def get_current_connection_async(iface: str = interface) -> CurrentConnectionInfo:
+    with span("wpa_cli.status", "shell"):
+        r = await get_backend().wpa_cli_async(iface, "status")
+    return _parse_status(r.stdout)
+
+async def get_scan_results_async(
+    iface: str,
+    mrssi: int = -75,
+    ssid_filter: str | None = None,
+    current_bssid: str | None = None,
+    record: List[ParsedScanResults] | None = None,
+) -> List[ParsedScanResults]:
+    """
+    Async get_scan_results. The scan dump is parsed as iw prints it, so
+    every BSS is filtered (and dropped if it doesn't match) as soon as
+    its block ends instead of after buffering the whole output.
+    """
+    results: List[ParsedScanResults] = []
+    async for bss in iter_scan_results_async(iface, mrssi, ssid_filter, record):
+        results.append(bss)
+    return _rank_scan_results(results, current_bssid)
+
+async def iter_scan_results_async(
+    iface: str,
+    mrssi: int = -75,
+    ssid_filter: str | None = None,
+    record: List[ParsedScanResults] | None = None,
+):
+    """Yield each matching BSS of `iw dev <iface> scan` as soon as its block is complete."""
+    print(f"Scanning with iw on {iface}...")
+    scan_args = _scan_args(iface, ssid_filter)
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        parser = IwScanStreamParser(ssid_filter, mrssi, record)
+        count = 0
+        with span("iw.scan", "shell", attempt=attempt):
+            stream = await get_backend().iw_stream_async(*scan_args, sudo=True)
+            try:
+                async for line in stream:
+                    bss = parser.feed(line)
+                    if bss:
+                        count += 1
+                        yield bss
+            except BaseException:
+                # Cancelled, or the caller stopped early: don't leave iw running
+                stream.terminate()
+                raise
+            finally:
+                await stream.wait()
+        if parser.lines:
+            last = parser.finish()
+            if last:
+                count += 1
+                yield last
+            print(f"[DEBUG] Parsed {count} BSS entries after filtering ({parser.lines} lines)\n")
+            return
+        print(f"[iw scan] attempt {attempt}/{MAX_RETRIES} returned no results, retrying...")
+        await asyncio.sleep(RETRY_DELAY)
+
+    print("[iw scan] no scan results after retries.")
+
+async def roam_to_bssid_async(iface: str, bssid: str) -> None:
+    with span("wpa_cli.roam", "shell", bssid=bssid):
+        await get_backend().wpa_cli_async(iface, "roam", bssid)
@@ -0,0 +1,383 @@
+"""
+simulator.py
+------------
+Hardware-free wpa_supplicant / iw / journalctl backend.
+
+`SimulatedBackend` answers the same commands as `SystemBackend`
+(wpa_cli log_level/status/roam, iw scan, iw station dump, iw event,
+journalctl -f) from an in-memory
+BSS table. Roams emit realistic journal lines (see synthetic.py) with
+configurable per-phase latencies and failure rates, so run_roam_cycle,
+the web UI and server load tests can run on a plain Linux box.
+
+Journal timestamps follow a virtual clock driven by the nominal
+latencies; `time_scale` only controls how long the simulator really
+sleeps, so time_scale=0 runs roams as fast as the pipeline can consume
+them while the analysis still sees realistic phase durations.
+"""
+import asyncio
+import json
+import os
+import queue
+import random
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from autoroam.backend import SystemBackend
+from autoroam.synthetic import (
+    FAILURE_SCENARIOS, PhaseLatencies, format_iw_bss_block, format_iw_event_line, format_iw_station_dump,
+    format_journal_json, format_journal_line,
+    nl80211_events_for, roam_events,
+)
+
+
+@dataclass
+class SimulatedBSS:
+    bssid: str
+    rssi: int = -55
+    freq: int = 5180
+    ssid: str | None = None          # defaults to SimulatorConfig.ssid
+    scenario: str = "ft"             # roam flavour when roaming to this BSS
+    failure_rate: float | None = None  # overrides SimulatorConfig.failure_rate
+    util: int = 40                   # QBSS channel utilisation, 0-255
+    stations: int = 5
+
+
+def _default_bss() -> List[SimulatedBSS]:
+    return [
+        SimulatedBSS("02:00:00:00:00:01", rssi=-48, freq=5180, scenario="ft"),
+        SimulatedBSS("02:00:00:00:00:02", rssi=-55, freq=5500, scenario="ft"),
+        SimulatedBSS("02:00:00:00:00:03", rssi=-61, freq=5745, scenario="pmksa"),
+        SimulatedBSS("02:00:00:00:00:04", rssi=-68, freq=2437, scenario="eap"),
+    ]
+
+
+@dataclass
+class SimulatorConfig:
+    ssid: str = "autoroam-sim"
+    bss: List[SimulatedBSS] = field(default_factory=_default_bss)
+    latencies: PhaseLatencies = field(default_factory=PhaseLatencies)
+    failure_rate: float = 0.0
+    failure_scenarios: List[str] = field(default_factory=lambda: [s for s in FAILURE_SCENARIOS if s != "notarget"])
+    time_scale: float = 1.0      # real sleep = nominal latency * time_scale (0 = no sleeping)
+    recovery_ms: float = 800.0   # reconnect to the previous AP after a failed roam
+    scan_ms: float = 1500.0
+    noise: int = 2               # unmatched DEBUG lines emitted per event
+    kernel_lead_ms: float = 0.3  # nl80211 event precedes the supplicant's log line by this much
+    seed: int | None = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SimulatorConfig":
+        data = dict(data)
+        if "bss" in data:
+            data["bss"] = [SimulatedBSS(**b) for b in data["bss"]]
+        if "latencies" in data:
+            data["latencies"] = PhaseLatencies(**data["latencies"])
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path: str) -> "SimulatorConfig":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class SimulatedStream:
+    """Popen-like handle for a simulated `-f` style command."""
+    json = False   # journalctl -o json
+
+    def __init__(self, on_close=None):
+        self._q: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._on_close = on_close
+        self.returncode = None
+        self.stdout = self._lines()
+
+    def _lines(self):
+        while True:
+            line = self._q.get()
+            if line is None:
+                return
+            yield line
+
+    def feed(self, line: str) -> None:
+        if self.returncode is None:
+            self._q.put(line)
+
+    def terminate(self) -> None:
+        if self.returncode is None:
+            self.returncode = -15
+            self._q.put(None)
+            if self._on_close:
+                self._on_close(self)
+
+    kill = terminate
+
+    def end(self, returncode: int = 0) -> None:
+        """The command finished: EOF after the lines fed so far."""
+        if self.returncode is None:
+            self.returncode = returncode
+            self._q.put(None)
+
+    def wait(self, timeout: float | None = None) -> int:
+        return self.returncode
+
+
+class AsyncSimulatedStream(SimulatedStream):
+    """Async-iterable variant, fed thread-safely from the emitter thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, on_close=None):
+        self._loop = loop
+        self._aq: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        super().__init__(on_close=on_close)
+        self.stdout = None
+
+    async def __aiter__(self):
+        while True:
+            line = await self._aq.get()
+            if line is None:
+                return
+            yield line
+
+    def feed(self, line: str) -> None:
+        if self.returncode is None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._aq.put_nowait, line)
+
+    def terminate(self) -> None:
+        if self.returncode is None:
+            self.returncode = -15
+            self._aq.put_nowait(None)
+            if self._on_close:
+                self._on_close(self)
+
+    kill = terminate
+
+    def end(self, returncode: int = 0) -> None:
+        # Queued behind the lines fed from this thread, so none are lost
+        if self.returncode is None and not self._loop.is_closed():
+            self.returncode = returncode
+            self._loop.call_soon_threadsafe(self._aq.put_nowait, None)
+
+    async def wait(self) -> int:
+        return self.returncode
+
+
+class SimulatedBackend(SystemBackend):
+    name = "simulated"
+
+    def __init__(self, config: Optional[SimulatorConfig] = None, iface: str = "wlan0"):
+        self.config = config or SimulatorConfig()
+        self.iface = iface
+        self.rng = random.Random(self.config.seed)
+        self.log_level = "INFO"
+        self.current_bssid = self.config.bss[0].bssid if self.config.bss else None
+        self.roam_count = 0
+        self._journals: List[SimulatedStream] = []
+        self._nl_streams: List[SimulatedStream] = []   # `iw event` monitors
+        self._lock = threading.Lock()
+        self._emit_lock = threading.Lock()
+        self._virtual_clock = datetime.now()
+        # Journal monotonic timestamps count from this simulated boot time
+        self._boot = self._virtual_clock - timedelta(hours=1)
+        # Station dump counters, reset whenever the client moves to another AP. Own RNG,
+        # so polling the link doesn't change a seeded run's roams.
+        self._station_rng = random.Random(self.config.seed)
+        self._station = {"bssid": None, "since": time.monotonic(), "tx": 0, "retries": 0, "failed": 0}
+
+    # --- Backend interface ---
+
+    def run(self, cmd: List[str], check: bool = False) -> subprocess.CompletedProcess:
+        args = cmd[1:] if cmd and cmd[0] == "sudo" else list(cmd)
+        tool = os.path.basename(args[0]) if args else ""
+        if tool == "wpa_cli":
+            if len(args) > 2 and args[1] == "-i":
+                self.iface = args[2]
+            rest = args[3:] if len(args) > 2 and args[1] == "-i" else args[1:]
+            out, rc = self._wpa_cli(rest)
+            err = ""
+        elif tool == "iw":
+            out, rc = self._iw(args[1:])
+            err = "" if rc == 0 else "command failed: No such device (-19)"
+        else:
+            out, rc, err = "", 127, f"{tool}: not available in simulator"
+
+        result = subprocess.CompletedProcess(cmd, rc, out, err)
+        if check and rc != 0:
+            raise subprocess.CalledProcessError(rc, cmd, out, err)
+        return result
+
+    def popen(self, cmd: List[str]):
+        return self._open_stream(cmd, SimulatedStream(on_close=self._close_journal))
+
+    async def run_async(self, cmd: List[str], check: bool = False) -> subprocess.CompletedProcess:
+        # scans sleep for scan_ms * time_scale, so keep them off the event loop
+        return await asyncio.to_thread(self.run, cmd, check)
+
+    async def popen_async(self, cmd: List[str]):
+        return self._open_stream(cmd, AsyncSimulatedStream(asyncio.get_running_loop(), on_close=self._close_journal))
+
+    def _open_stream(self, cmd: List[str], stream: SimulatedStream) -> SimulatedStream:
+        args = cmd[1:] if cmd and cmd[0] == "sudo" else list(cmd)
+        tool = os.path.basename(args[0]) if args else ""
+        if tool == "journalctl":
+            streams = self._journals
+            stream.json = "json" in args
+        elif tool == "iw" and "event" in args:
+            streams = self._nl_streams
+        elif tool == "iw":
+            # One-shot command read as a stream (iw scan): serve its output, then EOF
+            threading.Thread(target=self._serve_output, args=(args[1:], stream), daemon=True).start()
+            return stream
+        else:
+            raise FileNotFoundError(f"{tool}: not available in simulator")
+        with self._lock:
+            streams.append(stream)
+        return stream
+
+    # --- wpa_cli ---
+
+    def _bss(self, bssid: str) -> Optional[SimulatedBSS]:
+        bssid = bssid.lower()
+        return next((b for b in self.config.bss if b.bssid.lower() == bssid), None)
+
+    def _wpa_cli(self, args: List[str]) -> Tuple[str, int]:
+        if not args:
+            return "", 1
+        cmd = args[0].lower()
+        if cmd == "log_level":
+            if len(args) == 1:
+                return f"Current level: {self.log_level}\nTimestamp: 0\n", 0
+            self.log_level = args[1].upper()
+            return "OK\n", 0
+        if cmd == "status":
+            bss = self._bss(self.current_bssid) if self.current_bssid else None
+            if not bss:
+                return "wpa_state=DISCONNECTED\n", 0
+            return (
+                f"bssid={bss.bssid}\nfreq={bss.freq}\nssid={bss.ssid or self.config.ssid}\n"
+                f"id=0\nmode=station\npairwise_cipher=CCMP\ngroup_cipher=CCMP\n"
+                f"wpa_state=COMPLETED\naddress=02:00:00:aa:bb:cc\n"
+            ), 0
+        if cmd == "roam" and len(args) > 1:
+            return self._roam(args[1])
+        return "UNKNOWN COMMAND\n", 1
+
+    def _roam(self, bssid: str) -> Tuple[str, int]:
+        cfg = self.config
+        bss = self._bss(bssid)
+        previous = self._bss(self.current_bssid) if self.current_bssid else None
+
+        if bss is None:
+            scenario = "notarget"
+        else:
+            rate = cfg.failure_rate if bss.failure_rate is None else bss.failure_rate
+            if cfg.failure_scenarios and self.rng.random() < rate:
+                scenario = self.rng.choice(cfg.failure_scenarios)
+            else:
+                scenario = bss.scenario
+
+        events = roam_events(
+            scenario, bssid.lower(), iface=self.iface,
+            freq=bss.freq if bss else 0,
+            ssid=(bss.ssid if bss and bss.ssid else cfg.ssid),
+            latencies=cfg.latencies, rng=self.rng, noise=cfg.noise,
+        )
+        succeeded = scenario not in FAILURE_SCENARIOS
+        if succeeded:
+            self.current_bssid = bss.bssid
+        elif scenario != "notarget" and previous:
+            # wpa_supplicant reconnects to the previous AP after a failed roam
+            t = events[-1][0] + cfg.recovery_ms
+            events += [
+                (t, f"{self.iface}: State: DISCONNECTED -> SCANNING"),
+                (t + 1.0, f"{self.iface}: Trying to associate with {previous.bssid} (SSID='{cfg.ssid}' freq={previous.freq} MHz)"),
+                (t + 8.0, f"{self.iface}: CTRL-EVENT-CONNECTED - Connection to {previous.bssid} completed [id=0 id_str=]"),
+            ]
+
+        self.roam_count += 1
+        threading.Thread(target=self._emit, args=(events,), daemon=True).start()
+        return ("OK\n", 0) if bss else ("FAIL\n", 0)
+
+    def _serve_output(self, args: List[str], stream: SimulatedStream) -> None:
+        out, rc = self._iw(args)
+        for line in out.splitlines(keepends=True):
+            stream.feed(line)
+        stream.end(rc)
+
+    # --- iw ---
+
+    def _iw(self, args: List[str]) -> Tuple[str, int]:
+        # iw dev <iface> scan [ssid <ssid>]
+        if len(args) >= 3 and args[0] == "dev" and args[2] == "scan":
+            self._sleep(self.config.scan_ms)
+            blocks = [
+                format_iw_bss_block(
+                    bssid=b.bssid, ssid=b.ssid or self.config.ssid, freq=b.freq,
+                    rssi=b.rssi + self.rng.randint(-2, 2), util=b.util, stations=b.stations,
+                    iface=args[1],
+                )
+                for b in self.config.bss
+            ]
+            return "".join(blocks), 0
+        # iw dev <iface> station dump
+        if len(args) >= 4 and args[0] == "dev" and args[2:4] == ["station", "dump"]:
+            return self._station_dump(args[1]), 0
+        return "", 1
+
+    def _station_dump(self, iface: str) -> str:
+        bss = self._bss(self.current_bssid) if self.current_bssid else None
+        if not bss:
+            return ""
+        with self._lock:
+            st = self._station
+            if st["bssid"] != bss.bssid:
+                st.update(bssid=bss.bssid, since=time.monotonic(), tx=0, retries=0, failed=0)
+            st["tx"] += self._station_rng.randint(20, 200)
+            st["retries"] += self._station_rng.randint(0, 8)
+            st["failed"] += self._station_rng.random() < 0.05
+            return format_iw_station_dump(
+                bss.bssid, bss.rssi + self._station_rng.randint(-2, 2), iface=iface,
+                tx_packets=st["tx"], tx_retries=st["retries"], tx_failed=st["failed"],
+                inactive_ms=self._station_rng.randint(0, 300), connected_s=int(time.monotonic() - st["since"]),
+            )
+
+    # --- journal emission ---
+
+    def _sleep(self, nominal_ms: float) -> None:
+        if self.config.time_scale > 0 and nominal_ms > 0:
+            time.sleep(nominal_ms * self.config.time_scale / 1000)
+
+    def _close_journal(self, stream: SimulatedStream) -> None:
+        with self._lock:
+            for streams in (self._journals, self._nl_streams):
+                if stream in streams:
+                    streams.remove(stream)
+
+    def _emit(self, events: List[Tuple[float, str]]) -> None:
+        """Feed (offset_ms, message) events to every open journal, in order."""
+        with self._emit_lock:
+            start = max(datetime.now(), self._virtual_clock)
+            prev = 0.0
+            for offset_ms, msg in events:
+                self._sleep(offset_ms - prev)
+                prev = offset_ms
+                ts = start + timedelta(milliseconds=offset_ms)
+                line = format_journal_line(ts, msg)
+                with self._lock:
+                    journals = list(self._journals)
+                    nl_streams = list(self._nl_streams)
+                if nl_streams:
+                    kernel_ts = ts - timedelta(milliseconds=self.config.kernel_lead_ms)
+                    for event in nl80211_events_for(msg):
+                        nl_line = format_iw_event_line(kernel_ts, self.iface, event)
+                        for n in nl_streams:
+                            n.feed(nl_line)
+                if any(j.json for j in journals):
+                    json_line = format_journal_json(ts, msg, (ts - self._boot) // timedelta(microseconds=1))
+                for j in journals:
+                    j.feed(json_line if j.json else line)
+            self._virtual_clock = start + timedelta(milliseconds=prev + 1)
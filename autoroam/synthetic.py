@@ -0,0 +1,284 @@
+"""
+synthetic.py
+------------
+Synthetic wpa_supplicant journal lines and `iw dev <iface> scan` output.
+
+Produces `journalctl -o short-precise` style lines (or `-o json`
+entries) for FT, PMKSA, full
+EAP and SAE roams plus common failure patterns, the matching kernel-side
+`iw event -t -f` lines, iw scan dumps of any size and `iw dev <iface>
+station dump` output. Used by the
+benchmarks and the simulated backend.
+"""
+import json
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+SUCCESS_SCENARIOS = ("ft", "pmksa", "eap", "sae")
+FAILURE_SCENARIOS = ("auth_timeout", "assoc_reject", "eap_failure", "fourway_failure", "notarget")
+SCENARIOS = SUCCESS_SCENARIOS + FAILURE_SCENARIOS
+
+# Typical DEBUG chatter that matches no analyzer marker
+NOISE_MESSAGES = (
+    "nl80211: Event message available",
+    "nl80211: Drv Event 19 (NL80211_CMD_NEW_STATION) received for {iface}",
+    "{iface}: Event RX_MGMT (18) received",
+    "EAPOL: SUPP_PAE entering state AUTHENTICATED",
+    "EAPOL: SUPP_BE entering state IDLE",
+    "RTM_NEWLINK: ifi_index=3 ifname={iface} operstate=6 linkmode=1 ifi_family=0 ifi_flags=0x11043 ([UP][RUNNING][LOWER_UP])",
+    "{iface}: BSS: Remove id 12 BSSID 00:11:22:33:44:55 SSID 'other' due to wpa_bss_flush_by_age",
+    "l2_packet_receive: src=00:11:22:33:44:55 len=121",
+    "{iface}: WNM: Deauth or disassoc timer is not running",
+    "WMM AC: Missing IEs",
+)
+
+
+@dataclass
+class PhaseLatencies:
+    """Nominal per-phase latencies in milliseconds, with relative jitter."""
+    auth_ms: float = 4.0
+    assoc_ms: float = 6.0
+    eap_ms: float = 120.0
+    fourway_ms: float = 12.0
+    connect_ms: float = 2.0
+    jitter: float = 0.2
+
+
+def format_journal_line(ts: datetime, message: str, host: str = "autoroam",
+                        ident: str = "wpa_supplicant", pid: int = 812) -> str:
+    """Format one line the way `journalctl -o short-precise` does."""
+    return f"{ts.strftime('%b %d %H:%M:%S.%f')} {host} {ident}[{pid}]: {message}\n"
+
+
+def format_journal_json(ts: datetime, message: str, monotonic_us: int, host: str = "autoroam",
+                        ident: str = "wpa_supplicant", pid: int = 812) -> str:
+    """Format one entry the way `journalctl -o json` does (string-valued fields)."""
+    return json.dumps({
+        "__REALTIME_TIMESTAMP": str(int(ts.replace(microsecond=0).timestamp()) * 1_000_000 + ts.microsecond),
+        "__MONOTONIC_TIMESTAMP": str(monotonic_us),
+        "_HOSTNAME": host, "SYSLOG_IDENTIFIER": ident, "_PID": str(pid), "MESSAGE": message,
+    }) + "\n"
+
+
+def format_iw_event_line(ts: datetime, iface: str, event: str, phy: int = 0) -> str:
+    """Format one line the way `iw event -t -f` does."""
+    return f"{ts.timestamp():.6f}: {iface} (phy #{phy}): {event}\n"
+
+
+_STATUS_TEXT = {0: "Successful", 1: "Unspecified failure", 17: "AP unable to handle additional associated STAs"}
+_AUTH_RESP_RE = re.compile(r"SME: Authentication response: peer=(\S+) .*status_code=(\d+)")
+_ASSOC_REJECT_RE = re.compile(r"CTRL-EVENT-ASSOC-REJECT bssid=(\S+) status_code=(\d+)")
+_ASSOCIATED_RE = re.compile(r"Associated with (\S+)")
+
+
+def nl80211_events_for(message: str, own_mac: str = "02:00:00:aa:bb:cc") -> List[str]:
+    """Kernel-side `iw event` text that precedes a supplicant journal message, if any."""
+    m = _AUTH_RESP_RE.search(message)
+    if m:
+        status = int(m.group(2))
+        return [f"auth {m.group(1)} -> {own_mac} status: {status}: {_STATUS_TEXT.get(status, 'Unknown')}"]
+    if "SME: Authentication timed out" in message:
+        return ["auth: timed out"]
+    m = _ASSOC_REJECT_RE.search(message)
+    if m:
+        status = int(m.group(2))
+        return [f"assoc {m.group(1)} -> {own_mac} status: {status}: {_STATUS_TEXT.get(status, 'Unknown')}"]
+    m = _ASSOCIATED_RE.search(message)
+    if m:
+        return [f"assoc {m.group(1)} -> {own_mac} status: 0: Successful", f"connected to {m.group(1)}"]
+    if message.endswith("-> DISCONNECTED"):
+        return ["disconnected (local request) reason: 3: Deauthenticated because sending STA is leaving (or has left) IBSS or ESS"]
+    return []
+
+
+def _jitter(ms: float, lat: PhaseLatencies, rng: random.Random) -> float:
+    return max(0.05, ms * (1 + rng.uniform(-lat.jitter, lat.jitter)))
+
+
+def roam_events(scenario: str, bssid: str, iface: str = "wlan0", freq: int = 5180,
+                ssid: str = "autoroam-test",
+                latencies: Optional[PhaseLatencies] = None,
+                rng: Optional[random.Random] = None,
+                noise: int = 0) -> List[Tuple[float, str]]:
+    """
+    Return (offset_ms, message) pairs for one roam attempt to bssid.
+    Offsets are relative to the ROAM control command.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario {scenario!r}, expected one of {SCENARIOS}")
+    lat = latencies or PhaseLatencies()
+    rng = rng or random.Random()
+    t = 0.0
+    events: List[Tuple[float, str]] = []
+
+    def emit(msg: str, after_ms: float = 0.05):
+        nonlocal t
+        t += after_ms
+        events.append((t, msg.format(iface=iface, bssid=bssid, freq=freq, ssid=ssid)))
+        for _ in range(noise):
+            t += 0.01
+            events.append((t, rng.choice(NOISE_MESSAGES).format(iface=iface)))
+
+    auth_type = {"ft": 2, "sae": 4}.get(scenario, 0)
+    key_mgmt = {"ft": "FT/802.1X", "sae": "SAE", "pmksa": "WPA2/IEEE 802.1X/EAP"}.get(scenario, "WPA2/IEEE 802.1X/EAP")
+
+    emit("{iface}: Control interface command 'ROAM {bssid}'", 0.0)
+    emit("CTRL_IFACE ROAM {bssid}")
+    if scenario == "notarget":
+        emit("{iface}: Target AP not found from BSS table")
+        return events
+
+    emit("{iface}: Trying to authenticate with {bssid} (SSID='{ssid}' freq={freq} MHz)")
+    emit(f"  * Auth Type {auth_type}")
+    emit("nl80211: Authentication request send successfully")
+    emit("{iface}: State: COMPLETED -> AUTHENTICATING")
+    if scenario == "auth_timeout":
+        emit("{iface}: SME: Authentication timed out", _jitter(lat.auth_ms, lat, rng) * 50)
+        emit("{iface}: State: AUTHENTICATING -> DISCONNECTED")
+        return events
+    if scenario == "sae":
+        emit("SAE: Selecting group 19", 0.2)
+        emit("SAE: Peer commit-confirm received", _jitter(lat.auth_ms, lat, rng))
+    emit("{iface}: SME: Authentication response: peer={bssid} auth_type=" + str(auth_type) + " auth_transaction=2 status_code=0",
+         _jitter(lat.auth_ms, lat, rng))
+    emit("{iface}: State: AUTHENTICATING -> ASSOCIATING")
+    emit(f"WPA: using KEY_MGMT {key_mgmt}")
+    emit("nl80211: Association request send successfully")
+    if scenario == "assoc_reject":
+        emit("{iface}: CTRL-EVENT-ASSOC-REJECT bssid={bssid} status_code=17", _jitter(lat.assoc_ms, lat, rng))
+        emit("{iface}: State: ASSOCIATING -> DISCONNECTED")
+        return events
+    emit("{iface}: Associated with {bssid}", _jitter(lat.assoc_ms, lat, rng))
+    emit("{iface}: State: ASSOCIATING -> ASSOCIATED")
+    emit("{iface}: Operating frequency changed from 5200 to {freq} MHz")
+
+    if scenario == "ft":
+        emit("FT: Completed successfully", 0.3)
+    elif scenario == "pmksa":
+        emit("RSN: PMKSA caching was used - skip EAPOL", 0.3)
+    elif scenario in ("eap", "eap_failure"):
+        emit("{iface}: CTRL-EVENT-EAP-STARTED EAP authentication started", 0.5)
+        emit("{iface}: CTRL-EVENT-EAP-METHOD EAP vendor 0 method 25 (PEAP) selected", 2.0)
+        if scenario == "eap_failure":
+            emit("{iface}: CTRL-EVENT-EAP-FAILURE EAP authentication failed", _jitter(lat.eap_ms, lat, rng))
+            emit("{iface}: State: ASSOCIATED -> DISCONNECTED")
+            return events
+        emit("{iface}: CTRL-EVENT-EAP-SUCCESS EAP authentication completed successfully", _jitter(lat.eap_ms, lat, rng))
+
+    if scenario != "ft":
+        emit("{iface}: WPA: RX message 1 of 4-Way Handshake from {bssid} (ver=2)", 0.5)
+        emit("{iface}: State: ASSOCIATED -> 4WAY_HANDSHAKE")
+        if scenario == "fourway_failure":
+            emit("{iface}: WPA: 4-Way Handshake failed - pre-shared key may be incorrect", _jitter(lat.fourway_ms, lat, rng))
+            emit("{iface}: State: 4WAY_HANDSHAKE -> DISCONNECTED")
+            return events
+        emit("{iface}: WPA: Key negotiation completed with {bssid} [PTK=CCMP GTK=CCMP]", _jitter(lat.fourway_ms, lat, rng))
+    emit("{iface}: State: GROUP_HANDSHAKE -> COMPLETED")
+    emit("{iface}: CTRL-EVENT-CONNECTED - Connection to {bssid} completed [id=0 id_str=]", _jitter(lat.connect_ms, lat, rng))
+    return events
+
+
+def synthetic_bssid(i: int) -> str:
+    return "02:00:00:{:02x}:{:02x}:{:02x}".format((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+
+
+def generate_log(n_roams: int, scenarios: Optional[List[str]] = None, seed: int = 0,
+                 noise: int = 3, iface: str = "wlan0",
+                 start: Optional[datetime] = None,
+                 latencies: Optional[PhaseLatencies] = None) -> List[str]:
+    """
+    Generate a full roam_debug.log worth of journal lines for n_roams roams.
+    Scenarios are cycled in order (default: every scenario, successes and failures).
+    """
+    rng = random.Random(seed)
+    scenarios = list(scenarios or SCENARIOS)
+    ts = start or datetime(datetime.now().year, 10, 14, 12, 0, 0)
+    lines: List[str] = []
+    for i in range(n_roams):
+        scenario = scenarios[i % len(scenarios)]
+        bssid = synthetic_bssid(i % 16 + 1)
+        for offset_ms, msg in roam_events(scenario, bssid, iface=iface, latencies=latencies, rng=rng, noise=noise):
+            lines.append(format_journal_line(ts + timedelta(milliseconds=offset_ms), msg))
+        ts += timedelta(seconds=3)
+    return lines
+
+
+def format_iw_bss_block(bssid: str, ssid: str, freq: int, rssi: int,
+                        util: int = 0, stations: int = 0,
+                        auth_suites: str = "IEEE 802.1X FT/IEEE 802.1X",
+                        iface: str = "wlan0", last_seen_ms: int = 200) -> str:
+    """Format one BSS block the way `iw dev <iface> scan` prints it."""
+    return (
+        f"BSS {bssid}(on {iface})\n"
+        f"\tlast seen: {last_seen_ms} ms ago\n"
+        f"\tTSF: 123456789 usec (0d, 00:02:03)\n"
+        f"\tfreq: {freq}.0\n"
+        f"\tbeacon interval: 100 TUs\n"
+        f"\tcapability: ESS Privacy SpectrumMgmt ShortSlotTime (0x0511)\n"
+        f"\tsignal: {rssi}.00 dBm\n"
+        f"\tSSID: {ssid}\n"
+        f"\tSupported rates: 6.0* 9.0 12.0* 18.0 24.0* 36.0 48.0 54.0 \n"
+        f"\tDS Parameter set: channel 36\n"
+        f"\tRSN:\t * Version: 1\n"
+        f"\t\t * Group cipher: CCMP\n"
+        f"\t\t * Pairwise ciphers: CCMP\n"
+        f"\t\t * Authentication suites: {auth_suites}\n"
+        f"\t\t * Capabilities: 1-PTKSA-RC 1-GTKSA-RC MFP-capable (0x0080)\n"
+        f"\tBSS Load:\n"
+        f"\t\t * station count: {stations}\n"
+        f"\t\t * channel utilisation: {util}/255\n"
+        f"\t\t * available admission capacity: 0 [*32us]\n"
+    )
+
+
+def format_iw_station_dump(bssid: str, rssi: int, iface: str = "wlan0",
+                           tx_packets: int = 0, tx_retries: int = 0, tx_failed: int = 0,
+                           beacon_loss: int = 0, inactive_ms: int = 100,
+                           tx_bitrate: float = 866.7, connected_s: int = 0) -> str:
+    """Format the AP entry of `iw dev <iface> station dump` on a client interface."""
+    return (
+        f"Station {bssid} (on {iface})\n"
+        f"\tinactive time:\t{inactive_ms} ms\n"
+        f"\trx bytes:\t{tx_packets * 1400}\n"
+        f"\trx packets:\t{tx_packets}\n"
+        f"\ttx bytes:\t{tx_packets * 200}\n"
+        f"\ttx packets:\t{tx_packets}\n"
+        f"\ttx retries:\t{tx_retries}\n"
+        f"\ttx failed:\t{tx_failed}\n"
+        f"\tbeacon loss:\t{beacon_loss}\n"
+        f"\tbeacon rx:\t{connected_s * 10}\n"
+        f"\trx drop misc:\t0\n"
+        f"\tsignal:  \t{rssi} [{rssi - 2}, {rssi - 3}] dBm\n"
+        f"\tsignal avg:\t{rssi - 1} [{rssi - 3}, {rssi - 4}] dBm\n"
+        f"\tbeacon signal avg:\t{rssi} dBm\n"
+        f"\ttx bitrate:\t{tx_bitrate:.1f} MBit/s VHT-MCS 9 80MHz short GI VHT-NSS 2\n"
+        f"\trx bitrate:\t780.0 MBit/s VHT-MCS 8 80MHz short GI VHT-NSS 2\n"
+        f"\tauthorized:\tyes\n"
+        f"\tauthenticated:\tyes\n"
+        f"\tassociated:\tyes\n"
+        f"\tWMM/WME:\tyes\n"
+        f"\tMFP:\t\tno\n"
+        f"\tconnected time:\t{connected_s} seconds\n"
+    )
+
+
+def generate_iw_scan(n_bss: int, ssid: str = "autoroam-test", seed: int = 0,
+                     other_ssid_ratio: float = 0.3) -> str:
+    """Generate `iw dev <iface> scan` output with n_bss BSS blocks."""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(n_bss):
+        name = ssid if rng.random() >= other_ssid_ratio else f"other-{i % 7}"
+        blocks.append(format_iw_bss_block(
+            bssid=synthetic_bssid(i + 1),
+            ssid=name,
+            freq=rng.choice((2412, 2437, 2462, 5180, 5220, 5500, 5745, 5955)),
+            rssi=rng.randint(-90, -35),
+            util=rng.randint(0, 255),
+            stations=rng.randint(0, 60),
+            last_seen_ms=rng.randint(100, 900),
+        ))
+    return "".join(blocks)
@@ -0,0 +1,175 @@
+"""
+timing.py
+---------
+Lightweight span/timer facility for the roam pipeline.
+
+Spans are recorded with monotonic nanosecond clocks and can be
+aggregated into the `timings` section of cycle_summary.json (and
+timings.json, written after the summary so it includes saving it) or
+exported as Chrome trace-event JSON (load in chrome://tracing or Perfetto).
+
+When timing is disabled, `span()` returns a shared no-op context manager,
+so instrumented code pays for one global lookup and a function call.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Span:
+    name: str
+    cat: str
+    start_ns: int
+    end_ns: int | None = None
+    tid: int = 0
+    args: dict = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        if self.end_ns is None:
+            return 0.0
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+_enabled = False
+_origin_ns = time.monotonic_ns()
+_spans: List[Span] = []
+_lock = threading.Lock()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("span",)
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.span = Span(name=name, cat=cat, start_ns=0, tid=threading.get_ident(), args=args)
+
+    def __enter__(self):
+        self.span.start_ns = time.monotonic_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end_ns = time.monotonic_ns()
+        if exc_type is not None:
+            self.span.args["error"] = exc_type.__name__
+        with _lock:
+            _spans.append(self.span)
+        return False
+
+    def set(self, **args):
+        """Attach extra args to the span (e.g. counts known only at the end)."""
+        self.span.args.update(args)
+
+
+def enable_timing(enabled: bool = True) -> None:
+    """Turn span recording on or off for this process."""
+    global _enabled
+    _enabled = enabled
+
+
+def timing_enabled() -> bool:
+    return _enabled
+
+
+def reset_timings() -> None:
+    """Drop all recorded spans and restart the trace origin."""
+    global _origin_ns
+    with _lock:
+        _spans.clear()
+    _origin_ns = time.monotonic_ns()
+
+
+def span(name: str, cat: str = "autoroam", **args):
+    """
+    Time a block of code:
+
+        with span("scan", "shell"):
+            ...
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _ActiveSpan(name, cat, args)
+
+
+def get_spans() -> List[Span]:
+    with _lock:
+        return list(_spans)
+
+
+def timings_summary(spans: Optional[List[Span]] = None) -> Dict:
+    """
+    Aggregate spans by name into a JSON-ready dict for cycle_summary.json.
+    Durations are in milliseconds; offsets are relative to the trace origin.
+    """
+    spans = get_spans() if spans is None else spans
+    by_name: Dict[str, Dict] = {}
+    for s in spans:
+        if s.end_ns is None:
+            continue
+        entry = by_name.setdefault(s.name, {
+            "cat": s.cat,
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "first_offset_ms": round((s.start_ns - _origin_ns) / 1e6, 3),
+        })
+        dur = s.duration_ms
+        entry["count"] += 1
+        entry["total_ms"] += dur
+        entry["max_ms"] = max(entry["max_ms"], dur)
+
+    for entry in by_name.values():
+        entry["mean_ms"] = round(entry["total_ms"] / entry["count"], 3)
+        entry["total_ms"] = round(entry["total_ms"], 3)
+        entry["max_ms"] = round(entry["max_ms"], 3)
+
+    return {"clock": "monotonic", "spans": by_name}
+
+
+def save_timings(output_path: str) -> str:
+    """Write timings_summary() of every span recorded so far as JSON."""
+    with open(output_path, "w") as f:
+        json.dump(timings_summary(), f, indent=2)
+    return output_path
+
+
+def export_chrome_trace(output_path: str, spans: Optional[List[Span]] = None) -> str:
+    """Write spans as Chrome trace-event JSON ("X" complete events, µs units)."""
+    spans = get_spans() if spans is None else spans
+    pid = os.getpid()
+    events = [
+        {
+            "name": s.name,
+            "cat": s.cat,
+            "ph": "X",
+            "ts": (s.start_ns - _origin_ns) / 1000,
+            "dur": (s.end_ns - s.start_ns) / 1000,
+            "pid": pid,
+            "tid": s.tid,
+            "args": s.args,
+        }
+        for s in spans if s.end_ns is not None
+    ]
+    with open(output_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    print(f"[+] Chrome trace saved to {output_path}")
+    return output_path
@@ -0,0 +1,218 @@
+"""
+traffic_probe.py
+----------------
+Data-plane interruption measurement during roams.
+
+`TrafficProbe` sends timestamped UDP packets at a fixed rate through the
+test interface to a UDP echo target and records every echo. For each
+roam window it reports what users actually feel: the longest gap without
+delivered packets, lost packets and jitter (RFC 3550 interarrival jitter
+over round-trip transit times).
+
+Any UDP echo service works as the target. For a local target:
+
+    python3 -m autoroam.traffic_probe --echo --port 9000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import struct
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# magic, session id, sequence number, send time (monotonic ns)
+PACKET = struct.Struct("!4sIIQ")
+MAGIC = b"ARPB"
+
+
+def parse_target(target: str, default_port: int = 9000) -> Tuple[str, int]:
+    """'host:port', '[v6]:port' or 'host' -> (host, port)."""
+    if target.startswith("["):
+        host, _, rest = target[1:].partition("]")
+        return host, int(rest.lstrip(":") or default_port)
+    if target.count(":") == 1:
+        host, port = target.split(":")
+        return host, int(port)
+    return target, default_port
+
+
+class _ProbeProtocol(asyncio.DatagramProtocol):
+    def __init__(self, probe: "TrafficProbe"):
+        self.probe = probe
+
+    def datagram_received(self, data, addr):
+        self.probe._on_echo(data, time.monotonic_ns())
+
+    def error_received(self, exc):
+        # ICMP unreachable etc. while the link is down; the packet counts as lost
+        self.probe.send_errors += 1
+
+
+class TrafficProbe:
+    """Fixed-rate UDP echo probe bound to one interface."""
+
+    def __init__(
+        self,
+        target: str,
+        rate_pps: float = 200.0,
+        iface: Optional[str] = None,
+        payload_bytes: int = 64,
+        timeout_s: float = 1.0,
+    ):
+        self.host, self.port = parse_target(target)
+        self.rate_pps = rate_pps
+        self.iface = iface
+        self.payload_bytes = max(payload_bytes, PACKET.size)
+        self.timeout_s = timeout_s          # echoes later than this count as lost
+        self.session = struct.unpack("!I", os.urandom(4))[0]
+        self.send_ns: List[int] = []        # indexed by sequence number
+        self.echo_ns: Dict[int, int] = {}   # seq -> echo receive time
+        self.send_errors = 0
+        self._transport = None
+        self._sender: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def now_ns() -> int:
+        return time.monotonic_ns()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        family, _, _, _, addr = (await loop.getaddrinfo(self.host, self.port, type=socket.SOCK_DGRAM))[0]
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        if self.iface:
+            try:
+                # Route probe traffic through the interface under test (needs root)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, self.iface.encode())
+            except (OSError, AttributeError) as e:
+                print(f"[WARN] Traffic probe could not bind to {self.iface}: {e}")
+        sock.setblocking(False)
+        sock.connect(addr)
+        self._transport, _ = await loop.create_datagram_endpoint(lambda: _ProbeProtocol(self), sock=sock)
+        self._sender = asyncio.create_task(self._send_loop(), name="traffic-probe")
+        print(f"[+] Traffic probe sending {self.rate_pps:g} pps to {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._sender:
+            self._sender.cancel()
+            try:
+                await self._sender
+            except asyncio.CancelledError:
+                pass
+            self._sender = None
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+
+    async def _send_loop(self) -> None:
+        interval_ns = int(1e9 / self.rate_pps)
+        padding = b"\0" * (self.payload_bytes - PACKET.size)
+        next_ns = self.now_ns()
+        while True:
+            seq = len(self.send_ns)
+            sent_at = self.now_ns()
+            self.send_ns.append(sent_at)
+            try:
+                self._transport.sendto(PACKET.pack(MAGIC, self.session, seq, sent_at) + padding)
+            except OSError:
+                self.send_errors += 1
+            # Fixed schedule so a slow iteration doesn't lower the rate
+            next_ns += interval_ns
+            delay = next_ns - self.now_ns()
+            if delay < 0:
+                next_ns = self.now_ns()
+            await asyncio.sleep(max(delay, 0) / 1e9)
+
+    def _on_echo(self, data: bytes, recv_ns: int) -> None:
+        if len(data) < PACKET.size:
+            return
+        magic, session, seq, sent_at = PACKET.unpack_from(data)
+        if magic != MAGIC or session != self.session or seq >= len(self.send_ns):
+            return
+        if recv_ns - sent_at <= self.timeout_s * 1e9:
+            self.echo_ns.setdefault(seq, recv_ns)
+
+    def window_stats(self, start_ns: int, end_ns: int) -> Dict:
+        """
+        Probe results for packets sent in [start_ns, end_ns]. Call at least
+        timeout_s after end_ns so late echoes are not counted as lost.
+        """
+        lo = bisect_left(self.send_ns, start_ns)
+        hi = bisect_right(self.send_ns, end_ns)
+        sent = hi - lo
+        delivered = [seq for seq in range(lo, hi) if seq in self.echo_ns]
+
+        # Longest stretch without a delivered packet, by send time
+        anchors = [start_ns] + [self.send_ns[seq] for seq in delivered] + [end_ns]
+        longest_gap_ns = max(b - a for a, b in zip(anchors, anchors[1:]))
+
+        jitter = 0.0
+        rtts = []
+        prev_transit = None
+        for seq in delivered:
+            transit = self.echo_ns[seq] - self.send_ns[seq]
+            rtts.append(transit)
+            if prev_transit is not None:
+                jitter += (abs(transit - prev_transit) - jitter) / 16
+            prev_transit = transit
+
+        lost = sent - len(delivered)
+        return {
+            "sent": sent,
+            "received": len(delivered),
+            "lost": lost,
+            "loss_pct": round(100 * lost / sent, 2) if sent else None,
+            "longest_gap_ms": round(longest_gap_ns / 1e6, 2),
+            "jitter_ms": round(jitter / 1e6, 3),
+            "rtt_avg_ms": round(sum(rtts) / len(rtts) / 1e6, 3) if rtts else None,
+            "rtt_max_ms": round(max(rtts) / 1e6, 3) if rtts else None,
+            "window_ms": round((end_ns - start_ns) / 1e6, 2),
+        }
+
+    def config(self) -> Dict:
+        return {
+            "target": f"{self.host}:{self.port}",
+            "rate_pps": self.rate_pps,
+            "payload_bytes": self.payload_bytes,
+            "iface": self.iface,
+            "timeout_s": self.timeout_s,
+        }
+
+
+# --- UDP echo server (local probe target) ---
+
+class _EchoProtocol(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(data, addr)
+
+
+async def run_echo_server(host: str = "0.0.0.0", port: int = 9000) -> None:
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(_EchoProtocol, local_addr=(host, port))
+    print(f"[+] UDP echo server listening on {host}:{port}")
+    try:
+        await asyncio.Future()
+    finally:
+        transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic probe UDP echo target")
+    parser.add_argument("--echo", action="store_true", help="Run a UDP echo server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    if not args.echo:
+        parser.error("nothing to do (use --echo)")
+    try:
+        asyncio.run(run_echo_server(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
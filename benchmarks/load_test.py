@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Dashboard load test for the web server.
+
+Simulates N dashboards, each polling the endpoints the UI polls during a
+run (/api/run_status, /api/logs, /api/latest_cycle_summary) once per
+interval, and reports p50/p95/p99 latency per endpoint.
+
+    sudo venv/bin/python start_autoroam_ui.py --prod -w 4 -t 16 &
+    python3 benchmarks/load_test.py --url https://localhost:8443 --dashboards 50 --duration 30
+"""
+import argparse
+import os
+import ssl
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_KEY_FILE = os.path.join(REPO_ROOT, "webui", "server", "api_key.txt")
+ENDPOINTS = ("/api/run_status", "/api/logs", "/api/latest_cycle_summary")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def dashboard(base_url, api_key, interval, deadline, ctx, latencies, errors, lock):
+    while time.monotonic() < deadline:
+        cycle_start = time.monotonic()
+        for ep in ENDPOINTS:
+            req = urllib.request.Request(base_url + ep, headers={"X-API-Key": api_key})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30, context=ctx) as resp:
+                    resp.read()
+                ok = True
+            except urllib.error.HTTPError as e:
+                ok = e.code == 404  # no summary yet is a valid answer
+            except Exception:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies[ep].append(elapsed)
+                if not ok:
+                    errors[ep] += 1
+        time.sleep(max(0.0, interval - (time.monotonic() - cycle_start)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the autoroam web server with concurrent dashboards")
+    parser.add_argument("--url", default="https://localhost:8443", help="Server base URL")
+    parser.add_argument("--api-key", help=f"API key (default: read {DEFAULT_KEY_FILE})")
+    parser.add_argument("--dashboards", type=int, default=50, help="Concurrent dashboards")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between each dashboard's polls")
+    parser.add_argument("--duration", type=float, default=30.0, help="Test duration in seconds")
+    args = parser.parse_args()
+
+    api_key = args.api_key
+    if not api_key:
+        with open(DEFAULT_KEY_FILE) as f:
+            api_key = f.read().strip()
+
+    # Self-signed certs are the default for this server
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=dashboard, daemon=True,
+                         args=(args.url.rstrip("/"), api_key, args.interval, deadline, ctx, latencies, errors, lock))
+        for _ in range(args.dashboards)
+    ]
+    print(f"[+] {args.dashboards} dashboards polling {args.url} every {args.interval}s for {args.duration}s")
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - started
+
+    all_lat = [v for vals in latencies.values() for v in vals]
+    print(f"\n{'endpoint':28s} {'requests':>9s} {'errors':>7s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for ep in ENDPOINTS:
+        vals = latencies[ep]
+        print(f"{ep:28s} {len(vals):9d} {errors[ep]:7d} {percentile(vals, 50):9.1f} "
+              f"{percentile(vals, 95):9.1f} {percentile(vals, 99):9.1f}")
+    print(f"{'all':28s} {len(all_lat):9d} {sum(errors.values()):7d} {percentile(all_lat, 50):9.1f} "
+          f"{percentile(all_lat, 95):9.1f} {percentile(all_lat, 99):9.1f}")
+    print(f"\n[+] {len(all_lat) / wall:.1f} req/s, p95 API latency {percentile(all_lat, 95):.1f} ms")
+    return 1 if sum(errors.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Analyzer benchmark suite.
+
+Times the log analysis hot paths (split_into_roams, find_raw_logs,
+derive_metrics, analyze_from_derived) over synthetic wpa_supplicant logs
+covering FT, PMKSA, full EAP, SAE and failure roams, the iw scan parser
+(whole output and streamed line by line) over synthetic scans of 10/100/1000 BSSes, and optionally the full
+pipeline over recorded roam_debug.log files.
+
+Results are compared to benchmarks/baseline.json; any case slower than
+baseline * (1 + tolerance) is reported and the script exits non-zero.
+
+    python3 benchmarks/run_benchmarks.py                  # compare to baseline
+    python3 benchmarks/run_benchmarks.py --save-baseline  # record a new baseline
+    python3 benchmarks/run_benchmarks.py --corpus data/runs
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Make the repo root importable when run as a script
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from autoroam.log_collector import CollectedLogs
+from autoroam.log_analyzer import split_into_roams, find_raw_logs, derive_metrics, analyze_all_roams
+from autoroam.phase_breakout import analyze_from_derived
+from autoroam.iw_scan_parser import iter_iw_scan, parse_iw_scan_output
+from autoroam.replay import find_debug_logs
+from autoroam.synthetic import generate_log, generate_iw_scan
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+MIN_SAMPLE_S = 0.05
+
+
+def best_of(fn, repeat: int) -> float:
+    """
+    Best per-call wall time of fn() in milliseconds (stdout silenced).
+    Fast cases are looped so each sample lasts at least MIN_SAMPLE_S,
+    which keeps small inputs from being dominated by timer noise.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE_S:
+                break
+            number *= 2
+
+        best = elapsed / number
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+
+def build_cases(roam_counts, bss_counts, corpus):
+    """Return {case_name: (callable, units, unit_label)}."""
+    cases = {}
+
+    for n in roam_counts:
+        lines = generate_log(n, seed=n)
+        chunks = split_into_roams(lines)
+        raws = [find_raw_logs(c) for c in chunks]
+        pairs = [(derive_metrics(r), r) for r in raws]
+
+        cases[f"split_into_roams[{n} roams]"] = (lambda l=lines: split_into_roams(l), len(lines), "lines")
+        cases[f"find_raw_logs[{n} roams]"] = (lambda cs=chunks: [find_raw_logs(c) for c in cs], len(lines), "lines")
+        cases[f"derive_metrics[{n} roams]"] = (lambda rs=raws: [derive_metrics(r) for r in rs], len(raws), "roams")
+        cases[f"analyze_from_derived[{n} roams]"] = (lambda ps=pairs: [analyze_from_derived(d, r) for d, r in ps], len(pairs), "roams")
+
+    for n in bss_counts:
+        scan = generate_iw_scan(n, seed=n)
+        cases[f"parse_iw_scan_output[{n} BSS]"] = (
+            lambda s=scan: parse_iw_scan_output(s, ssid_filter="autoroam-test", mrssi=-75), n, "BSS")
+        # Line by line, as read from the iw pipe
+        cases[f"iter_iw_scan[{n} BSS]"] = (
+            lambda ls=scan.splitlines(True): list(iter_iw_scan(ls, ssid_filter="autoroam-test", mrssi=-75)), n, "BSS")
+
+    for path in find_debug_logs(corpus) if corpus else []:
+        with open(path, errors="replace") as f:
+            lines = f.readlines()
+        name = os.path.basename(os.path.dirname(path))
+        cases[f"recorded_pipeline[{name}]"] = (
+            lambda l=lines: analyze_all_roams(CollectedLogs(raw_logs=l)), len(lines), "lines")
+
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the autoroam analyzer hot paths")
+    parser.add_argument("--roams", type=int, nargs="+", default=[100, 1000], help="Synthetic roam counts")
+    parser.add_argument("--bss", type=int, nargs="+", default=[10, 100, 1000], help="Synthetic scan sizes")
+    parser.add_argument("--corpus", nargs="*", help="Recorded roam_debug.log files or run directories")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the best time is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    cases = build_cases(args.roams, args.bss, args.corpus)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("cases", {})
+
+    results = {}
+    regressions = []
+    print(f"{'case':45s} {'best ms':>10s} {'throughput':>18s} {'baseline':>10s} {'delta':>8s}")
+    for name, (fn, units, label) in cases.items():
+        ms = best_of(fn, args.repeat)
+        results[name] = round(ms, 3)
+        rate = f"{units / (ms / 1000):,.0f} {label}/s" if ms > 0 else "n/a"
+        base = baseline.get(name)
+        if base:
+            delta = (ms - base) / base
+            flag = " !" if delta > args.tolerance else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:45s} {ms:10.3f} {rate:>18s} {base:10.3f} {delta:+7.1%}{flag}")
+        else:
+            print(f"{name:45s} {ms:10.3f} {rate:>18s} {'—':>10s} {'':>8s}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "cases": results}, f, indent=2)
+        print(f"\n[+] Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n[!] {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\n[+] No regressions" if baseline else "\n[INFO] No baseline found; run with --save-baseline to record one")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+from autoroam.cycle_options import CycleOptions, add_arguments
 from autoroam.roam_runner import run_roam_cycle
 
 import os, sys
@@ -11,12 +12,42 @@ if repo_root not in sys.path:
 def main():
     # CLI Arguments
     parser = argparse.ArgumentParser(description="Wi-Fi Roam Test Tool")
-    parser.add_argument("-i", "--iface", default="wlan0", help="Wi-Fi interface to use")
-    parser.add_argument("-r", "--rssi", type=int, default=-75, help="Minimum RSSI filter")
+    add_arguments(parser)
+    # Offline replay mode
+    parser.add_argument("--replay", nargs="+", metavar="PATH",
+                        help="Analyze recorded roam_debug.log files or run directories offline instead of roaming")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Worker processes for --replay (per log, or per roam chunk for a single log)")
+    parser.add_argument("--out", metavar="DIR", help="Write replayed summaries and failed-roam logs under DIR")
+    # Crash recovery
+    parser.add_argument("--recover", nargs="+", metavar="PATH",
+                        help="Rebuild cycle_summary.json from roams.jsonl in run directories (e.g. after Ctrl-C or a crash)")
+    parser.add_argument("--force", action="store_true", help="With --recover, also rebuild runs that already have a summary")
+    # Simulated backend (see --simulate)
+    parser.add_argument("--sim-time-scale", type=float, help="Override the simulator time scale (0 = no real sleeping)")
 
     args = parser.parse_args()
+    if args.host_sampler is not None and args.host_sampler <= 0:
+        parser.error("--host-sampler rate must be positive")
 
-    run_roam_cycle(iface=args.iface, min_rssi=args.rssi)
+    if args.simulate is not None:
+        from autoroam.backend import set_backend
+        from autoroam.simulator import SimulatedBackend, SimulatorConfig
+        config = SimulatorConfig.load(args.simulate) if args.simulate else SimulatorConfig()
+        if args.sim_time_scale is not None:
+            config.time_scale = args.sim_time_scale
+        set_backend(SimulatedBackend(config, iface=args.iface))
+
+    if args.recover:
+        from autoroam.roam_log import recover
+        recover(args.recover, force=args.force)
+        return
+
+    if args.replay:
+        from autoroam.replay import replay
+        replay(args.replay, jobs=args.jobs, out_dir=args.out)
+        return
+
+    run_roam_cycle(CycleOptions.from_args(args))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import argparse
+from autoroam.fleet import load_agents, run_fleet, merge_fleet, save_fleet_view, print_fleet_view
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run roam cycles on a fleet of autoroam agents and merge the results")
+    parser.add_argument("agents", help="JSON file listing agents (name, url, api_key, optional iface/rssi/simulate/matrix)")
+    parser.add_argument("--cycles", type=int, default=1, help="Cycles to run on every agent. Default: 1")
+    parser.add_argument("--collect-only", action="store_true", help="Don't start cycles, only collect new results")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Seconds to wait for each agent's cycle. Default: 900")
+    parser.add_argument("-j", "--jobs", type=int, help="Agents driven in parallel. Default: all (max 32)")
+    parser.add_argument("--out", metavar="DIR", help="Directory for the fleet view JSON. Default: data/fleet")
+    args = parser.parse_args()
+
+    agents = load_agents(args.agents)
+    print(f"[+] {len(agents)} agent(s) loaded from {args.agents}")
+
+    outcomes_by_agent = {}
+    rounds = 1 if args.collect_only else args.cycles
+    for i in range(rounds):
+        if not args.collect_only:
+            print(f"\n=== Fleet cycle {i + 1}/{rounds} ===")
+        for o in run_fleet(agents, run=not args.collect_only, timeout=args.timeout, jobs=args.jobs):
+            merged = outcomes_by_agent.setdefault(o.agent, o)
+            if merged is not o:
+                merged.results += o.results
+                merged.status, merged.error = o.status, o.error or merged.error
+
+    view = merge_fleet(list(outcomes_by_agent.values()))
+    print_fleet_view(view)
+    save_fleet_view(view, args.out)
+
+
+if __name__ == "__main__":
+    main()
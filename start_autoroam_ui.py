@@ -9,14 +9,20 @@ repo_root = get_repo_root()
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-from webui.server.app import run_server
+from webui.server.app import run_server, run_server_production
 
 def main():
     parser = argparse.ArgumentParser(description="Start the AutoRoam Web UI")
     parser.add_argument("--port", "-p", type=int, default=8443, help="HTTP port (default: 8443)")
+    parser.add_argument("--prod", action="store_true", help="Serve with gunicorn instead of the Flask dev server")
+    parser.add_argument("--workers", "-w", type=int, default=2, help="Worker processes in --prod mode (default: 2)")
+    parser.add_argument("--threads", "-t", type=int, default=8, help="Threads per worker in --prod mode (default: 8)")
     args = parser.parse_args()
 
-    run_server(port=args.port)
+    if args.prod:
+        run_server_production(port=args.port, workers=args.workers, threads=args.threads)
+    else:
+        run_server(port=args.port)
 
 if __name__ == "__main__":
     main()
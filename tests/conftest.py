@@ -0,0 +1,13 @@
+"""
+Shared test setup: a throwaway data directory (runs, run state, baselines)
+and the web server importable as `app`, set before anything reads them.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "webui", "server")]
+os.environ["AUTOROAM_DATA_DIR"] = tempfile.mkdtemp(prefix="autoroam-test-")
+os.environ.setdefault("WEB_USER", "test")
+os.environ.setdefault("WEB_PASS", "test")
@@ -0,0 +1,57 @@
+"""
+test_compare.py
+---------------
+Mann-Whitney p-values against reference values (scipy.stats.mannwhitneyu
+with method="exact") and a brute-force permutation count for ties.
+
+    python3 -m pytest tests
+"""
+import itertools
+import math
+import pytest
+from autoroam.compare import mann_whitney
+
+
+def _permutation_p(a, b):
+    """Two-sided p by enumerating every split of the pooled values."""
+    pooled = sorted(a + b)
+    ranks = {}
+    for v in set(pooled):
+        idx = [i + 1 for i, x in enumerate(pooled) if x == v]
+        ranks[v] = sum(idx) / len(idx)
+    rank_list = [ranks[v] for v in pooled]
+    mean = len(a) * (len(pooled) + 1) / 2
+    observed = abs(sum(ranks[v] for v in a) - mean)
+    splits = list(itertools.combinations(range(len(pooled)), len(a)))
+    extreme = sum(1 for c in splits if abs(sum(rank_list[i] for i in c) - mean) >= observed - 1e-9)
+    return extreme / len(splits)
+
+
+@pytest.mark.parametrize("a, b, p", [
+    ([1, 2, 3], [4, 5, 6], 0.1),                  # most extreme split of 3 vs 3: 2 / 20
+    ([1, 2, 3, 4], [5, 6, 7, 8, 9], 0.015873),    # 2 / 126
+    ([1, 3, 5, 7, 9], [2, 4, 6, 8, 10], 0.690476),
+])
+def test_exact_small_samples(a, b, p):
+    result = mann_whitney(a, b)
+    assert result["exact"]
+    assert result["p_value"] == pytest.approx(p, abs=1e-6)
+
+
+def test_exact_with_ties():
+    a, b = [10.0, 12.0, 12.0, 15.0], [12.0, 15.0, 18.0, 18.0, 20.0]
+    result = mann_whitney(a, b)
+    assert result["exact"]
+    assert result["p_value"] == pytest.approx(_permutation_p(a, b), abs=1e-6)
+    assert result["effect"] > 0
+
+
+def test_large_samples_use_normal_approximation():
+    a = [float(i) for i in range(30)]
+    result = mann_whitney(a, [v + 10 for v in a])
+    assert not result["exact"]
+    # 20 values tied in pairs: z = (|U - n1 n2 / 2| - 0.5) / sqrt(n1 n2 / 12 (n + 1 - 20 * 6 / (n (n - 1))))
+    assert result["u"] == 200
+    z = (450 - 200 - 0.5) / math.sqrt(900 / 12 * (61 - 120 / (60 * 59)))
+    assert result["p_value"] == pytest.approx(math.erfc(z / math.sqrt(2)), abs=1e-6)
+    assert mann_whitney([1, 2], [3, 4, 5]) is None
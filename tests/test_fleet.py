@@ -0,0 +1,100 @@
+"""
+test_fleet.py
+-------------
+The fleet coordinator against two simulated agents (web servers on
+127.0.0.1, each with its own data directory).
+
+    python3 -m pytest tests
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import pytest
+from autoroam import fleet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Plain HTTP Flask server on one loopback port
+LAUNCH = ("import sys; sys.path[:0] = [{root!r}, {server!r}]; import app; "
+          "app.app.run(host='127.0.0.1', port={port}, threaded=True)")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return
+        except urllib.error.HTTPError:
+            return   # up, just unauthorized
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+@pytest.fixture
+def agents(tmp_path):
+    procs, agents = [], []
+    for name in ("agentA", "agentB"):
+        port = free_port()
+        env = dict(os.environ, AUTOROAM_DATA_DIR=str(tmp_path / name), AUTOROAM_AGENT_NAME=name)
+        code = LAUNCH.format(root=ROOT, server=os.path.join(ROOT, "webui", "server"), port=port)
+        procs.append(subprocess.Popen([sys.executable, "-c", code], env=env, cwd=ROOT,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        url = f"http://127.0.0.1:{port}"
+        wait_for(url + "/api/agent/info")
+        agents.append((name, url))
+    with open(os.path.join(ROOT, "webui", "server", "api_key.txt")) as f:
+        key = f.read().strip()
+    yield [fleet.Agent(name=name, url=url, api_key=key, simulate=True) for name, url in agents]
+    for p in procs:
+        p.terminate()
+        p.wait()
+
+
+def cursors(agents):
+    saved = fleet.load_cursors()
+    return [saved.get(fleet._cursor_key(a)) for a in agents]
+
+
+def test_fleet_cycle_and_cursors(agents):
+    assert [fleet.AgentClient(a).info()["agent"] for a in agents] == ["agentA", "agentB"]
+    outcomes = fleet.run_fleet(agents, run=True, timeout=60)
+    assert [o.agent for o in outcomes] == ["agentA", "agentB"]
+    for o in outcomes:
+        assert o.error is None and o.started and o.status == "done"
+        assert [r["seq"] for r in o.results] == [1]
+        assert o.results[0]["run"] and o.results[0]["summary"]["roams"]
+    assert cursors(agents) == [1, 1]
+
+    # Nothing new: nothing fetched twice, cursors stay put
+    outcomes = fleet.run_fleet(agents, run=False)
+    assert all(o.results == [] and o.error is None for o in outcomes)
+    assert cursors(agents) == [1, 1]
+
+    # Another cycle on one agent only advances that agent's cursor
+    outcomes = fleet.run_fleet(agents[:1], run=True, timeout=60)
+    assert [r["seq"] for r in outcomes[0].results] == [2]
+    assert cursors(agents) == [2, 1]
+
+    view = fleet.merge_fleet(outcomes)
+    assert view["agents"]["agentA"]["cycles"] == 1
+    assert view["fleet"]["roams"] == len(outcomes[0].results[0]["summary"]["roams"])
+
+
+def test_unreachable_agent_keeps_cursor(agents):
+    down = fleet.Agent(name="down", url=f"http://127.0.0.1:{free_port()}", api_key="x")
+    outcomes = fleet.run_fleet([agents[0], down], run=False)
+    assert outcomes[0].error is None
+    assert outcomes[1].error and outcomes[1].results == []
+    assert fleet.load_cursors()[fleet._cursor_key(down)] == 0
@@ -0,0 +1,53 @@
+"""
+test_log_collector.py
+---------------------
+Failed-roam snippets are cut from the raw log, so they keep the lines the
+ingestion filter dropped from the buffer.
+
+    python3 -m pytest tests
+"""
+import os
+from autoroam.log_analyzer import analyze_all_roams, is_relevant_line
+from autoroam.log_collector import CollectedLogs
+
+PREFIX = "Oct 18 22:20:38.{:06d} autoroam wpa_supplicant[812]: "
+LOG = [
+    "CTRL_IFACE ROAM 02:00:00:00:00:04",
+    "WMM AC: Missing IEs",
+    "wlan0: Trying to authenticate with 02:00:00:00:00:04 (SSID='autoroam-sim' freq=2437 MHz)",
+    "l2_packet_receive: src=00:11:22:33:44:55 len=121",
+    "wlan0: WNM: Deauth or disassoc timer is not running",
+    "CTRL_IFACE ROAM 02:00:00:00:00:01",
+    "WMM AC: Missing IEs",
+]
+LINES = [PREFIX.format(i * 10) + text + "\n" for i, text in enumerate(LOG)]
+
+
+def collect(tmp_path):
+    collected = CollectedLogs(line_filter=is_relevant_line,
+                              raw_sink=open(tmp_path / "roam_debug.log", "w+", encoding="utf-8"))
+    for line in LINES:
+        if collected.accept(line):
+            collected.buffer(line)
+    return collected
+
+
+def test_raw_chunk_keeps_filtered_lines(tmp_path):
+    collected = collect(tmp_path)
+    assert collected.filtered_lines > 0
+    assert len(collected.raw_logs) == len(LINES) - collected.filtered_lines
+    assert "".join(collected.raw_chunk(0, len(collected.raw_logs))) == "".join(LINES)
+    sub = collected.sub(1, len(collected.raw_logs))
+    assert sub.raw_logs == collected.raw_logs[1:]
+    assert "".join(sub.raw_chunk(0, len(sub.raw_logs))) == "".join(LINES[LINES.index(sub.raw_logs[0]):])
+
+
+def test_failed_roam_snippet_has_filtered_lines(tmp_path):
+    collected = collect(tmp_path)
+    results = analyze_all_roams(collected, run_dir=str(tmp_path))
+    assert len(results) == 2
+    with open(os.path.join(tmp_path, "failed_roams", results[0][0].failure_log)) as f:
+        snippet = f.read()
+    # Every raw line up to the next roam command, filtered or not
+    assert snippet == "".join(LINES[:5])
+    assert LINES[1] in snippet and LINES[1] not in collected.raw_logs
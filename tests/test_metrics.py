@@ -0,0 +1,80 @@
+"""
+test_metrics.py
+---------------
+Scrape /metrics from the web server on 127.0.0.1 after a simulated cycle.
+
+    python3 -m pytest tests
+"""
+import os
+import re
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from werkzeug.serving import make_server
+from autoroam.backend import get_backend, set_backend
+from autoroam.results import load_json_file
+from autoroam.cycle_options import CycleOptions
+from autoroam.roam_runner import run_roam_cycle
+from autoroam.simulator import SimulatedBackend, SimulatorConfig
+
+
+@pytest.fixture
+def simulated():
+    previous = get_backend()
+    set_backend(SimulatedBackend(SimulatorConfig(time_scale=0, seed=1, failure_rate=0.3)))
+    yield
+    set_backend(previous)
+
+
+@pytest.fixture
+def server():
+    import app
+    srv = make_server("127.0.0.1", 0, app.app, threaded=True)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield app, f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+
+
+def scrape(url, key):
+    req = urllib.request.Request(url + "/metrics", headers={"X-API-Key": key} if key else {})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return resp.read().decode()
+
+
+def value(text, series):
+    m = re.search(r"^" + re.escape(series) + r" (\S+)$", text, re.M)
+    assert m, f"{series} not in scrape"
+    return float(m.group(1))
+
+
+def test_scrape_after_cycle(simulated, server):
+    app, url = server
+    run_roam_cycle(CycleOptions(timings=False, baseline=False, record_scans=False))
+    run_dir = app.get_latest_run_dir()
+    summary_path = os.path.join(run_dir, "cycle_summary.json")
+    summary = load_json_file(summary_path)
+    app.RUN_STATE.mark_finished(0, run_dir, summary_path)
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        scrape(url, None)
+    assert e.value.code == 401
+
+    text = scrape(url, app.API_KEY)
+    roams = summary["roams"]
+    assert roams
+    totals = re.findall(r'^autoroam_roams_total\{bssid="[0-9a-f:]+",status="\w+"\} (\S+)$', text, re.M)
+    assert sum(float(v) for v in totals) == len(roams)
+    assert value(text, "autoroam_cycles_total") == 1
+    assert value(text, "autoroam_cycle_duration_seconds_count") == 1
+
+    collector = summary["collector"]
+    assert collector["queue_depth_max"] > 0
+    assert collector["dropped_lines"] >= collector["filtered_lines"] > 0
+    assert value(text, "autoroam_collector_queue_depth") == collector["queue_depth_max"]
+    assert value(text, "autoroam_collector_dropped_lines_total") == collector["dropped_lines"]
+    assert value(text, "autoroam_collector_filtered_lines_total") == collector["filtered_lines"]
+
+    # A second scrape doesn't fold the cycle in again
+    assert value(scrape(url, app.API_KEY), "autoroam_cycles_total") == 1
@@ -0,0 +1,65 @@
+"""
+test_nl80211_monitor.py
+-----------------------
+Kernel events are assigned to the roam they belong to, even when roams
+run back to back or one never completes.
+
+    python3 -m pytest tests
+"""
+from datetime import datetime, timedelta
+from autoroam.log_analyzer import LogAnalysisDerived
+from autoroam.nl80211_monitor import attach_timelines, parse_iw_events
+
+T0 = datetime(2026, 10, 18, 22, 0, 0)
+AP1, AP2, STA = "02:00:00:00:00:01", "02:00:00:00:00:02", "02:00:00:aa:bb:cc"
+
+
+def at(ms):
+    return T0 + timedelta(milliseconds=ms)
+
+
+def iw(ms, msg):
+    return f"{at(ms).timestamp():.6f}: wlan0 (phy #0): {msg}"
+
+
+def events():
+    return parse_iw_events([
+        # roam 1 to AP1: times out, no connect
+        iw(5, f"auth {AP1} -> {STA} status: 0: Successful"),
+        iw(9, f"assoc {AP1} -> {STA} timed out"),
+        iw(60, "disconnected (by AP) reason: 3: Deauthenticated because sending station is leaving"),
+        # roam 2 to AP2, 100 ms after roam 1, well inside the old grace window
+        iw(104, f"auth {AP2} -> {STA} status: 0: Successful"),
+        iw(110, f"assoc {AP2} -> {STA} status: 0: Successful"),
+        iw(110, f"connected to {AP2}"),
+        # a stray event about the first AP during roam 2
+        iw(115, f"deauth {AP1} -> {STA} reason: 2"),
+    ])
+
+
+def test_adjacent_roams_keep_their_own_events():
+    failed = LogAnalysisDerived(roam_target_bssid=AP1, roam_start_time=at(0),
+                                auth_start_time=at(2), assoc_start_time=at(6))
+    ok = LogAnalysisDerived(roam_target_bssid=AP2, roam_start_time=at(100), roam_end_time=at(130),
+                            auth_start_time=at(101), auth_complete_time=at(105),
+                            assoc_start_time=at(106), assoc_complete_time=at(111))
+    summary = {"roams": [{}, {}]}
+    attach_timelines(summary, [failed, ok], events())
+    first, second = (r["timeline"] for r in summary["roams"])
+
+    kernel = [e for e in first["events"] if e["source"] == "nl80211"]
+    assert [e["event"] for e in kernel] == ["auth", "assoc", "disconnected"]
+    assert all(e.get("bssid") in (None, AP1) for e in kernel)
+
+    kernel = [e for e in second["events"] if e["source"] == "nl80211"]
+    assert [e["event"] for e in kernel] == ["auth", "assoc", "connected"]
+    assert all(e["bssid"] == AP2 for e in kernel)
+    assert second["driver"]["auth_ms"] == 3.0
+    assert second["driver"]["assoc_ms"] == 4.0
+
+
+def test_last_roam_window_is_not_clamped():
+    ok = LogAnalysisDerived(roam_target_bssid=AP2, roam_start_time=at(100), roam_end_time=at(130))
+    summary = {"roams": [{}]}
+    attach_timelines(summary, [ok], events())
+    assert summary["roams"][0]["timeline"]["nl80211_events"] == 3
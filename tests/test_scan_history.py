@@ -0,0 +1,52 @@
+"""
+test_scan_history.py
+--------------------
+Spearman p-values against reference values (Student's t tables, the
+closed forms for 1 and 2 degrees of freedom, scipy.stats.spearmanr).
+
+    python3 -m pytest tests
+"""
+import math
+import pytest
+from autoroam.scan_history import spearman, t_two_sided_p
+
+
+@pytest.mark.parametrize("t, df, p", [
+    (2.776445, 4, 0.05),     # t table critical values
+    (4.604095, 4, 0.01),
+    (2.228139, 10, 0.05),
+    (2.042272, 30, 0.05),
+    (12.706205, 1, 0.05),
+    (0.0, 5, 1.0),
+])
+def test_t_table(t, df, p):
+    assert t_two_sided_p(t, df) == pytest.approx(p, abs=1e-6)
+
+
+@pytest.mark.parametrize("t", [0.5, 3.0, 30.0])
+def test_t_closed_forms(t):
+    assert t_two_sided_p(t, 1) == pytest.approx(1 - 2 / math.pi * math.atan(t), rel=1e-9)
+    assert t_two_sided_p(t, 2) == pytest.approx(1 - t / math.sqrt(2 + t * t), rel=1e-9)
+
+
+def test_spearman_small_sample():
+    # scipy.stats.spearmanr: rho 0.885714, p 0.018845
+    result = spearman([1, 2, 3, 4, 5, 6], [2, 1, 3, 4, 6, 5])
+    assert result["rho"] == pytest.approx(0.8857, abs=1e-4)
+    assert result["p_value"] == pytest.approx(0.018845, abs=2e-6)
+    assert result["n"] == 6
+
+
+def test_spearman_ties_and_negative():
+    # Tied values share ranks 2.5, 3.5: Pearson on the ranks is -11/17
+    result = spearman([1, 2, 2, 3, 4, 5], [6, 5, 5, 7, 2, 1])
+    assert result["rho"] == pytest.approx(-11 / 17, abs=1e-4)
+    t = -11 / 17 * math.sqrt(4 / (1 - (11 / 17) ** 2))
+    assert result["p_value"] == pytest.approx(t_two_sided_p(t, 4), abs=1e-6)
+    assert 0.16 < result["p_value"] < 0.17
+
+
+def test_spearman_degenerate():
+    assert spearman([1, 2, 3, 4], [1, 2, 3, 4]) is None           # below MIN_PAIRS
+    assert spearman([1, 2, 3, 4, 5], [3, 3, 3, 3, 3]) is None     # constant side
+    assert spearman([1, 2, 3, 4, 5], [5, 4, 3, 2, 1])["p_value"] == 0.0
@@ -0,0 +1,84 @@
+"""
+test_traffic_probe.py
+---------------------
+TrafficProbe against a UDP echo server on 127.0.0.1 that can stop
+answering (a forced gap) or delay every other echo (known jitter).
+
+    python3 -m pytest tests
+"""
+import asyncio
+from autoroam.traffic_probe import TrafficProbe
+
+RATE = 200.0   # packets/s, 5 ms apart
+
+
+class _Echo(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.dropping = False
+        self.alternate_delay_s = 0.0
+        self.count = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if self.dropping:
+            return
+        self.count += 1
+        if self.alternate_delay_s and self.count % 2:
+            asyncio.get_running_loop().call_later(self.alternate_delay_s, self.transport.sendto, data, addr)
+        else:
+            self.transport.sendto(data, addr)
+
+
+async def _run(gap_s=0.0, alternate_delay_s=0.0):
+    loop = asyncio.get_running_loop()
+    echo = _Echo()
+    echo.alternate_delay_s = alternate_delay_s
+    transport, _ = await loop.create_datagram_endpoint(lambda: echo, local_addr=("127.0.0.1", 0))
+    port = transport.get_extra_info("sockname")[1]
+    probe = TrafficProbe(f"127.0.0.1:{port}", rate_pps=RATE, timeout_s=0.5)
+    await probe.start()
+    try:
+        await asyncio.sleep(0.1)
+        start = probe.now_ns()
+        await asyncio.sleep(0.3)
+        if gap_s:
+            echo.dropping = True
+            await asyncio.sleep(gap_s)
+            echo.dropping = False
+        await asyncio.sleep(0.3)
+        end = probe.now_ns()
+        # Let the last echoes in before reading the window
+        await asyncio.sleep(0.2)
+        return probe.window_stats(start, end)
+    finally:
+        await probe.stop()
+        transport.close()
+
+
+def test_clean_window():
+    stats = asyncio.run(_run())
+    assert stats["sent"] >= 0.6 * RATE * 0.8
+    assert stats["lost"] == 0 and stats["loss_pct"] == 0
+    assert stats["received"] == stats["sent"]
+    assert stats["longest_gap_ms"] < 50
+    assert stats["jitter_ms"] < 2
+    assert stats["rtt_avg_ms"] is not None and stats["rtt_max_ms"] >= stats["rtt_avg_ms"]
+
+
+def test_forced_gap():
+    stats = asyncio.run(_run(gap_s=0.2))
+    assert stats["received"] + stats["lost"] == stats["sent"]
+    # 200 ms of silence at 200 pps: about 40 packets
+    assert 25 <= stats["lost"] <= 60
+    assert stats["loss_pct"] == round(100 * stats["lost"] / stats["sent"], 2)
+    assert 190 <= stats["longest_gap_ms"] <= 300
+    assert 750 <= stats["window_ms"] <= 1100
+
+
+def test_jitter_from_alternating_delay():
+    # Transit times alternate by 4 ms, so the RFC 3550 estimate converges to about 4 ms
+    stats = asyncio.run(_run(alternate_delay_s=0.004))
+    assert stats["lost"] == 0
+    assert 2.5 <= stats["jitter_ms"] <= 6
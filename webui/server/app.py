@@ -1,21 +1,32 @@
 # server/app.py
 from flask import(Flask, jsonify,send_from_directory, request,
-                  Response, send_file, redirect, url_for, render_template, session)
-import subprocess, os, json, time, threading, secrets
+                  Response, send_file, redirect, url_for, render_template, session,
+                  stream_with_context)
+import subprocess, os, json, time, threading, secrets, gzip, socket
 from functools import wraps
 from datetime import timedelta
 from autoroam.common import get_repo_root, get_log_file_path, get_data_dir, get_failed_roams_dir, get_runs_dir
+from autoroam import metrics, log_index, run_catalog, compare, baselines, scan_history
+from autoroam.results import dumps, load_json_file
+from autoroam.cycle_options import CycleOptions
+from autoroam.roam_log import ROAMS_FILE, follow_roam_log, read_new_records
+from autoroam.line_index import build_line_index, read_lines
+from autoroam.cycle_summary import lite_summary, find_roam
+from webui.server.run_state import RunStateStore
 from dotenv import load_dotenv
 
 API_KEY_FILE = os.path.join(os.path.dirname(__file__), "api_key.txt")
 
-# Try to load existing key, otherwise generate and save a new one
-if os.path.exists(API_KEY_FILE):
+# Try to load existing key, otherwise generate and save a new one.
+# O_EXCL so that concurrently starting workers agree on a single key.
+try:
+    fd = os.open(API_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+except FileExistsError:
     with open(API_KEY_FILE) as f:
         API_KEY = f.read().strip()
 else:
     API_KEY = secrets.token_urlsafe(32)
-    with open(API_KEY_FILE, "w") as f:
+    with os.fdopen(fd, "w") as f:
         f.write(API_KEY)
     print(f"[+] Generated new API key: {API_KEY}")
     print("[!] Keep this safe – stored in api_key.txt")
@@ -92,7 +103,7 @@ def logout():
 
 @app.before_request
 def enforce_login():
-    if request.path.startswith("/api/") or request.path.startswith("/static/"):
+    if request.path.startswith("/api/") or request.path.startswith("/static/") or request.path == "/metrics":
         return
     if request.endpoint in ("login", "logout"):
         return
@@ -101,8 +112,8 @@ def enforce_login():
     
 @app.before_request
 def require_api_key_for_api():
-    # Only enforce on /api routes
-    if not request.path.startswith("/api/"):
+    # Only enforce on /api routes (and the Prometheus scrape endpoint)
+    if not request.path.startswith("/api/") and request.path != "/metrics":
         return
 
     # ✅ Allow logged-in web UI sessions
@@ -130,56 +141,68 @@ def add_no_cache_headers(response):
 
 
 
-#start roam process, listen for completion
-roam_process = None  # global handle
+#start roam process, listen for completion.
+#Run state lives in a shared store so every worker process sees the same run.
+RUN_STATE = RunStateStore()
+
 @app.route('/api/start_roam', methods=['POST'])
 def start_roam():
-    global roam_process
+    data = request.get_json(force=True) or {}
+    try:
+        options = CycleOptions.from_request(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    # Clear old log and old flag
-    open(LOG_FILE, "w").close()
-    flag_path = os.path.join(BASE_DIR,"webui", "server", "roam_done.flag")
-    if os.path.exists(flag_path):
-        os.remove(flag_path)
+    cmd = ["python3", "-u", MAIN_SCRIPT] + options.to_args()
 
-    data = request.get_json(force=True) or {}
-    iface = data.get("iface", "wlan0")
-    rssi = str(data.get("rssi", -75))
+    if not RUN_STATE.claim(cmd):
+        return jsonify({"error": "A roam cycle is already running", "state": RUN_STATE.get()}), 409
 
-    cmd = ["python3", "-u", MAIN_SCRIPT, "-i", iface, "-r", rssi]
+    # Clear old log
+    open(LOG_FILE, "w").close()
     print(f"[+] Launching: {' '.join(cmd)}")
 
     logf = open(LOG_FILE, "a")
-    roam_process = subprocess.Popen(
-        cmd,
-        stdout=logf,
-        stderr=subprocess.STDOUT,
-        bufsize=1
-    )
+    try:
+        roam_process = subprocess.Popen(
+            cmd,
+            stdout=logf,
+            stderr=subprocess.STDOUT,
+            bufsize=1
+        )
+    except OSError as e:
+        logf.close()
+        RUN_STATE.mark_failed_to_start()
+        return jsonify({"error": f"Failed to launch roam process: {e}"}), 500
+    RUN_STATE.mark_started(roam_process.pid)
     print(f"[+] Spawned roam_process with PID {roam_process.pid}")
 
     def watch_proc(proc):
         print(f"[~] Watcher thread started for PID {proc.pid}")
         try:
             proc.wait()
+            logf.close()
             print(f"[!] roam process exited with code {proc.returncode}")
 
-            # Ensure the flag directory exists
-            os.makedirs(os.path.join(BASE_DIR, "webui", "server"), exist_ok=True)
-
             # Use your helper to find the correct run directory
             latest_run = get_latest_run_dir()
-            print(latest_run)
             summary_path = os.path.join(latest_run or "", "cycle_summary.json")
-
-            # Only create the flag if the summary doesn’t exist
             if not latest_run or not os.path.exists(summary_path):
-                flag_path = os.path.join(BASE_DIR, "webui", "server", "roam_done.flag")
-                with open(flag_path, "w") as f:
-                    f.write("done\n")
-                print(f"[+] Created flag (no summary detected) at {flag_path}")
+                summary_path = None
+                print("[+] Roam process exited without a summary")
             else:
-                print(f"[✓] Summary detected in {latest_run}, skipping flag creation")
+                print(f"[✓] Summary detected in {latest_run}")
+
+            RUN_STATE.mark_finished(proc.returncode, latest_run, summary_path)
+            sync_metrics()
+            update_search_index()
+            # Prebuild the line-offset index so the log viewer opens instantly
+            debug_log = os.path.join(latest_run or "", "roam_debug.log")
+            if latest_run and os.path.exists(debug_log):
+                try:
+                    build_line_index(debug_log)
+                except OSError as e:
+                    print(f"[WARN] Could not index {debug_log}: {e}")
 
         except Exception as e:
             print(f"[x] Watcher failed: {e}")
@@ -190,15 +213,34 @@ def start_roam():
 
     return jsonify({"status": "started", "cmd": cmd})
 
-#Serve "roam_done.flag"
-@app.route('/server/<path:filename>')
-def serve_flag(filename):
-    path = os.path.join(BASE_DIR,"webui", "server", filename)
-    if os.path.exists(path):
-        return send_file(path)
+@app.route('/api/run_status')
+def run_status():
+    state = RUN_STATE.get()
+    state.pop("history", None)
+    return jsonify(state)
+
+#Legacy early-exit flag, now backed by the shared run state
+@app.route('/server/roam_done.flag')
+def serve_flag():
+    if RUN_STATE.get()["status"] == "exited_early":
+        return Response("done\n", mimetype="text/plain")
     return Response(status=404)
 
 
+def json_response(body, status=200):
+    """JSON response (orjson when installed), gzip-compressed when the client accepts it."""
+    payload = dumps(body)
+    if "gzip" not in request.headers.get("Accept-Encoding", ""):
+        return Response(payload, status=status, content_type="application/json")
+    resp = Response(gzip.compress(payload, compresslevel=6), status=status, content_type="application/json")
+    resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+def summary_view(summary):
+    """?view=summary drops the per-phase log lines, for a fast first paint of big cycles."""
+    return lite_summary(summary) if request.args.get("view") == "summary" else summary
+
 #gets json output which fills out data on the UI. 
 @app.route('/api/latest_cycle_summary')
 def latest_summary():
@@ -213,15 +255,95 @@ def latest_summary():
         return jsonify({"error": "No summary found yet"}), 404
 
     mtime = os.path.getmtime(summary_path)
-    with open(summary_path) as f:
-        data = json.load(f)
+    data = load_json_file(summary_path)
 
-    return jsonify({
+    return json_response({
         "mtime": mtime,
-        "data": data,
+        "data": summary_view(data),
         "run_dir": latest_dir
     })
 
+#Full entry (with phase log lines) of one roam, for the UI when a roam is expanded
+@app.route('/api/roam_details')
+def roam_details():
+    run_dir_arg = request.args.get("dir")
+    run_dir = os.path.join(get_runs_dir(), os.path.basename(run_dir_arg)) if run_dir_arg else get_latest_run_dir()
+    roam_index = request.args.get("roam", type=int)
+    if roam_index is None:
+        return jsonify({"error": "Missing roam parameter"}), 400
+    summary_path = os.path.join(run_dir or "", "cycle_summary.json")
+    if not run_dir or not os.path.exists(summary_path):
+        return jsonify({"error": "cycle_summary.json not found"}), 404
+
+    roam = find_roam(load_json_file(summary_path), roam_index)
+    if roam is None:
+        return jsonify({"error": f"No roam {roam_index} in this run"}), 404
+    return json_response(roam)
+
+
+#Streams each run's roams.jsonl as server-sent events, so the UI can show roams as they finish
+ROAM_STREAM_KEEPALIVE_S = 15
+
+def _cycle_active(run_dir):
+    return RUN_STATE.get()["status"] in ("starting", "running") and run_dir == get_latest_run_dir()
+
+@app.route('/api/roams/stream')
+def stream_roams():
+    """
+    Server-sent events, one per roams.jsonl record (event: cycle | roam | end),
+    for run `dir`, or by default the cycle in progress (else the latest run).
+    Event ids are line numbers, so a reconnecting EventSource resumes via Last-Event-ID.
+    """
+    start_line = request.headers.get("Last-Event-ID", type=int) or request.args.get("since", 0, type=int)
+    run_dir_arg = request.args.get("dir")
+    if run_dir_arg:
+        run_dir = os.path.join(get_runs_dir(), os.path.basename(run_dir_arg))
+    elif RUN_STATE.is_running():
+        run_dir = None  # resolved once the runner has created it
+    else:
+        run_dir = get_latest_run_dir()
+    if run_dir is not None and not os.path.exists(os.path.join(run_dir, ROAMS_FILE)):
+        return jsonify({"error": f"{ROAMS_FILE} not found"}), 404
+
+    def events():
+        nonlocal run_dir
+        # start_roam returns before the runner has created its run directory
+        deadline = time.monotonic() + 60
+        while run_dir is None:
+            state = RUN_STATE.get()
+            latest = get_latest_run_dir()
+            path = os.path.join(latest, ROAMS_FILE) if latest else ""
+            if os.path.exists(path) and os.path.getmtime(path) >= (state["started_at"] or 0):
+                run_dir = latest
+            elif state["status"] not in ("starting", "running") or time.monotonic() > deadline:
+                yield 'event: end\ndata: {"type": "end", "interrupted": true}\n\n'
+                return
+            else:
+                yield ": waiting for the cycle to start\n\n"
+                time.sleep(0.5)
+
+        yield "retry: 2000\n\n"
+        last_sent, ended = time.monotonic(), False
+        path = os.path.join(run_dir, ROAMS_FILE)
+        for lineno, line, record in follow_roam_log(path, start_line, is_active=lambda: _cycle_active(run_dir)):
+            if line is None:
+                if time.monotonic() - last_sent > ROAM_STREAM_KEEPALIVE_S:
+                    last_sent = time.monotonic()
+                    yield ": keepalive\n\n"
+                continue
+            kind = record.get("type", "roam")
+            ended = kind == "end"
+            last_sent = time.monotonic()
+            yield f"id: {lineno}\nevent: {kind}\ndata: {line.decode()}\n\n"
+        if not ended:
+            # Runner exited without an end record (crash or Ctrl-C)
+            yield 'event: end\ndata: {"type": "end", "interrupted": true}\n\n'
+
+    resp = Response(stream_with_context(events()), content_type="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
 
 #this is the stdout when running the script, not wpa_supplicant logs... sorry
 @app.route('/api/logs')
@@ -232,13 +354,9 @@ def get_logs():
         lines = f.read()
     return jsonify({"log": lines})
 
-#This will download logs with a specified file name. Works for full debug logs and failed roam logs. 
-@app.route('/api/download_log')
-def download_log():
-    filename = request.args.get("filename", "roam_debug.log")
+def resolve_log_path(filename, run_dir_arg=None):
+    """Path of a run's log file (run dir or its failed_roams/), or None."""
     safe_name = os.path.basename(filename)
-    run_dir_arg = request.args.get("dir")
-
     # Use provided run_dir (from UI) if available, otherwise fall back to latest
     if run_dir_arg:
         run_dir = os.path.join(get_runs_dir(), os.path.basename(run_dir_arg))
@@ -246,20 +364,41 @@ def download_log():
         run_dir = get_latest_run_dir()
 
     if not run_dir or not os.path.isdir(run_dir):
-        return jsonify({"error": "No valid run directory found"}), 404
+        return None
 
     fail_dir = os.path.join(run_dir, "failed_roams")
-    candidate_paths = [
-        os.path.join(run_dir, safe_name),
-        os.path.join(fail_dir, safe_name),
-    ]
-
-    for path in candidate_paths:
+    for path in (os.path.join(run_dir, safe_name), os.path.join(fail_dir, safe_name)):
         if os.path.exists(path):
-            return send_file(path, as_attachment=True, conditional=False)
-
-    return jsonify({"error": f"Log file not found: {filename}"}), 404
+            return path
+    return None
 
+#This will download logs with a specified file name. Works for full debug logs and failed roam logs. 
+#Conditional so Range requests (resumed/partial downloads) get 206 responses.
+@app.route('/api/download_log')
+def download_log():
+    filename = request.args.get("filename", "roam_debug.log")
+    path = resolve_log_path(filename, request.args.get("dir"))
+    if not path:
+        return jsonify({"error": f"Log file not found: {filename}"}), 404
+    return send_file(path, as_attachment=True, conditional=True)
+
+#Paged view of a (possibly huge) log: a window of lines by line number or roam index
+@app.route('/api/log_lines')
+def log_lines():
+    filename = request.args.get("filename", "roam_debug.log")
+    path = resolve_log_path(filename, request.args.get("dir"))
+    if not path:
+        return jsonify({"error": f"Log file not found: {filename}"}), 404
+    try:
+        window = read_lines(
+            path,
+            start=request.args.get("start", 1, type=int),
+            count=request.args.get("count", 200, type=int),
+            roam=request.args.get("roam", type=int),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return json_response({"filename": os.path.basename(path), **window})
 
 
 # ====== Save/Load Results API ======
@@ -302,6 +441,64 @@ def list_saved_runs():
     runs = list_saved_runs()
     return jsonify(runs)
 
+def _flag_arg(name):
+    """Tri-state query flag: true/false, or None when missing or "any"."""
+    value = request.args.get(name, "").lower()
+    if value in ("", "any", "all"):
+        return None
+    if value in ("1", "true", "yes"):
+        return True
+    if value in ("0", "false", "no"):
+        return False
+    raise ValueError(f"{name} must be true, false or any")
+
+def _list_arg(value):
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+@app.route('/api/runs')
+def list_runs():
+    """
+    Paged run listing, newest first, filtered by SSID, date range, saved
+    flag and failures. Pass next_cursor back as cursor for the next page.
+    """
+    try:
+        page = run_catalog.list_runs(
+            ssid=request.args.get("ssid"),
+            since=run_catalog.parse_time(request.args.get("since")),
+            until=run_catalog.parse_time(request.args.get("until"), end=True),
+            saved=True if request.args.get("saved") is None else _flag_arg("saved"),
+            failures=_flag_arg("failures"),
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", run_catalog.DEFAULT_PAGE, type=int),
+            fields=_list_arg(request.args.get("fields")) or None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(page)
+
+@app.route('/api/summaries', methods=['GET', 'POST'])
+def batch_summaries():
+    """
+    Summaries of several runs in one request, each cut down to the given
+    dotted fields (e.g. roams.roam_duration_ms, roams.phases.*.duration_ms).
+    GET takes comma-separated dirs/fields; POST a JSON body with lists.
+    """
+    if request.method == "POST":
+        body = request.get_json(force=True, silent=True) or {}
+        dirs, fields, view = body.get("dirs") or [], body.get("fields"), body.get("view")
+    else:
+        dirs = _list_arg(request.args.get("dirs"))
+        fields, view = _list_arg(request.args.get("fields")), request.args.get("view")
+    if not dirs or not isinstance(dirs, list):
+        return jsonify({"error": "Missing dirs"}), 400
+    if fields and not isinstance(fields, list):
+        return jsonify({"error": "fields must be a list"}), 400
+    try:
+        result = run_catalog.load_summaries([str(d) for d in dirs], fields or None, view)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(result)
+
 
 @app.route('/api/load_results')
 def load_results():
@@ -322,8 +519,7 @@ def load_results():
     if not os.path.exists(summary_path):
         return jsonify({"error": "cycle_summary.json not found"}), 404
 
-    with open(summary_path) as f:
-        summary = json.load(f)
+    summary = load_json_file(summary_path)
 
     # --- merge in metadata.json if it exists ---
     if os.path.exists(meta_path):
@@ -335,7 +531,197 @@ def load_results():
         except Exception as e:
             print(f"[WARN] Could not read metadata.json for {run_dir}: {e}")
 
-    return jsonify(summary)
+    return json_response(summary_view(summary))
+
+@app.route('/api/compare')
+def compare_runs():
+    """
+    Lines up two or more runs by BSSID against the first one (the baseline):
+    per-phase median deltas and Mann-Whitney significance. Cached per
+    run set and summary mtimes.
+    """
+    runs = _list_arg(request.args.get("runs"))
+    try:
+        result = compare.compare_runs(runs, use_cache=request.args.get("nocache") is None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    return json_response(result)
+
+# ====== Latency baselines ======
+
+@app.route('/api/baselines')
+def get_baselines():
+    """Per-BSSID, per-phase baseline medians and the regression thresholds in use."""
+    return json_response({"config": baselines.load_config(), "bssids": baselines.baseline_overview()})
+
+@app.route('/api/regressions')
+def get_regressions():
+    """Most recent latency regression flags across cycles, newest first."""
+    limit = max(1, min(request.args.get("limit", 50, type=int), baselines.RECENT_MAX))
+    bssid = (request.args.get("bssid") or "").lower()
+    recent = [f for f in reversed(baselines.load_store().get("recent", []))
+              if not bssid or f.get("bssid", "").lower() == bssid]
+    return json_response({"regressions": recent[:limit]})
+
+# ====== RF history ======
+
+def _window_args():
+    return (run_catalog.parse_time(request.args.get("since")),
+            run_catalog.parse_time(request.args.get("until"), end=True))
+
+@app.route('/api/rf_history')
+def rf_history():
+    """
+    Per-BSS RF history from the stored scans. Without bssid, every BSS seen
+    in the window; with bssid (comma-separated), their RSSI/utilization/
+    station series, averaged per `bucket` seconds if given, plus roams to them.
+    """
+    bssids = _list_arg(request.args.get("bssid"))
+    try:
+        since, until = _window_args()
+        if not bssids:
+            return json_response({"bssids": scan_history.bss_overview(since, until, ssid=request.args.get("ssid"))})
+        bucket = request.args.get("bucket", type=float)
+        if bucket is not None and bucket <= 0:
+            raise ValueError("bucket must be a positive number of seconds")
+        trends = [scan_history.bss_trend(b, since, until, bucket) for b in bssids]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response({"trends": trends})
+
+@app.route('/api/rf_correlation')
+def rf_correlation():
+    """
+    Spearman correlation of roam latency (`latency`: duration_ms or a phase
+    column) with the target BSS's RSSI, utilization and station count at scan time.
+    """
+    try:
+        since, until = _window_args()
+        result = scan_history.correlate(request.args.get("bssid"), since, until,
+                                        latency=request.args.get("latency", "duration_ms"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(result)
+
+# ====== Agent API (used by the fleet coordinator) ======
+
+AGENT_NAME = os.getenv("AUTOROAM_AGENT_NAME") or socket.gethostname()
+AGENT_BATCH_LIMIT = 20
+
+@app.route('/api/agent/info')
+def agent_info():
+    state = RUN_STATE.get()
+    return jsonify({
+        "agent": AGENT_NAME,
+        "status": state["status"],
+        "seq": state["seq"],
+        "run_dir": os.path.basename(state["run_dir"]) if state["run_dir"] else None,
+    })
+
+@app.route('/api/agent/results')
+def agent_results():
+    """
+    Finished cycle summaries after sequence number `since`, oldest first,
+    in batches of at most `limit`. `more` is true if another batch is waiting.
+    """
+    since = request.args.get("since", 0, type=int)
+    limit = max(1, min(request.args.get("limit", AGENT_BATCH_LIMIT, type=int), AGENT_BATCH_LIMIT))
+    pending = RUN_STATE.finished_since(since)
+
+    results = []
+    for entry in pending[:limit]:
+        try:
+            summary = load_json_file(entry["summary_path"])
+        except (OSError, ValueError, TypeError):
+            summary = None  # unsaved run already cleaned up by a later cycle
+        results.append({
+            "seq": entry["seq"],
+            "run": os.path.basename(entry["run_dir"] or ""),
+            "summary": summary,
+        })
+
+    return json_response({
+        "agent": AGENT_NAME,
+        "seq": results[-1]["seq"] if results else since,
+        "more": len(pending) > limit,
+        "results": results,
+    })
+
+#Each worker folds every roam into its own metrics exactly once: roams of the
+#cycle in progress as they land in roams.jsonl (tracked by byte offset), then
+#the cycle-level values once the cycle finishes (tracked by the run-state
+#sequence number), so all workers report the same values.
+_metrics_seq = 0
+_metrics_lock = threading.Lock()
+_live_run = None
+_live_offset = 0
+
+def _observe_new_roams(run_dir):
+    global _live_run, _live_offset
+    if run_dir != _live_run:
+        _live_run, _live_offset = run_dir, 0
+    path = os.path.join(run_dir, ROAMS_FILE)
+    if not os.path.exists(path):
+        return
+    records, _live_offset = read_new_records(path, _live_offset)
+    for record in records:
+        if record.get("type") == "roam":
+            metrics.observe_roam(record)
+
+def sync_metrics():
+    global _metrics_seq, _live_run
+    with _metrics_lock:
+        state = RUN_STATE.get()
+        if state["status"] in ("starting", "running"):
+            latest = get_latest_run_dir()
+            path = os.path.join(latest, ROAMS_FILE) if latest else ""
+            if os.path.exists(path) and os.path.getmtime(path) >= (state["started_at"] or 0):
+                _observe_new_roams(latest)
+        for entry in RUN_STATE.finished_since(_metrics_seq):
+            try:
+                live = entry["run_dir"] == _live_run
+                if live:
+                    _observe_new_roams(entry["run_dir"])
+                    _live_run = None
+                metrics.observe_cycle_summary(load_json_file(entry["summary_path"]), include_roams=not live)
+            except Exception as e:
+                print(f"[WARN] Could not update metrics from {entry['summary_path']}: {e}")
+            _metrics_seq = entry["seq"]
+
+# ====== Log search ======
+
+def update_search_index():
+    """Bring the full-text log index up to date (new runs in, deleted runs out)."""
+    try:
+        stats = log_index.update_index()
+        if stats["indexed"] or stats["dropped"]:
+            print(f"[+] Log index: {stats['indexed']} log(s) added ({stats['lines']} lines), "
+                  f"{stats['dropped']} dropped in {stats['seconds']} s")
+    except Exception as e:
+        print(f"[WARN] Log index update failed: {e}")
+
+@app.route('/api/search')
+def search_logs():
+    """
+    Substring search over every indexed roam_debug.log.
+    Returns matching lines with run, roam index and line number.
+    """
+    query = request.args.get("q", "")
+    limit = max(1, min(request.args.get("limit", 100, type=int), 1000))
+    offset = max(0, request.args.get("offset", 0, type=int))
+    try:
+        result = log_index.search(query, limit=limit, offset=offset, run=request.args.get("run"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(result)
+
+#Prometheus scrape endpoint. Metrics are updated as roams and cycles finish, not recomputed on scrape.
+@app.route("/metrics")
+def prometheus_metrics():
+    sync_metrics()
+    return Response(metrics.render_metrics(), content_type=metrics.CONTENT_TYPE)
 
 @app.route("/api/docs")
 def api_docs():
@@ -365,9 +751,49 @@ def run_server(port=8443):
         ssl_context = (cert_path, key_path)
         print(f"[✓] Using HTTPS certificate from {cert_dir}")
 
+    # Catch up on runs made from the CLI while the server was down
+    threading.Thread(target=update_search_index, daemon=True).start()
     app.run(
         host="0.0.0.0",
         port=port,
         debug=False,
         ssl_context=ssl_context
-    )
\ No newline at end of file
+    )
+
+
+def run_server_production(port=8443, workers=2, threads=8):
+    """Serve the app with gunicorn (gthread workers) instead of Flask's dev server."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("[x] Production mode needs gunicorn: venv/bin/pip install gunicorn")
+
+    cert_dir = os.path.join(os.path.dirname(__file__), "certs")
+    cert_path = os.path.join(cert_dir, "server.crt")
+    key_path  = os.path.join(cert_dir, "server.key")
+
+    options = {
+        "bind": f"0.0.0.0:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "timeout": 120,
+        "accesslog": "-",
+    }
+    if os.path.exists(cert_path) and os.path.exists(key_path):
+        options.update(certfile=cert_path, keyfile=key_path)
+        print(f"[✓] Using HTTPS certificate from {cert_dir}")
+    else:
+        print("[!] HTTPS certificate not found. Falling back to HTTP.")
+
+    class AutoroamApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    print(f"[+] Starting gunicorn with {workers} worker(s) x {threads} thread(s) on port {port}")
+    threading.Thread(target=update_search_index, daemon=True).start()
+    AutoroamApplication().run()
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+run_state.py
+------------
+Roam run state shared by every server worker process.
+
+The state lives in data/run_state.json and is read/modified under an
+fcntl lock, so any worker (or thread) can answer /api/run_status and
+/metrics consistently, no matter which worker launched the cycle.
+"""
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from autoroam.common import get_data_dir
+
+HISTORY_LIMIT = 100
+
+IDLE_STATE = {
+    "status": "idle",        # idle | starting | running | finishing | done | exited_early
+    "pid": None,
+    "cmd": None,
+    "started_at": None,
+    "finished_at": None,
+    "returncode": None,
+    "run_dir": None,
+    "seq": 0,                # bumps for every finished cycle
+    "history": [],           # recent finished cycles: {seq, run_dir, summary_path}
+}
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RunStateStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_data_dir(), "run_state.json")
+        self.lock_path = self.path + ".lock"
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with open(self.lock_path, "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        return {**IDLE_STATE, **state}
+
+    def _write(self, state: Dict) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def get(self) -> Dict:
+        """
+        Current state. A 'running' entry whose process is gone but whose exit
+        has not been recorded yet (by the launching worker) reads as 'finishing'.
+        """
+        with self._locked(exclusive=False):
+            state = self._read()
+        if state["status"] == "running" and not _pid_alive(state["pid"]):
+            state["status"] = "finishing"
+        return state
+
+    def is_running(self) -> bool:
+        return self.get()["status"] in ("starting", "running")
+
+    def claim(self, cmd, stale_after: float = 30.0) -> bool:
+        """
+        Atomically reserve the runner for a new cycle. Returns False if another
+        worker already has a cycle starting or running.
+        """
+        with self._locked(exclusive=True):
+            state = self._read()
+            if state["status"] == "running" and _pid_alive(state["pid"]):
+                return False
+            if state["status"] == "starting" and time.time() - (state["started_at"] or 0) < stale_after:
+                return False
+            state.update(status="starting", pid=None, cmd=cmd, started_at=time.time(),
+                         finished_at=None, returncode=None, run_dir=None)
+            self._write(state)
+        return True
+
+    def mark_started(self, pid: int) -> Dict:
+        with self._locked(exclusive=True):
+            state = self._read()
+            state.update(status="running", pid=pid)
+            self._write(state)
+        return state
+
+    def mark_failed_to_start(self) -> None:
+        with self._locked(exclusive=True):
+            state = self._read()
+            state.update(status="exited_early", finished_at=time.time())
+            self._write(state)
+
+    def mark_finished(self, returncode: int, run_dir: Optional[str], summary_path: Optional[str]) -> Dict:
+        """Record process exit. No summary means the cycle exited early."""
+        with self._locked(exclusive=True):
+            state = self._read()
+            state.update(
+                status="done" if summary_path else "exited_early",
+                finished_at=time.time(),
+                returncode=returncode,
+                run_dir=run_dir,
+            )
+            if summary_path:
+                state["seq"] += 1
+                state["history"] = (state["history"] + [
+                    {"seq": state["seq"], "run_dir": run_dir, "summary_path": summary_path}
+                ])[-HISTORY_LIMIT:]
+            self._write(state)
+        return state
+
+    def finished_since(self, seq: int):
+        """Finished cycles with a sequence number above seq, oldest first."""
+        return [h for h in self.get()["history"] if h["seq"] > seq]
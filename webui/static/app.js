@@ -36,6 +36,75 @@ const median = arr => {
 };
 const cssVar = n => getComputedStyle(document.documentElement).getPropertyValue(n).trim();
 
+/*** ==========================================================
+     VIRTUAL LISTS
+========================================================== */
+// Soak and matrix cycles have hundreds of roams (and big sites hundreds of
+// candidate APs), so long lists only build DOM for the rows near the
+// viewport. Row heights start as an estimate and are measured once drawn;
+// two spacer elements stand in for everything above and below.
+const vLists = new Map();   // container -> list, redrawn on window scroll/resize
+
+function virtualList(container, { count, estimate, render, spacer, scroller = null, overscan = 8 }) {
+  vLists.get(container)?.destroy();
+  const heights = Array.from({ length: count }, (_, i) => estimate(i));
+  const top = spacer(), bottom = spacer();
+  let first = -1, last = -1, frame = null;
+  const sum = (a, b) => { let t = 0; for (let i = a; i < b; i++) t += heights[i]; return t; };
+
+  function draw(force = false) {
+    const box = container.getBoundingClientRect();
+    const view = scroller ? scroller.getBoundingClientRect() : { top: 0, bottom: window.innerHeight };
+    const viewTop = Math.max(view.top, 0) - box.top;
+    const viewBottom = Math.min(view.bottom, window.innerHeight) - box.top;
+
+    let i = 0, y = 0;
+    while (i < count && y + heights[i] < viewTop) y += heights[i++];
+    let j = i;
+    while (j < count && y < viewBottom) y += heights[j++];
+    const from = Math.max(0, i - overscan), to = Math.min(count, j + overscan);
+    if (!force && from === first && to === last) return;
+    first = from; last = to;
+
+    const rows = [];
+    for (let k = from; k < to; k++) rows.push(render(k));
+    top.style.height = `${sum(0, from)}px`;
+    container.replaceChildren(top, ...rows, bottom);
+    // Measure row pitch (offsetTop deltas include margins), then fix the spacers
+    rows.forEach((el, n) => {
+      const next = rows[n + 1] || bottom;
+      heights[from + n] = next.offsetTop - el.offsetTop || heights[from + n];
+    });
+    top.style.height = `${sum(0, from)}px`;
+    bottom.style.height = `${sum(to, count)}px`;
+  }
+
+  const schedule = () => {
+    if (frame) return;
+    frame = requestAnimationFrame(() => { frame = null; draw(); });
+  };
+  scroller?.addEventListener("scroll", schedule);
+
+  const list = {
+    schedule,
+    redraw: () => draw(true),
+    // Forget measured heights (rows changed size, e.g. expand/collapse all)
+    reset: () => { for (let k = 0; k < count; k++) heights[k] = estimate(k); draw(true); },
+    destroy: () => {
+      scroller?.removeEventListener("scroll", schedule);
+      if (frame) cancelAnimationFrame(frame);
+      vLists.delete(container);
+    },
+  };
+  vLists.set(container, list);
+  draw(true);
+  return list;
+}
+
+const scheduleVLists = () => vLists.forEach(l => l.schedule());
+window.addEventListener("scroll", scheduleVLists, { passive: true });
+window.addEventListener("resize", scheduleVLists);
+
 /*** ==========================================================
      MAIN RENDER PIPELINE
 ========================================================== */
@@ -46,6 +115,7 @@ function loadData(d) {
   renderTable();
   renderChart();
   renderRoams();
+  renderMatrix();
 }
 
 /*** ==========================================================
@@ -96,29 +166,100 @@ function renderMetrics() {
   } else $("#mFS").textContent = "—";
 }
 
+/*** ==========================================================
+     ROAM LATENCY MATRIX (heatmap, matrix mode only)
+========================================================== */
+// green (fast) -> yellow -> red (slow), on a log scale between min and max
+const heatColor = (v, lo, hi) => {
+  const t = hi > lo ? (Math.log(v) - Math.log(lo)) / (Math.log(hi) - Math.log(lo)) : 0;
+  return `hsl(${Math.round(130 * (1 - t))}, 70%, 55%)`;
+};
+
+function renderMatrix() {
+  const panel = $("#matrixPanel");
+  const m = data.matrix;
+  if (!m || !m.bssids?.length) { panel.style.display = "none"; return; }
+  panel.style.display = "";
+  $("#matrixNote").textContent =
+    `Rows: from AP, columns: to AP. ${m.pairs_measured}/${m.pairs} pairs measured in ${m.roams_run} roams` +
+    (m.transit_roams ? ` (${m.transit_roams} repositioning)` : "") + ".";
+
+  const short = b => b.split(":").slice(-3).join(":");
+  const head = `<tr><th>from \\ to</th>${m.bssids.map(b => `<th title="${b}">${short(b)}</th>`).join("")}</tr>`;
+  const rows = m.bssids.map((from, i) => {
+    const cells = m.bssids.map((to, j) => {
+      if (i === j) return `<td class="cell diag"></td>`;
+      const v = m.latency_ms[i][j];
+      const fails = m.failures?.[i]?.[j] || 0;
+      const tip = `${from} → ${to}: ${v == null ? "no successful roam" : fmtMs(v)}, ${m.attempts[i][j]} attempt(s), ${fails} failed`;
+      if (v == null) return `<td class="cell none" title="${tip}">${fails ? "✕" : "—"}</td>`;
+      return `<td class="cell" title="${tip}" style="background:${heatColor(v, m.min_ms, m.max_ms)}">${v.toFixed(1)}${fails ? " ⚠" : ""}</td>`;
+    }).join("");
+    return `<tr><th class="rowHead" title="${from}">${short(from)}</th>${cells}</tr>`;
+  }).join("");
+  $("#matrixTable").innerHTML = head + rows;
+}
+
 /*** ==========================================================
      CANDIDATES TABLE
 ========================================================== */
+// Sort keys per column, in header order
+const AP_COLUMNS = [
+  c => c.bssid ?? "",
+  c => +c.freq,
+  c => +c.rssi,
+  c => +c.qbss_util_prct,
+  c => +c.qbss_sta_count,
+  c => (c.auth_suites || []).join(" "),
+  c => c.mfp_flag ?? "",
+  c => c.supported_rates ?? "",
+];
+let apSort = null;   // { col, dir } once a header was clicked; default is RSSI desc
+
+function apRow(c) {
+  const tr = document.createElement("tr");
+  tr.innerHTML = `
+    <td>${c.bssid ?? "—"}</td>
+    <td>${bandStr(c.freq)}</td>
+    <td class="rssi ${rssiClass(+c.rssi)}">${c.rssi}</td>
+    <td>${c.qbss_util_prct ?? "—"}</td>
+    <td>${c.qbss_sta_count ?? "—"}</td>
+    <td>${(c.auth_suites||[]).map(s=>`<span class="pill"><span class="dot" style="background:${cssVar('--ph-auth')||'#7ccaff'}"></span>${s}</span>`).join(" ") || "—"}</td>
+    <td><span class="pill"><span class="dot" style="background:${c.mfp_flag?.includes("required")? "#ff9e66":"#8bd8ff"}"></span>${c.mfp_flag ?? "—"}</span></td>
+    <td class="muted">${c.supported_rates ?? "—"}</td>`;
+  return tr;
+}
+
 function renderTable() {
-  const tb = $("#apTable tbody");
-  tb.innerHTML = "";
   const rows = (data.candidates || []).slice().sort((a,b)=>(b.rssi ?? -999) - (a.rssi ?? -999));
-  for (const c of rows) {
-    const tr = document.createElement("tr");
-    tr.innerHTML = `
-      <td>${c.bssid ?? "—"}</td>
-      <td>${bandStr(c.freq)}</td>
-      <td class="rssi ${rssiClass(+c.rssi)}">${c.rssi}</td>
-      <td>${c.qbss_util_prct ?? "—"}</td>
-      <td>${c.qbss_sta_count ?? "—"}</td>
-      <td>${(c.auth_suites||[]).map(s=>`<span class="pill"><span class="dot" style="background:${cssVar('--ph-auth')||'#7ccaff'}"></span>${s}</span>`).join(" ") || "—"}</td>
-      <td><span class="pill"><span class="dot" style="background:${c.mfp_flag?.includes("required")? "#ff9e66":"#8bd8ff"}"></span>${c.mfp_flag ?? "—"}</span></td>
-      <td class="muted">${c.supported_rates ?? "—"}</td>`;
-    tb.appendChild(tr);
+  if (apSort) {
+    const key = AP_COLUMNS[apSort.col];
+    const sign = apSort.dir === "asc" ? 1 : -1;
+    rows.sort((a, b) => {
+      const x = key(a), y = key(b);
+      // Numbers first (missing values last), otherwise text order
+      if (typeof x === "number") {
+        if (isNaN(x) || isNaN(y)) return isNaN(x) - isNaN(y);
+        return sign * (x - y);
+      }
+      return sign * String(x).localeCompare(String(y));
+    });
   }
+  virtualList($("#apTable tbody"), {
+    count: rows.length,
+    estimate: () => 45,
+    render: i => apRow(rows[i]),
+    spacer: () => {
+      const tr = document.createElement("tr");
+      tr.className = "vSpacer";
+      tr.innerHTML = `<td colspan="${AP_COLUMNS.length}"></td>`;
+      return tr;
+    },
+    scroller: $("#apTableWrap"),
+  });
 }
 
-// === Simple sortable table ===
+// === Sortable AP table (sorts the data, then redraws the visible rows) ===
 function makeTableSortable(tableId) {
   const table = document.getElementById(tableId);
   if (!table) return;
@@ -126,45 +267,16 @@ function makeTableSortable(tableId) {
   const headers = table.querySelectorAll("th");
   headers.forEach((th, index) => {
     th.style.cursor = "pointer";
-    th.addEventListener("click", () => sortTableByColumn(table, index));
-  });
-}
-
-function sortTableByColumn(table, columnIndex) {
-  const tbody = table.tBodies[0];
-  const rows = Array.from(tbody.querySelectorAll("tr"));
-  const header = table.tHead.rows[0].cells[columnIndex];
-
-  // Toggle sort direction
-  const currentDir = header.dataset.sortDir === "asc" ? "desc" : "asc";
-  header.dataset.sortDir = currentDir;
-
-  // Sort rows
-  const sortedRows = rows.sort((a, b) => {
-    const aText = a.cells[columnIndex].innerText.trim();
-    const bText = b.cells[columnIndex].innerText.trim();
-
-    // Try numeric comparison first
-    const aNum = parseFloat(aText.replace(/[^\d.-]/g, ""));
-    const bNum = parseFloat(bText.replace(/[^\d.-]/g, ""));
-    const bothNumeric = !isNaN(aNum) && !isNaN(bNum);
-
-    if (bothNumeric) {
-      return currentDir === "asc" ? aNum - bNum : bNum - aNum;
-    } else {
-      return currentDir === "asc"
-        ? aText.localeCompare(bText)
-        : bText.localeCompare(aText);
-    }
+    th.addEventListener("click", () => {
+      // Toggle sort direction
+      const dir = th.dataset.sortDir === "asc" ? "desc" : "asc";
+      headers.forEach(h => { h.classList.remove("sorted"); delete h.dataset.sortDir; });
+      th.dataset.sortDir = dir;
+      th.classList.add("sorted");
+      apSort = { col: index, dir };
+      if (data) renderTable();
+    });
   });
-
-  // Rebuild tbody
-  tbody.innerHTML = "";
-  sortedRows.forEach(row => tbody.appendChild(row));
-
-  // Optional: visually mark sorted column
-  table.querySelectorAll("th").forEach(th => th.classList.remove("sorted"));
-  header.classList.add("sorted");
 }
 
 // Activate sorting for your AP table
@@ -173,6 +285,17 @@ makeTableSortable("apTable");
 /*** ==========================================================
      CHART (SVG stacked bars)
 ========================================================== */
+// Only the bars near the chart's scroll position exist as SVG nodes; the
+// row layer is redrawn as .chartWrap scrolls.
+const CHART_OVERSCAN = 10;
+let chartView = null;
+
+function svgEl(svg, tag, attrs) {
+  const el = document.createElementNS(svg.namespaceURI, tag);
+  for (const [k, v] of Object.entries(attrs)) el.setAttribute(k, v);
+  return el;
+}
+
 function renderChart() {
   const svg = $("#chart");
   svg.innerHTML = "";
@@ -214,84 +337,90 @@ svg.style.height = `${desiredHeight}px`;
   const H = svg.clientHeight;
   const plotW = W - padL - padR, plotH = H - padT - padB;
 
-  const maxX = Math.max(1, ...items.map(d => d.total));
+  let maxX = 1;
+  for (const d of items) if (d.total > maxX) maxX = d.total;
 
   // grid + labels
   for (let i = 0; i <= 4; i++) {
     const x = padL + (i / 4) * plotW;
-    const gl = document.createElementNS(svg.namespaceURI, "line");
-    gl.setAttribute("x1", x); gl.setAttribute("x2", x);
-    gl.setAttribute("y1", padT); gl.setAttribute("y2", padT + plotH);
-    gl.setAttribute("stroke", "#213045"); gl.setAttribute("stroke-width", "1");
-    svg.appendChild(gl);
-    const lbl = document.createElementNS(svg.namespaceURI, "text");
-    lbl.setAttribute("x", x); lbl.setAttribute("y", H - 10);
-    lbl.setAttribute("text-anchor", "middle");
-    lbl.setAttribute("fill", "#e8f1ff");
+    svg.appendChild(svgEl(svg, "line", { x1: x, x2: x, y1: padT, y2: padT + plotH, stroke: "#213045", "stroke-width": "1" }));
+    const lbl = svgEl(svg, "text", { x, y: H - 10, "text-anchor": "middle", fill: "#e8f1ff" });
     lbl.textContent = `${Math.round((i / 4) * maxX)} ms`;
     svg.appendChild(lbl);
   }
 
-  // bars + chips
+  // bars + chips (drawn for the visible rows only)
   const rowH = plotH / Math.max(1, items.length);
-  const barH = Math.max(14, rowH - 12);
-  items.forEach((d, rowIdx) => {
+  const layer = svgEl(svg, "g", {});
+  svg.appendChild(layer);
+  chartView = { svg, layer, items, padL, padT, plotW, maxX, rowH, barH: Math.max(14, rowH - 12), first: -1, last: -1 };
+  drawChartRows();
+
+  // One tooltip handler for all bars
+  svg.onmousemove = ev => {
+    const { row, seg } = ev.target.dataset;
+    if (row == null) { hideTip(); return; }
+    const d = chartView.items[row], sg = d.segs[seg];
+    showTip(ev.clientX, ev.clientY, `
+      <h4>Roam #${d.index} · ${sg.status || "—"}</h4>
+      <p><strong>AP</strong> ${d.target || "—"} · <strong>${sg.type || sg.k}</strong></p>
+      <p>RSSI: ${sg.rssi ?? "—"} · Phase: <strong>${sg.label}</strong> = ${fmtMs(sg.dur)}</p>
+      <small>Total: ${fmtMs(d.total)}</small>`);
+  };
+  svg.onmouseleave = hideTip;
+
+  const leg = $("#legend"); leg.innerHTML = "";
+  for (const p of PHASES) {
+    const chip = document.createElement("div");
+    chip.className = "chip" + (visible.has(p.key) ? "" : " dim");
+    chip.innerHTML = `<span class="dot" style="background:${p.color}"></span>${p.label}`;
+    chip.onclick = () => { visible.has(p.key) ? visible.delete(p.key) : visible.add(p.key); renderChart(); };
+    leg.appendChild(chip);
+  }
+}
+
+function drawChartRows() {
+  const v = chartView;
+  if (!v) return;
+  const wrap = $(".chartWrap");
+  const first = Math.max(0, Math.floor((wrap.scrollTop - v.padT) / v.rowH) - CHART_OVERSCAN);
+  const last = Math.min(v.items.length, Math.ceil((wrap.scrollTop + wrap.clientHeight - v.padT) / v.rowH) + CHART_OVERSCAN);
+  if (first === v.first && last === v.last) return;
+  v.first = first; v.last = last;
+
+  const { svg, padL, padT, plotW, maxX, rowH, barH } = v;
+  const frag = document.createDocumentFragment();
+  for (let rowIdx = first; rowIdx < last; rowIdx++) {
+    const d = v.items[rowIdx];
     const y = padT + rowIdx * rowH + (rowH - barH) / 2;
     const statusColor = (d.status === "success" ? cssVar('--ok') : cssVar('--bad')) || "#25e07b";
-    const chipGroup = document.createElementNS(svg.namespaceURI, "g");
-    const rect = document.createElementNS(svg.namespaceURI, "rect");
-    rect.setAttribute("x", 14);
-    rect.setAttribute("y", y + (barH - 20) / 2);
-    rect.setAttribute("width", 78);
-    rect.setAttribute("height", 20);
-    rect.setAttribute("rx", 10);
-    rect.setAttribute("fill", statusColor);
-    rect.setAttribute("opacity", "0.9");
-    chipGroup.appendChild(rect);
-    const t = document.createElementNS(svg.namespaceURI, "text");
-    t.setAttribute("x", 53);
-    t.setAttribute("y", y + barH / 2 + 1);
-    t.setAttribute("text-anchor", "middle");
-    t.setAttribute("class", "rowChip chipTextLight");
+    const chipGroup = svgEl(svg, "g", {});
+    chipGroup.appendChild(svgEl(svg, "rect", {
+      x: 14, y: y + (barH - 20) / 2, width: 78, height: 20, rx: 10, fill: statusColor, opacity: "0.9"
+    }));
+    const t = svgEl(svg, "text", { x: 53, y: y + barH / 2 + 1, "text-anchor": "middle", class: "rowChip chipTextLight" });
     t.textContent = `Roam #${d.index}`;
     chipGroup.appendChild(t);
-    svg.appendChild(chipGroup);
+    frag.appendChild(chipGroup);
 
     let cursor = 0;
-    d.segs.forEach(seg => {
+    d.segs.forEach((seg, segIdx) => {
       if (!visible.has(seg.k) || !seg.dur) return;
       const w = (seg.dur / maxX) * plotW;
-      const r = document.createElementNS(svg.namespaceURI, "rect");
-      r.setAttribute("x", padL + cursor);
-      r.setAttribute("y", y);
-      r.setAttribute("width", Math.max(0, w));
-      r.setAttribute("height", barH);
-      r.setAttribute("rx", 4);
-      r.setAttribute("fill", seg.color);
-      r.setAttribute("opacity", seg.status === "success" ? "1" : "0.9");
-      r.addEventListener("mousemove", ev => {
-        showTip(ev.clientX, ev.clientY, `
-          <h4>Roam #${d.index} · ${seg.status || "—"}</h4>
-          <p><strong>AP</strong> ${d.target || "—"} · <strong>${seg.type || seg.k}</strong></p>
-          <p>RSSI: ${seg.rssi ?? "—"} · Phase: <strong>${seg.label}</strong> = ${fmtMs(seg.dur)}</p>
-          <small>Total: ${fmtMs(d.total)}</small>`);
+      const r = svgEl(svg, "rect", {
+        x: padL + cursor, y, width: Math.max(0, w), height: barH, rx: 4,
+        fill: seg.color, opacity: seg.status === "success" ? "1" : "0.9"
       });
-      r.addEventListener("mouseleave", hideTip);
-      svg.appendChild(r);
+      r.dataset.row = rowIdx;
+      r.dataset.seg = segIdx;
+      frag.appendChild(r);
       cursor += w;
     });
-  });
-
-  const leg = $("#legend"); leg.innerHTML = "";
-  for (const p of PHASES) {
-    const chip = document.createElement("div");
-    chip.className = "chip" + (visible.has(p.key) ? "" : " dim");
-    chip.innerHTML = `<span class="dot" style="background:${p.color}"></span>${p.label}`;
-    chip.onclick = () => { visible.has(p.key) ? visible.delete(p.key) : visible.add(p.key); renderChart(); };
-    leg.appendChild(chip);
   }
+  v.layer.replaceChildren(frag);
 }
 
+document.querySelector(".chartWrap").addEventListener("scroll", () => requestAnimationFrame(drawChartRows), { passive: true });
 
 function showTip(x,y,html){
   const t=$("#tooltip"); t.innerHTML=html; t.style.display="block";
@@ -311,129 +440,161 @@ function findRssi(bssid){
 /*** ==========================================================
      ROAM DETAILS (accordion)
 ========================================================== */
-function renderRoams(){
-  const wrap=$("#roams"); wrap.innerHTML="";
-  for(const r of (data.roams||[])){
-    const acc=document.createElement("div"); acc.className="accordion";
-    const head=document.createElement("div"); head.className="accHead";
-    head.innerHTML=`
-      <div class="pill" style="background:${r.overall_status==='success'?'rgba(37,224,123,.12)':'rgba(255,108,121,.12)'};border-color:#2a394b;">
-        <span class="dot" style="background:${r.overall_status==='success'?cssVar('--ok'):cssVar('--bad')}"></span>
-        Roam #${r.roam_index}
-      </div>
-      <div>
-        <span class="muted">AP</span> ${r.target_bssid||r.final_bssid||"—"} 
-        <span class="muted">·</span> 
-        <span class="muted">${
-          r.start_time
-            ? new Date(r.start_time).toLocaleTimeString([], {
-                hour: "2-digit",
-                minute: "2-digit",
-                second: "2-digit",
-                fractionalSecondDigits: 3
-              })
-            : "—"
-        }
-        </span>
-        <span class="muted">·</span> Total <strong>${fmtMs(r.roam_duration_ms)}</strong>
-      </div>
-
-      <div class="statusGroup">
-        ${r.overall_status==="failure"&&r.failure_log?`<button class="btnDownloadRoam" data-filename="${r.failure_log}">Download log file</button>`:""}
-        <div class="status ${r.overall_status==="success"?"ok":"bad"}">${r.overall_status}</div>
+// Expanded roams, by roam_index (rows are rebuilt as they scroll in and out)
+const openRoams = new Set();
+let roamList = null;
+const ROAM_HEAD_H = 58, ROAM_OPEN_H = 420;   // row height estimates (px)
+
+const fmtTime = t => t
+  ? new Date(t).toLocaleTimeString([], { hour: "2-digit", minute: "2-digit", second: "2-digit", fractionalSecondDigits: 3 })
+  : "—";
+
+function roamBody(r){
+  const body=document.createElement("div"); body.className="accBody open";
+
+  if(r.details&&Object.keys(r.details).length){
+    const detailsDiv=document.createElement("div");
+    detailsDiv.className="roamDetailsInline";
+    detailsDiv.innerHTML=`
+      <div style="margin-bottom:10px;display:flex;flex-wrap:wrap;gap:10px;align-items:center;">
+        ${Object.entries(r.details).map(([k,v])=>`<span class="muted">${k}:</span> <span class="kbd">${v}</span>`).join("<span class='muted'>·</span> ")}
       </div>`;
-    const body=document.createElement("div"); body.className="accBody";
-
-    if(r.details&&Object.keys(r.details).length){
-      const detailsDiv=document.createElement("div");
-      detailsDiv.className="roamDetailsInline";
-      detailsDiv.innerHTML=`
-        <div style="margin-bottom:10px;display:flex;flex-wrap:wrap;gap:10px;align-items:center;">
-          ${Object.entries(r.details).map(([k,v])=>`<span class="muted">${k}:</span> <span class="kbd">${v}</span>`).join("<span class='muted'>·</span> ")}
-        </div>`;
-      body.appendChild(detailsDiv);
-    }
+    body.appendChild(detailsDiv);
+  }
 
-    const phases=["Authentication","Association","EAP","4-Way"];
-    phases.forEach(k=>{
-      const ph=r.phases?.[k]; if(!ph)return;
-      const errs=(ph.errors||[]);
-      const card=document.createElement("div"); card.className="phaseCard";
-      card.innerHTML=`
-      <div style="display:flex;justify-content:space-between;align-items:center;flex-wrap:wrap">
-        <div style="display:flex;gap:10px;align-items:center;flex-wrap:wrap">
-          <strong>${ph.name}</strong>
-          <span class="${ph.status==="success"?"ok":(ph.status==="N/A"||ph.status==="unknown"?"muted":"bad")}">${ph.status}</span>
-          <span class="muted">Type:</span> <span>${ph.type||"—"}</span>
-          <span class="muted">· Duration:</span> <span>${fmtMs(ph.duration_ms)}</span>
-        </div>
-        <span class="kbd" style="white-space:nowrap;margin-left:auto;">
-          ${
-            ph.start
-              ? new Date(ph.start).toLocaleTimeString([], {
-                  hour: "2-digit",
-                  minute: "2-digit",
-                  second: "2-digit",
-                  fractionalSecondDigits: 3
-                })
-              : "—"
-          }
-        </span>
+  const phases=["Authentication","Association","EAP","4-Way"];
+  phases.forEach(k=>{
+    const ph=r.phases?.[k]; if(!ph)return;
+    const errs=(ph.errors||[]);
+    // Summary-only payloads carry just the count; the lines come from /api/roam_details
+    const errCount=ph.errors?errs.length:(ph.error_count||0);
+    const card=document.createElement("div"); card.className="phaseCard";
+    card.innerHTML=`
+    <div style="display:flex;justify-content:space-between;align-items:center;flex-wrap:wrap">
+      <div style="display:flex;gap:10px;align-items:center;flex-wrap:wrap">
+        <strong>${ph.name}</strong>
+        <span class="${ph.status==="success"?"ok":(ph.status==="N/A"||ph.status==="unknown"?"muted":"bad")}">${ph.status}</span>
+        <span class="muted">Type:</span> <span>${ph.type||"—"}</span>
+        <span class="muted">· Duration:</span> <span>${fmtMs(ph.duration_ms)}</span>
       </div>
-        ${Object.keys(ph.details||{}).length?`<div class="muted" style="margin-top:6px">${Object.entries(ph.details).map(([k,v])=>`${k}: <span class="kbd">${v}</span>`).join(" · ")}</div>`:""}
-        ${errs.length ? `
-          <details class="logDetails">
-            <summary><span class="pill logPill">Informative logs (${errs.length})</span></summary>
-            <pre class="logContent">${errs.join("")}</pre>
-          </details>
-        ` : ""}
-      `;
-      body.appendChild(card);
-    });
+      <span class="kbd" style="white-space:nowrap;margin-left:auto;">${fmtTime(ph.start)}</span>
+    </div>
+      ${Object.keys(ph.details||{}).length?`<div class="muted" style="margin-top:6px">${Object.entries(ph.details).map(([k,v])=>`${k}: <span class="kbd">${v}</span>`).join(" · ")}</div>`:""}
+      ${errCount ? `
+        <details class="logDetails">
+          <summary><span class="pill logPill">Informative logs (${errCount})</span></summary>
+          <pre class="logContent">${ph.errors?errs.join(""):"Loading…"}</pre>
+        </details>
+      ` : ""}
+    `;
+    body.appendChild(card);
+  });
+  return body;
+}
 
-    head.onclick=()=>body.classList.toggle("open");
-    acc.append(head,body);
-    wrap.appendChild(acc);
-    console.log("Attaching handlers to download buttons...");
-    wrap.querySelectorAll('.btnDownloadRoam').forEach(btn => {
-      btn.onclick = async e => {   // ← replaces addEventListener()
-        e.stopPropagation();
-        const filename = btn.dataset.filename;
-        if (!filename) { alert("No log file found for this roam."); return; }
-        try {
-          const selectedDir = document.getElementById("loadDropdown")?.value || "";
-          const url = selectedDir
-            ? `/api/download_log?dir=${encodeURIComponent(selectedDir)}&filename=${encodeURIComponent(filename)}`
-            : `/api/download_log?filename=${encodeURIComponent(filename)}`;
-
-          const res = await fetch(`${url}&_=${Date.now()}`);
-          if (!res.ok) { alert("No log file found for this roam."); return; }
-
-          const blob = await res.blob();
-          const blobUrl = window.URL.createObjectURL(blob);
-          const a = document.createElement('a');
-          a.href = blobUrl;
-          a.download = filename;
-          document.body.appendChild(a);
-          a.click();
-          a.remove();
-          window.URL.revokeObjectURL(blobUrl);
-        } catch (err) {
-          console.error("Failed to download roam log:", err);
-          alert("Failed to download log.");
-        }
-      };
-    });
+function roamRow(r, i){
+  const acc=document.createElement("div"); acc.className="accordion";
+  const head=document.createElement("div"); head.className="accHead";
+  head.innerHTML=`
+    <div class="pill" style="background:${r.overall_status==='success'?'rgba(37,224,123,.12)':'rgba(255,108,121,.12)'};border-color:#2a394b;">
+      <span class="dot" style="background:${r.overall_status==='success'?cssVar('--ok'):cssVar('--bad')}"></span>
+      Roam #${r.roam_index}
+    </div>
+    <div>
+      <span class="muted">AP</span> ${r.target_bssid||r.final_bssid||"—"} 
+      <span class="muted">·</span> 
+      <span class="muted">${fmtTime(r.start_time)}</span>
+      <span class="muted">·</span> Total <strong>${fmtMs(r.roam_duration_ms)}</strong>
+      ${r.regressions?.length?`<span class="pill regPill" title="${r.regressions.map(f=>`${f.metric}: ${fmtMs(f.value_ms)} vs baseline ${fmtMs(f.baseline_ms??f.limit_ms)}`).join("\n")}">⚠ slower than baseline</span>`:""}
+    </div>
+
+    <div class="statusGroup">
+      <button class="btnViewRoamLog">View in log</button>
+      ${r.overall_status==="failure"&&r.failure_log?`<button class="btnDownloadRoam">Download log file</button>`:""}
+      <div class="status ${r.overall_status==="success"?"ok":"bad"}">${r.overall_status}</div>
+    </div>`;
+  acc.appendChild(head);
+  if(openRoams.has(r.roam_index)){
+    acc.appendChild(roamBody(r));
+    loadRoamDetails(i);
+  }
+
+  head.onclick=()=>{
+    openRoams.has(r.roam_index)?openRoams.delete(r.roam_index):openRoams.add(r.roam_index);
+    roamList.redraw();
+  };
+  head.querySelector('.btnViewRoamLog').onclick=e=>{
+    e.stopPropagation();
+    openLogViewer(r.roam_index);
+  };
+  const dl=head.querySelector('.btnDownloadRoam');
+  if(dl) dl.onclick=e=>{ e.stopPropagation(); downloadRoamLog(r.failure_log); };
+  return acc;
+}
 
+function renderRoams(){
+  const roams=data.roams||[];
+  roamList=virtualList($("#roams"),{
+    count: roams.length,
+    estimate: i => openRoams.has(roams[i].roam_index) ? ROAM_OPEN_H : ROAM_HEAD_H,
+    render: i => roamRow(roams[i], i),
+    spacer: () => document.createElement("div"),
+  });
+}
+
+// Fill in an expanded roam's phase log lines when it came from a summary-only
+// payload. Runs as the row is drawn, so "Expand All" only fetches what is on screen.
+async function loadRoamDetails(i){
+  const r=data.roams[i];
+  if(!data.lite||r._loading||!Object.values(r.phases||{}).some(p=>p.error_count))return;
+  r._loading=true;
+  const dir=loadDropdown.value;
+  try{
+    const res=await fetch(`/api/roam_details?roam=${r.roam_index}${dir?`&dir=${encodeURIComponent(dir)}`:""}`);
+    if(!res.ok)return;
+    const full=await res.json();
+    if(data.roams[i]!==r)return;   // another run was loaded meanwhile
+    data.roams[i]=full;
+    roamList.redraw();
+  }catch(err){
+    console.error("Failed to load roam details:",err);
+  }
+}
+
+async function downloadRoamLog(filename){
+  if (!filename) { alert("No log file found for this roam."); return; }
+  try {
+    const selectedDir = document.getElementById("loadDropdown")?.value || "";
+    const url = selectedDir
+      ? `/api/download_log?dir=${encodeURIComponent(selectedDir)}&filename=${encodeURIComponent(filename)}`
+      : `/api/download_log?filename=${encodeURIComponent(filename)}`;
+
+    const res = await fetch(`${url}&_=${Date.now()}`);
+    if (!res.ok) { alert("No log file found for this roam."); return; }
+
+    const blob = await res.blob();
+    const blobUrl = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = blobUrl;
+    a.download = filename;
+    document.body.appendChild(a);
+    a.click();
+    a.remove();
+    window.URL.revokeObjectURL(blobUrl);
+  } catch (err) {
+    console.error("Failed to download roam log:", err);
+    alert("Failed to download log.");
   }
 }
 
 function expandAllRoams() {
-  document.querySelectorAll("#roams .accBody").forEach(b => b.classList.add("open"));
+  (data?.roams || []).forEach(r => openRoams.add(r.roam_index));
+  roamList?.reset();
 }
 
 function collapseAllRoams() {
-  document.querySelectorAll("#roams .accBody").forEach(b => b.classList.remove("open"));
+  openRoams.clear();
+  roamList?.reset();
 }
 
 document.addEventListener("DOMContentLoaded", () => {
@@ -479,12 +640,16 @@ runBtn.addEventListener('click',async()=>{
   statusLabel.textContent="";
   showOverlay();
   loadDropdown.selectedIndex = 0; // reset dropdown to "Load Results..."
+  openRoams.clear();
 
 
   const iface = document.getElementById('iface').value.trim() || "wlan0";
   const rssi = parseInt(document.getElementById('rssi').value.trim() || "-75", 10);
 
-  const payload = { iface, rssi};
+  const matrix = document.getElementById('matrixMode').checked;
+  const host_sampler = document.getElementById('hostSampler').checked;
+
+  const payload = { iface, rssi, matrix, host_sampler };
   
 try {
     const startRes = await fetch('/api/start_roam', {
@@ -493,8 +658,13 @@ try {
       body: JSON.stringify(payload)
     });
     const startData = await startRes.json();
+    if (startRes.status === 409) {
+      statusLabel.textContent = "A roam cycle is already running.";
+      return;
+    }
     console.log("▶ Roam started with args:", payload, startData);
 
+    startRoamStream();
     const logsPromise = pollLogs();
     await pollForSummary();
 
@@ -509,12 +679,43 @@ try {
     console.error("❌ Error starting roam:", err);
     statusLabel.textContent = "Error starting roam.";
   } finally {
+    stopRoamStream();
     runBtn.disabled = false;
     roamInProgress = false;
     hideOverlay();
   }
 });
 
+/*** ==========================================================
+     LIVE ROAM STREAM
+========================================================== */
+// Roams arrive from /api/roams/stream as they finish; the final summary replaces them.
+let roamStream = null;
+
+function startRoamStream() {
+  stopRoamStream();
+  const partial = { roams: [], candidates: [] };
+  roamStream = new EventSource('/api/roams/stream');
+  roamStream.addEventListener('cycle', e => {
+    Object.assign(partial, JSON.parse(e.data));
+    loadData(partial);
+  });
+  roamStream.addEventListener('roam', e => {
+    partial.roams.push(JSON.parse(e.data));
+    loadData(partial);
+    document.getElementById('spinnerText').textContent =
+      `Running roam... ${partial.roams.length} roam(s) finished`;
+  });
+  roamStream.addEventListener('end', stopRoamStream);
+}
+
+function stopRoamStream() {
+  if (roamStream) {
+    roamStream.close();
+    roamStream = null;
+  }
+}
+
 /*** ==========================================================
      LOG POLLING
 ========================================================== */
@@ -586,7 +787,7 @@ async function pollForSummary() {
 
   let baselineMtime = 0;
   try {
-    const res = await fetch('/api/latest_cycle_summary');
+    const res = await fetch('/api/latest_cycle_summary?view=summary');
     if (res.ok) {
       const payload = await res.json();
       baselineMtime = payload.mtime || 0;
@@ -597,17 +798,20 @@ async function pollForSummary() {
   }
 
   for (let i = 0; i < maxWait / pollInterval; i++) {
-    // 🔹 1️⃣ Check for early process exit (flag file)
-    const doneCheck = await fetch(`/server/roam_done.flag?nocache=${Date.now()}`);
-    if (doneCheck.ok) {
-      console.log("⚠️ Detected roam process finished early — stopping poll");
-      statusLabel.textContent = "Roam process exited early.";
-      hideOverlay();
-      return;
+    // 🔹 1️⃣ Check for early process exit (shared run state)
+    const stateRes = await fetch(`/api/run_status?nocache=${Date.now()}`);
+    if (stateRes.ok) {
+      const state = await stateRes.json();
+      if (state.status === "exited_early") {
+        console.log("⚠️ Detected roam process finished early — stopping poll");
+        statusLabel.textContent = "Roam process exited early.";
+        hideOverlay();
+        return;
+      }
     }
 
     // 🔹 2️⃣ Normal summary polling
-    const res = await fetch(`/api/latest_cycle_summary?nocache=${Date.now()}`);
+    const res = await fetch(`/api/latest_cycle_summary?view=summary&nocache=${Date.now()}`);
     if (res.ok) {
       const payload = await res.json();
       const { mtime, data } = payload;
@@ -639,31 +843,110 @@ function renderCycleSummary(summary) {
 /*** ==========================================================
      DOWNLOAD DEBUG LOG BUTTON
 ========================================================== */
-downloadLogBtn.addEventListener("click", async () => {
-  try {
-    const selectedDir = loadDropdown.value; // empty if viewing current run
-    const url = selectedDir
-      ? `/api/download_log?dir=${encodeURIComponent(selectedDir)}&filename=roam_debug.log`
-      : `/api/download_log?filename=roam_debug.log`;
+// Plain navigation: the browser's download manager streams the file and can
+// resume it with Range requests instead of buffering it into a blob first.
+downloadLogBtn.addEventListener("click", () => {
+  const selectedDir = loadDropdown.value; // empty if viewing current run
+  const a = document.createElement("a");
+  a.href = selectedDir
+    ? `/api/download_log?dir=${encodeURIComponent(selectedDir)}&filename=roam_debug.log`
+    : `/api/download_log?filename=roam_debug.log`;
+  a.download = "roam_debug.log";
+  document.body.appendChild(a);
+  a.click();
+  a.remove();
+});
 
-    const res = await fetch(url);
-    if (!res.ok) {
-      alert("No debug log found for the selected run.");
-      return;
-    }
-    const blob = await res.blob();
-    const blobUrl = window.URL.createObjectURL(blob);
-    const a = document.createElement("a");
-    a.href = blobUrl;
-    a.download = "roam_debug.log";
-    document.body.appendChild(a);
-    a.click();
-    a.remove();
-    window.URL.revokeObjectURL(blobUrl);
+/*** ==========================================================
+     PAGED LOG VIEWER
+========================================================== */
+// Virtual scroller over /api/log_lines: the spacer has the full log height and
+// only the lines around the viewport are fetched and drawn.
+const LV_LINE_H = 16;      // must match #lvLines line-height
+const LV_OVERSCAN = 100;   // extra lines fetched above/below the viewport
+const lv = { dir: "", total: 0, start: 0, end: -1, roamStarts: [], seq: 0, pending: null };
+
+async function fetchLogWindow(params) {
+  const q = new URLSearchParams({ filename: "roam_debug.log", ...params });
+  if (lv.dir) q.set("dir", lv.dir);
+  const res = await fetch(`/api/log_lines?${q}`);
+  if (!res.ok) throw new Error((await res.json()).error || res.statusText);
+  return res.json();
+}
+
+function drawLogWindow(w) {
+  lv.total = w.total_lines;
+  lv.start = w.start;
+  lv.end = w.end;
+  const starts = new Set(w.roam_starts);
+  $("#lvSpacer").style.height = `${lv.total * LV_LINE_H}px`;
+  const pre = $("#lvLines");
+  pre.style.top = `${(w.start - 1) * LV_LINE_H}px`;
+  pre.innerHTML = w.lines.map((text, i) => {
+    const n = w.start + i;
+    const esc = text.replace(/&/g, "&amp;").replace(/</g, "&lt;");
+    return `<span class="ln">${n}</span>${starts.has(n) ? `<span class="roamStart">${esc}</span>` : esc}`;
+  }).join("\n");
+
+  if (w.roam_starts.length !== lv.roamStarts.length) {
+    lv.roamStarts = w.roam_starts;
+    $("#lvRoam").innerHTML = '<option value="">roam…</option>' +
+      w.roam_starts.map((line, i) => `<option value="${i + 1}">#${i + 1} (line ${line})</option>`).join("");
+  }
+}
+
+function updateLogPos() {
+  const scroll = $("#lvScroll");
+  const first = Math.floor(scroll.scrollTop / LV_LINE_H) + 1;
+  const last = Math.min(lv.total, first + Math.ceil(scroll.clientHeight / LV_LINE_H));
+  $("#lvPos").textContent = lv.total ? `lines ${first}–${last} of ${lv.total}` : "";
+  return [first, last];
+}
+
+async function refreshLogWindow() {
+  const [first, last] = updateLogPos();
+  if (first >= lv.start && last <= lv.end) return;   // already drawn
+  const seq = ++lv.seq;
+  const start = Math.max(1, first - LV_OVERSCAN);
+  const w = await fetchLogWindow({ start, count: last - start + 1 + LV_OVERSCAN });
+  if (seq === lv.seq) drawLogWindow(w);               // drop stale responses
+}
+
+function scrollLogTo(line) {
+  $("#lvScroll").scrollTop = (line - 1) * LV_LINE_H;
+  refreshLogWindow().catch(err => console.error("Log viewer:", err));
+}
+
+async function openLogViewer(roam) {
+  lv.dir = loadDropdown.value || "";
+  lv.start = 0; lv.end = -1; lv.roamStarts = [];
+  $("#lvLines").innerHTML = "";
+  $("#logViewer").style.display = "flex";
+  try {
+    const w = await fetchLogWindow(roam ? { roam, count: 1 } : { start: 1, count: 1 });
+    drawLogWindow(w);
+    scrollLogTo(w.start);
   } catch (err) {
-    console.error("Failed to download debug log:", err);
-    alert("Failed to download debug log.");
+    $("#lvPos").textContent = `Could not load log: ${err.message}`;
   }
+}
+
+$("#viewLogBtn").addEventListener("click", () => openLogViewer());
+$("#lvClose").addEventListener("click", () => { $("#logViewer").style.display = "none"; });
+$("#lvScroll").addEventListener("scroll", () => {
+  if (lv.pending) return;
+  lv.pending = requestAnimationFrame(() => {
+    lv.pending = null;
+    refreshLogWindow().catch(err => console.error("Log viewer:", err));
+  });
+});
+$("#lvLine").addEventListener("change", e => {
+  const n = parseInt(e.target.value, 10);
+  if (n >= 1) scrollLogTo(Math.min(n, lv.total));
+});
+$("#lvRoam").addEventListener("change", e => {
+  const i = parseInt(e.target.value, 10);
+  if (i >= 1) scrollLogTo(lv.roamStarts[i - 1]);
 });
 
 /*** ==========================================================
@@ -689,7 +972,7 @@ confirmSave.onclick = async () => {
   saveModal.style.display = "none";
 
   try {
-    const latest = await fetch("/api/latest_cycle_summary");
+    const latest = await fetch("/api/latest_cycle_summary?view=summary");
     const latestData = await latest.json();
     const runDir = latestData.run_dir;
 
@@ -712,17 +995,30 @@ confirmSave.onclick = async () => {
 ========================================================== */
 const loadDropdown = document.getElementById("loadDropdown");
 
-async function refreshLoadDropdown() {
+const RUNS_PAGE = 50;
+let runsCursor = null;   // next page of /api/runs, or null when all are listed
+
+async function refreshLoadDropdown(more = false) {
   try {
-    const res = await fetch("/api/list_saved_runs");
-    const runs = await res.json();
-    loadDropdown.innerHTML = '<option value="">Load Results...</option>';
-    runs.forEach(run => {
+    const q = new URLSearchParams({ limit: RUNS_PAGE, fields: "dir,ssid,timestamp,failures" });
+    if (more && runsCursor) q.set("cursor", runsCursor);
+    const res = await fetch(`/api/runs?${q}`);
+    const page = await res.json();
+    if (!more) loadDropdown.innerHTML = '<option value="">Load Results...</option>';
+    loadDropdown.querySelector('option[value="__more"]')?.remove();
+    page.runs.forEach(run => {
       const opt = document.createElement("option");
       opt.value = run.dir;
-      opt.textContent = `${run.ssid} (${new Date(run.timestamp).toLocaleString()})`;
+      opt.textContent = `${run.ssid} (${new Date(run.timestamp).toLocaleString()})${run.failures ? ` ⚠ ${run.failures}` : ""}`;
       loadDropdown.appendChild(opt);
     });
+    runsCursor = page.next_cursor;
+    if (runsCursor) {
+      const opt = document.createElement("option");
+      opt.value = "__more";
+      opt.textContent = `More… (${page.total - (loadDropdown.options.length - 1)} older)`;
+      loadDropdown.appendChild(opt);
+    }
   } catch (err) {
     console.error("Failed to refresh saved runs:", err);
   }
@@ -730,11 +1026,17 @@ async function refreshLoadDropdown() {
 
 loadDropdown.onchange = async () => {
   const dir = loadDropdown.value;
+  if (dir === "__more") {
+    loadDropdown.selectedIndex = 0;
+    await refreshLoadDropdown(true);
+    return;
+  }
   if (!dir) return;
 
   try {
-    const res = await fetch(`/api/load_results?dir=${encodeURIComponent(dir)}`);
+    const res = await fetch(`/api/load_results?dir=${encodeURIComponent(dir)}&view=summary`);
     const data = await res.json();
+    openRoams.clear();
     renderCycleSummary(data);; // existing render logic for cycle_summary.json
   } catch (err) {
     console.error("Failed to load saved results:", err);